@@ -0,0 +1,290 @@
+"""Benchmarks srcom.py against a local stand-in for the speedrun.com API
+
+Each scenario is run for every leaderboard size, reporting the number of
+requests the server received, the wall time, the throughput in objects per
+second, the parse time per object and the peak memory allocated by Python
+while it ran.
+
+Usage::
+
+    python -m benchmarks.run --sizes 10,1000,50000 --latency 0.02
+    python -m benchmarks.run --url http://127.0.0.1:8080/api/v1/ --json out.json
+"""
+
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import aiohttp
+
+import srcom
+from srcom.dataclasses import Run
+from srcom.table import LeaderboardTable
+
+from .server import DEFAULT_SIZES
+
+
+class Result:
+    """Measurements of one scenario at one leaderboard size"""
+
+    __slots__ = (
+        "scenario",
+        "size",
+        "objects",
+        "requests",
+        "wall",
+        "parse",
+        "peak",
+    )
+
+    def __init__(self, scenario, size):
+        self.scenario = scenario
+        self.size = size
+        self.objects = 0
+        self.requests = 0
+        self.wall = 0.0
+        self.parse = None
+        self.peak = 0
+
+    @property
+    def throughput(self):
+        return self.objects / self.wall if self.wall else 0.0
+
+    def to_dict(self):
+        return {
+            "scenario": self.scenario,
+            "size": self.size,
+            "objects": self.objects,
+            "requests": self.requests,
+            "wall_s": self.wall,
+            "objects_per_s": self.throughput,
+            "parse_us": self.parse,
+            "peak_kib": self.peak / 1024,
+        }
+
+
+async def render_leaderboard(client, size, top, embed):
+    """Fetches the top of a leaderboard and the players of every run"""
+    game = await client.get_game(id=f"game{size}")
+    runs = await game.leaderboard(top, embed=["players"] if embed else None)
+
+    rows = 0
+    for run in runs:
+        names = [player.name for player in await run.players()]
+        rows += len(names)
+    return rows
+
+
+async def crawl_runs(client, size, page_size):
+    """Iterates over every run of a game"""
+    game = await client.get_game(id=f"game{size}")
+    runs = 0
+    async for run in game.iter_runs(page_size=page_size):
+        runs += 1
+    return runs
+
+
+def parse_runs(board, http):
+    """Creates a Run for every entry of a leaderboard response"""
+    runs = [Run(entry["run"], http, entry["place"]) for entry in board["runs"]]
+    return len(runs)
+
+
+def parse_table(board, http):
+    """Creates a LeaderboardTable from a leaderboard response"""
+    return len(LeaderboardTable.from_json(board))
+
+
+async def measure(result, server_url, coro):
+    async with aiohttp.ClientSession() as session:
+        await session.post(server_url + "_reset")
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        result.objects = await coro
+        result.wall = time.perf_counter() - start
+        result.peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        async with session.get(server_url + "_stats") as resp:
+            result.requests = (await resp.json())["requests"]
+    return result
+
+
+def measure_parse(result, board, http, func, repeat):
+    tracemalloc.start()
+    func(board, http)
+    result.peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    # Timed separately, as tracing allocations slows parsing down
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result.objects = func(board, http)
+    result.wall = (time.perf_counter() - start) / repeat
+    if result.objects:
+        result.parse = result.wall / result.objects * 1e6
+    return result
+
+
+async def benchmark(args, base_url):
+    server_url = base_url.split("/api/v1/")[0] + "/"
+    results = []
+
+    def client():
+        # A fresh client per scenario so that nothing is cached between them
+        return srcom.Client(
+            rate_limit=args.rate_limit,
+            rate_period=1.0,
+            base_url=base_url,
+        )
+
+    for size in args.sizes:
+        scenarios = [
+            ("leaderboard+players", render_leaderboard, (args.top, False)),
+            ("leaderboard+embed", render_leaderboard, (args.top, True)),
+            ("crawl runs", crawl_runs, (args.page_size,)),
+        ]
+        for name, scenario, extra in scenarios:
+            async with client() as c:
+                result = await measure(
+                    Result(name, size), server_url, scenario(c, size, *extra)
+                )
+            results.append(result)
+            report(result)
+
+        async with client() as c:
+            http = c.http
+            board = await http.get(
+                f"leaderboards/game{size}/category/cat{size}"
+            )
+            board = board["data"]
+            for name, func in (
+                ("parse Run", parse_runs),
+                ("parse table", parse_table),
+            ):
+                result = measure_parse(
+                    Result(name, size), board, http, func, args.repeat
+                )
+                results.append(result)
+                report(result)
+
+    return results
+
+
+def report(result):
+    parse = f"{result.parse:9.2f}" if result.parse is not None else " " * 9
+    print(
+        f"{result.scenario:<22}{result.size:>8}{result.objects:>9}"
+        f"{result.requests:>9}{result.wall:>10.3f}{result.throughput:>12.0f}"
+        f"{parse}{result.peak / 1024:>11.0f}"
+    )
+
+
+def header():
+    print(
+        f"{'scenario':<22}{'size':>8}{'objects':>9}{'requests':>9}"
+        f"{'wall (s)':>10}{'objects/s':>12}{'parse µs':>9}{'peak KiB':>11}"
+    )
+
+
+def start_server(args):
+    proc = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.server",
+            "--port",
+            str(args.port),
+            "--sizes",
+            ",".join(map(str, args.sizes)),
+            "--latency",
+            str(args.latency),
+            *(["--rate", str(args.rate)] if args.rate is not None else []),
+            *(["--fixtures", args.fixtures] if args.fixtures else []),
+        ],
+        stdout=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{args.port}/api/v1/"
+
+    async def wait():
+        async with aiohttp.ClientSession() as session:
+            for _ in range(100):
+                try:
+                    async with session.get(
+                        base_url[: -len("api/v1/")] + "_stats"
+                    ):
+                        return
+                except aiohttp.ClientConnectionError:
+                    await asyncio.sleep(0.1)
+        raise RuntimeError("stand-in server did not start")
+
+    try:
+        asyncio.get_event_loop().run_until_complete(wait())
+    except BaseException:
+        proc.terminate()
+        raise
+    return proc, base_url
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument(
+        "--url", help="base URL of a running stand-in server's API"
+    )
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--sizes",
+        default=",".join(map(str, DEFAULT_SIZES)),
+        type=lambda s: [int(size) for size in s.split(",")],
+        help="comma-separated leaderboard sizes",
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="server seconds per response"
+    )
+    parser.add_argument(
+        "--rate", type=int, help="server requests per minute before 420s"
+    )
+    parser.add_argument("--fixtures", help="directory of recorded responses")
+    parser.add_argument(
+        "--rate-limit",
+        type=int,
+        default=1000,
+        help="client requests per second. Defaults to 1000",
+    )
+    parser.add_argument(
+        "--top", type=int, default=100, help="leaderboard rows rendered"
+    )
+    parser.add_argument("--page-size", type=int, default=200)
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="repetitions of parse scenarios"
+    )
+    parser.add_argument("--json", help="file to write the results to")
+    args = parser.parse_args()
+
+    proc = None
+    base_url = args.url
+    if base_url is None:
+        proc, base_url = start_server(args)
+
+    try:
+        header()
+        results = asyncio.get_event_loop().run_until_complete(
+            benchmark(args, base_url)
+        )
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump([r.to_dict() for r in results], f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
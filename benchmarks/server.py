@@ -0,0 +1,586 @@
+"""A local stand-in for the speedrun.com API, for benchmarking srcom.py
+
+Serves recorded responses from a fixtures directory when available, and
+otherwise generates responses shaped like the real API's. For every size N
+given on the command line, the game "gameN" has a category "catN" whose
+leaderboard has N runs, each by a different user, and N runs in total. The
+runs endpoint filters them by game, category and status and orders them by
+date; unknown IDs are not found. Runs of any status can be added with
+:meth:`StandInServer.add_run`, and removed again. The games endpoint lists
+the generated games, filtered by name and abbreviation, in bulk mode too.
+
+Recorded fixtures are stored under their API path with a .json suffix, e.g.
+``fixtures/games/o1y9wo6q.json``, and may contain the query string, e.g.
+``fixtures/runs?game=o1y9wo6q.json``. Links to speedrun.com in them are
+rewritten to point to the local server.
+
+Usage::
+
+    python -m benchmarks.server --port 8080 --latency 0.05 --rate 100
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+
+from aiohttp import web
+
+API_ROOT = "https://www.speedrun.com/api/v1/"
+DEFAULT_SIZES = (10, 1000, 50000)
+
+
+def _links(base, **rels):
+    return [{"rel": rel, "uri": base + path} for rel, path in rels.items()]
+
+
+def _created(n):
+    """Returns when the game "gameN" was added, later for larger sizes"""
+    created = datetime(2015, 1, 1) + timedelta(minutes=n)
+    return created.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def game(base, n):
+    id = f"game{n}"
+    return {
+        "id": id,
+        "names": {
+            "international": f"Benchmark Game {n}",
+            "japanese": None,
+            "twitch": f"Benchmark Game {n}",
+        },
+        "abbreviation": id,
+        "weblink": f"https://www.speedrun.com/{id}",
+        "released": 2000,
+        "release-date": "2000-01-01",
+        "created": _created(n),
+        "ruleset": {
+            "show-milliseconds": True,
+            "require-verification": True,
+            "require-video": False,
+            "run-times": ["realtime"],
+            "default-time": "realtime",
+            "emulators-allowed": False,
+        },
+        "romhack": False,
+        "gametypes": [],
+        "platforms": ["plat1"],
+        "regions": [],
+        "moderators": {"user0": "super-moderator"},
+        "links": _links(
+            base,
+            self=f"games/{id}",
+            runs=f"runs?game={id}",
+            levels=f"games/{id}/levels",
+            categories=f"games/{id}/categories",
+            variables=f"games/{id}/variables",
+            records=f"games/{id}/records",
+            leaderboard=f"leaderboards/{id}/category/cat{n}",
+        ),
+    }
+
+
+def category(base, n):
+    id = f"cat{n}"
+    return {
+        "id": id,
+        "name": "Any%",
+        "weblink": f"https://www.speedrun.com/game{n}#Any",
+        "type": "per-game",
+        "rules": "Finish the game.",
+        "players": {"type": "exactly", "value": 1},
+        "miscellaneous": False,
+        "links": _links(
+            base,
+            self=f"categories/{id}",
+            game=f"games/game{n}",
+            variables=f"categories/{id}/variables",
+            records=f"categories/{id}/records",
+            runs=f"runs?category={id}",
+            leaderboard=f"leaderboards/game{n}/category/{id}",
+        ),
+    }
+
+
+def variable(base, n):
+    id = f"var{n}"
+    return {
+        "id": id,
+        "name": "Version",
+        "category": f"cat{n}",
+        "scope": {"type": "global"},
+        "mandatory": True,
+        "user-defined": False,
+        "obsoletes": True,
+        "values": {
+            "values": {
+                "v1": {"label": "1.0", "rules": None},
+                "v2": {"label": "2.0", "rules": None},
+            },
+            "default": "v1",
+        },
+        "is-subcategory": True,
+        "links": _links(base, self=f"variables/{id}", game=f"games/game{n}"),
+    }
+
+
+def user(base, id):
+    return {
+        "id": id,
+        "names": {"international": f"Runner {id}", "japanese": None},
+        "weblink": f"https://www.speedrun.com/user/{id}",
+        "role": "user",
+        "signup": "2015-01-01T00:00:00Z",
+        "location": {
+            "country": {"code": "ca", "names": {"international": "Canada"}},
+            "region": None,
+        },
+        "twitch": {"uri": f"https://www.twitch.tv/{id}"},
+        "hitbox": None,
+        "youtube": None,
+        "twitter": None,
+        "speedrunslive": None,
+        "links": _links(
+            base,
+            self=f"users/{id}",
+            runs=f"runs?user={id}",
+            games=f"games?moderator={id}",
+            **{"personal-bests": f"users/{id}/personal-bests"},
+        ),
+    }
+
+
+def _run_date(i):
+    """Returns the (year, month, day) of the ith run of a game, which cycle
+    through ten years so that date order differs from run order"""
+    return 2010 + i // (28 * 12) % 10, i // 28 % 12 + 1, i % 28 + 1
+
+
+def run(base, n, i):
+    id = f"run{n}x{i}"
+    year, month, day = _run_date(i)
+    player = f"user{i}"
+    return {
+        "id": id,
+        "weblink": f"https://www.speedrun.com/game{n}/run/{id}",
+        "game": f"game{n}",
+        "level": None,
+        "category": f"cat{n}",
+        "videos": {"links": [{"uri": f"https://youtu.be/{id}"}]},
+        "comment": "GG",
+        "status": {
+            "status": "verified",
+            "examiner": "user0",
+            "verify-date": f"{year}-{month:02d}-{day:02d}T12:00:00Z",
+        },
+        "players": [
+            {"rel": "user", "id": player, "uri": base + f"users/{player}"}
+        ],
+        "date": f"{year}-{month:02d}-{day:02d}",
+        "submitted": f"{year}-{month:02d}-{day:02d}T10:00:00Z",
+        "times": {
+            "primary": f"PT{3600 + i}S",
+            "primary_t": 3600.0 + i * 0.5,
+            "realtime": f"PT{3600 + i}S",
+            "realtime_t": 3600.0 + i * 0.5,
+            "realtime_noloads": None,
+            "realtime_noloads_t": 0,
+            "ingame": None,
+            "ingame_t": 0,
+        },
+        "system": {"platform": "plat1", "emulated": False, "region": None},
+        "splits": None,
+        "values": {f"var{n}": "v1" if i % 3 else "v2"},
+        "links": _links(
+            base,
+            self=f"runs/{id}",
+            game=f"games/game{n}",
+            category=f"categories/cat{n}",
+            platform="platforms/plat1",
+            examiner="users/user0",
+        ),
+    }
+
+
+def _size(id, prefix):
+    try:
+        return int(id[len(prefix) :])
+    except ValueError:
+        raise web.HTTPNotFound()
+
+
+# Values of the runs endpoint's orderby parameter that sort by a date, all of
+# which are the run's date for generated runs
+_DATE_ORDERS = {"date", "submitted", "verify-date"}
+
+
+def _timestamp(run, orderby):
+    """Returns the value a run's data is sorted by for the given orderby"""
+    if orderby == "verify-date":
+        return run["status"].get("verify-date") or ""
+    return run[orderby] or ""
+
+
+class StandInServer:
+    """Generates or replays API responses and counts the requests served
+
+    Parameters
+    ------------
+    sizes: Iterable[int]
+        the sizes of the generated games
+    latency: float
+        seconds added to every response
+    rate: Optional[int]
+        requests allowed per ``period`` seconds before responding with 420
+    period: float
+        length of the rate limiting window in seconds
+    fixtures: Optional[str]
+        directory of recorded responses
+    """
+
+    def __init__(
+        self,
+        sizes=DEFAULT_SIZES,
+        latency=0.0,
+        rate=None,
+        period=60.0,
+        fixtures=None,
+    ):
+        self.sizes = set(sizes)
+        self.latency = latency
+        self.rate = rate
+        self.period = period
+        self.fixtures = fixtures
+
+        self.requests = 0
+        self.throttled = 0
+        self.bytes = 0
+        self._window = []
+        self._cache = {}
+        self._orders = {}
+        self._added = []
+
+    def add_run(self, data):
+        """Adds the data of a run to those served by the runs endpoint, e.g.
+        a run that isn't verified. Its game must be one of the generated
+        games"""
+        self._added.append(data)
+
+    def remove_run(self, id):
+        """Removes a run added with :meth:`add_run`, as if it was deleted"""
+        self._added = [r for r in self._added if r["id"] != id]
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get("/_stats", self.stats)
+        app.router.add_post("/_reset", self.reset)
+        app.router.add_get("/api/v1/{path:.*}", self.handle)
+        return app
+
+    async def stats(self, request):
+        return web.json_response(
+            {
+                "requests": self.requests,
+                "throttled": self.throttled,
+                "bytes": self.bytes,
+            }
+        )
+
+    async def reset(self, request):
+        self.requests = self.throttled = self.bytes = 0
+        self._window.clear()
+        return web.json_response({})
+
+    async def handle(self, request):
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if self.rate is not None:
+            now = time.monotonic()
+            self._window = [t for t in self._window if t > now - self.period]
+            if len(self._window) >= self.rate:
+                self.throttled += 1
+                retry_after = self._window[0] + self.period - now
+                return web.json_response(
+                    {"status": 420, "message": "Too many requests"},
+                    status=420,
+                    headers={"Retry-After": f"{retry_after:.3f}"},
+                )
+            self._window.append(now)
+
+        base = f"http://{request.host}/api/v1/"
+        path = request.match_info["path"]
+        body = self._replay(base, request.path_qs[len("/api/v1/") :])
+        if body is None:
+            body = json.dumps(self._generate(base, path, request.query))
+        self.bytes += len(body)
+        return web.Response(body=body.encode(), content_type="application/json")
+
+    def _replay(self, base, path_qs):
+        if self.fixtures is None:
+            return None
+
+        for name in (path_qs, path_qs.split("?", 1)[0]):
+            file = os.path.join(self.fixtures, name + ".json")
+            if os.path.isfile(file):
+                with open(file) as f:
+                    return f.read().replace(API_ROOT, base)
+        return None
+
+    def _generate(self, base, path, query):
+        parts = path.strip("/").split("/")
+
+        if parts == ["games"]:
+            return self._games(base, query)
+        if parts[0] == "games" and len(parts) >= 2:
+            n = self._game_size(parts[1], "game")
+            if len(parts) == 2:
+                data = game(base, n)
+                embed = query.get("embed", "").split(",")
+                if "categories" in embed:
+                    data["categories"] = {"data": [category(base, n)]}
+                if "variables" in embed:
+                    data["variables"] = {"data": [variable(base, n)]}
+                if "levels" in embed:
+                    data["levels"] = {"data": []}
+                return {"data": data}
+            if parts[2] == "categories":
+                return {"data": [category(base, n)]}
+            if parts[2] == "variables":
+                return {"data": [variable(base, n)]}
+            if parts[2] == "levels":
+                return {"data": []}
+        if parts[0] == "categories" and len(parts) >= 2:
+            n = self._game_size(parts[1], "cat")
+            if len(parts) == 2:
+                return {"data": category(base, n)}
+            if parts[2] == "variables":
+                return {"data": [variable(base, n)]}
+        if parts[0] == "users" and len(parts) == 2:
+            return {"data": user(base, parts[1])}
+        if parts == ["runs"]:
+            return self._runs(base, query)
+        if parts[0] == "runs" and len(parts) == 2:
+            data = self._run(base, parts[1])
+            self._embed_players(base, [data], query)
+            return {"data": data}
+        if parts[0] == "leaderboards" and len(parts) == 4:
+            return self._leaderboard(
+                base, self._game_size(parts[1], "game"), query
+            )
+        raise web.HTTPNotFound()
+
+    def _runs(self, base, query):
+        games = sorted(self.sizes)
+        if "game" in query:
+            games = [self._game_size(query["game"], "game")]
+        if "category" in query:
+            n = self._game_size(query["category"], "cat")
+            games = [n] if n in games else []
+        status = query.get("status")
+        added = [
+            r
+            for r in self._added
+            if status in (None, r["status"]["status"])
+            and self._game_size(r["game"], "game") in games
+            and query.get("category", r["category"]) == r["category"]
+        ]
+        if status not in (None, "verified"):
+            # Every generated run is verified
+            games = []
+
+        orderby, direction = query.get("orderby"), query.get("direction")
+        order = self._order(tuple(games), orderby, direction)
+        if added:
+            order = self._merge(order, added, orderby, direction)
+        offset = int(query.get("offset", 0))
+        limit = min(int(query.get("max", 20)), 200)
+        data = [
+            dict(r) if isinstance(r, dict) else run(base, *r)
+            for r in order[offset : offset + limit]
+        ]
+
+        self._embed_players(base, data, query)
+        return self._page(base, "runs", data, len(order), offset, limit, query)
+
+    def _games(self, base, query):
+        games = sorted(self.sizes)
+        if (
+            query.get("orderby") == "created"
+            and query.get("direction") == "desc"
+        ):
+            games.reverse()
+
+        bulk = query.get("_bulk") in ("yes", "true", "1")
+        data = [game(base, n) for n in games]
+        if "name" in query:
+            name = query["name"].lower()
+            data = [
+                g for g in data if name in g["names"]["international"].lower()
+            ]
+        if "abbreviation" in query:
+            data = [
+                g for g in data if g["abbreviation"] == query["abbreviation"]
+            ]
+
+        offset = int(query.get("offset", 0))
+        limit = min(int(query.get("max", 20)), 1000 if bulk else 200)
+        page = data[offset : offset + limit]
+        if bulk:
+            # Bulk mode only returns the names of the games
+            fields = ("id", "names", "abbreviation", "weblink")
+            page = [{key: g[key] for key in fields} for g in page]
+        return self._page(base, "games", page, len(data), offset, limit, query)
+
+    def _page(self, base, endpoint, data, total, offset, limit, query):
+        """Returns a page of a paginated endpoint's items"""
+        links = []
+        if offset + limit < total:
+            next_query = dict(query, offset=offset + limit, max=limit)
+            links.append(
+                {
+                    "rel": "next",
+                    "uri": base + endpoint + "?" + urlencode(next_query),
+                }
+            )
+        return {
+            "data": data,
+            "pagination": {
+                "offset": offset,
+                "max": limit,
+                "size": len(data),
+                "links": links,
+            },
+        }
+
+    def _run(self, base, id):
+        for r in self._added:
+            if r["id"] == id:
+                return dict(r)
+
+        n, _, i = id.partition("x")
+        n = self._game_size(n, "run")
+        if not i.isdigit() or int(i) >= n:
+            raise web.HTTPNotFound()
+        return run(base, n, int(i))
+
+    def _embed_players(self, base, runs, query):
+        if "players" in query.get("embed", "").split(","):
+            for r in runs:
+                r["players"] = {"data": [user(base, r["players"][0]["id"])]}
+
+    def _game_size(self, id, prefix):
+        n = _size(id, prefix)
+        if n not in self.sizes:
+            raise web.HTTPNotFound()
+        return n
+
+    def _order(self, games, orderby, direction):
+        """Returns the (game size, run index) pairs of the runs of the given
+        games in the order requested, computed once per order"""
+        key = (games, orderby, direction)
+        if key not in self._orders:
+            order = [(n, i) for n in games for i in range(n)]
+            if orderby in _DATE_ORDERS:
+                order.sort(key=lambda pair: _run_date(pair[1]))
+            if direction == "desc":
+                order.reverse()
+            self._orders[key] = order
+        return self._orders[key]
+
+    def _merge(self, order, added, orderby, direction):
+        """Returns a generated order with the data of added runs sorted in"""
+        if orderby not in _DATE_ORDERS:
+            return order + added
+
+        def key(r):
+            if isinstance(r, dict):
+                return _timestamp(r, orderby)
+            year, month, day = _run_date(r[1])
+            hour = {"date": "", "submitted": "T10:00:00Z"}.get(
+                orderby, "T12:00:00Z"
+            )
+            return f"{year}-{month:02d}-{day:02d}{hour}"
+
+        return sorted(order + added, key=key, reverse=direction == "desc")
+
+    def _leaderboard(self, base, n, query):
+        if n not in self.sizes:
+            raise web.HTTPNotFound()
+
+        top = int(query.get("top", n))
+        board = {
+            "weblink": f"https://www.speedrun.com/game{n}#Any",
+            "game": f"game{n}",
+            "category": f"cat{n}",
+            "level": None,
+            "platform": None,
+            "region": None,
+            "emulators": None,
+            "video-only": False,
+            "timing": "realtime",
+            "values": {},
+            "runs": [
+                {"place": i + 1, "run": run(base, n, i)}
+                for i in range(min(n, top))
+            ],
+            "links": _links(base, game=f"games/game{n}"),
+        }
+
+        embed = query.get("embed", "").split(",")
+        if "players" in embed:
+            board["players"] = {
+                "data": [user(base, f"user{i}") for i in range(min(n, top))]
+            }
+        if "category" in embed:
+            board["category"] = {"data": category(base, n)}
+        if "game" in embed:
+            board["game"] = {"data": game(base, n)}
+        return {"data": board}
+
+
+async def start(host="127.0.0.1", port=8080, **kwargs):
+    """Starts a stand-in server in the running event loop, returning it and
+    its aiohttp runner"""
+    server = StandInServer(**kwargs)
+    runner = web.AppRunner(server.app())
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return server, runner
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument(
+        "--sizes",
+        default=",".join(map(str, DEFAULT_SIZES)),
+        help="comma-separated leaderboard sizes",
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="seconds per response"
+    )
+    parser.add_argument(
+        "--rate", type=int, help="requests allowed per period before 420s"
+    )
+    parser.add_argument("--period", type=float, default=60.0)
+    parser.add_argument("--fixtures", help="directory of recorded responses")
+    args = parser.parse_args()
+
+    server = StandInServer(
+        sizes=[int(s) for s in args.sizes.split(",")],
+        latency=args.latency,
+        rate=args.rate,
+        period=args.period,
+        fixtures=args.fixtures,
+    )
+    web.run_app(server.app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,18 @@
-from .client import Client
+from .cache import ResponseCache
+from .catalog import CatalogEntry, GameCatalog
+from .client import Client, default_client
+from .errors import HTTPException, NotFound, SRComException, Throttled
+from .feed import RunEvent, RunWatcher
+from .http import ConnectionPool
+from .identity import IdentityMap
+from .mirror import Mirror, MirrorClient
+from .progression import Progression, ProgressionEntry
+from .ratelimit import Priority, RateLimiter, SharedTokenBucket, TokenBucket
+from .retry import RetryPolicy
+from . import serialize
+from .snapshot import LeaderboardChange, LeaderboardSnapshot, LeaderboardWatcher
+from .stats import RequestEvent, RequestStats
+from .sync import BackgroundLoop, SyncClient, SyncIterator, SyncProxy
+from .table import LeaderboardTable
+from .warm import LeaderboardWarmer
 from .dataclasses import *
@@ -1,23 +1,114 @@
 from . import client as srcom_client
+from . import utils
+from .ratelimit import Priority
 
 
 class Resource:
 
+    __slots__ = ("_http", "id", "link", "_links", "_data", "__weakref__")
+
     endpoint = None
 
+    # Slots of the lazily computed attributes, cleared when refreshed
+    _lazy_slots = ()
+
+    # Subclasses by name, for from_dict()
+    _types = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        Resource._types[cls.__name__] = cls
+        cls._lazy_slots = tuple(
+            attr.slot
+            for klass in cls.__mro__
+            for attr in vars(klass).values()
+            if isinstance(attr, utils.lazy)
+        )
+
+    def __new__(cls, data=None, http=None, *args, **kwargs):
+        identity_map = getattr(http, "identity_map", None)
+        id = data.get("id") if data else None
+        if identity_map is None or id is None:
+            return super().__new__(cls)
+
+        # Reuse the known instance; __init__ then refreshes it with the data,
+        # so the attributes computed from the old data are cleared
+        resource = identity_map.get(cls, id)
+        if resource is None:
+            resource = super().__new__(cls)
+            identity_map.add(cls, id, resource)
+            return resource
+
+        for slot in cls._lazy_slots:
+            try:
+                delattr(resource, slot)
+            except AttributeError:
+                pass
+        return resource
+
     def __init__(self, data, http):
         self._http = http
+        self._data = data
         self.id = data.get("id")
         self.link = data.get("weblink")
         self._links = data.get("links")
 
     def __eq__(self, other):
-        return self.id == other.id
+        return self is other or self.id == other.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __reduce__(self):
+        # Pickled without the HTTP client; restored with the default client
+        return (_restore, (self.to_dict(),))
+
+    def to_dict(self):
+        """Returns the resource as a dict of JSON types, holding its raw data
+        and type but no reference to its client"""
+        return {"type": type(self).__name__, "data": self._data}
+
+    @classmethod
+    def from_dict(cls, dct, client=None):
+        """Recreates a resource from the result of :meth:`to_dict`, attached to
+        the given client, or the default client if None"""
+        if client is None:
+            client = srcom_client.default_client()
+
+        resource_cls = Resource._types[dct["type"]]
+        if not issubclass(resource_cls, cls):
+            raise TypeError(f"{dct['type']} is not a {cls.__name__}")
+        return resource_cls._from_dict(dct, client.http)
+
+    @classmethod
+    def _from_dict(cls, dct, http):
+        return cls(dct["data"], http)
 
     @classmethod
     async def from_id(cls, id, client=None):
         if client is None:
-            client = srcom_client.Client()
+            client = srcom_client.default_client()
 
-        resp = await client.http.get(f"{cls.endpoint}/{id}")
+        resp = await client.http.get(
+            f"{cls.endpoint}/{id}", priority=Priority.HIGH
+        )
         return cls(resp["data"], client.http)
+
+    @classmethod
+    async def from_ids(cls, ids, client=None, concurrency=10):
+        """Gets several resources by ID, fetching at most concurrency at once
+
+        Each distinct ID is only fetched once. The returned list is in the same
+        order as ids"""
+        if client is None:
+            client = srcom_client.default_client()
+
+        uris = [f"{client.http.BASE}{cls.endpoint}/{id}" for id in ids]
+        data = await utils.fetch_all(
+            client.http, uris, concurrency, Priority.HIGH
+        )
+        return [cls(d, client.http) for d in data]
+
+
+def _restore(dct):
+    return Resource.from_dict(dct)
@@ -0,0 +1,283 @@
+import asyncio
+import collections
+import json
+import sqlite3
+import time
+from urllib.parse import urlencode
+
+# Seconds to keep responses for, by endpoint. Game metadata rarely changes,
+# while runs and leaderboards change whenever a run is verified.
+DEFAULT_TTLS = {
+    "games": 24 * 60 * 60,
+    "categories": 24 * 60 * 60,
+    "variables": 24 * 60 * 60,
+    "levels": 24 * 60 * 60,
+    "series": 24 * 60 * 60,
+    "platforms": 7 * 24 * 60 * 60,
+    "regions": 7 * 24 * 60 * 60,
+    "users": 60 * 60,
+    "guests": 60 * 60,
+    "leaderboards": 5 * 60,
+    "runs": 60,
+}
+
+
+def make_key(url, params=None):
+    """Returns the cache key for a request, independent of parameter order"""
+    if not params:
+        return url
+    sep = "&" if "?" in url else "?"
+    return url + sep + urlencode(sorted((k, str(v)) for k, v in params.items()))
+
+
+def endpoint(url):
+    """Returns the endpoint (first path segment) of an API URL"""
+    path = url.split("/api/v1/", 1)[-1]
+    return path.split("?", 1)[0].split("/", 1)[0]
+
+
+class MemoryCache:
+    """A bounded least-recently-used cache of responses"""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._entries = collections.OrderedDict()
+
+    def get(self, key):
+        try:
+            value, expires = self._entries[key]
+        except KeyError:
+            return None
+
+        if expires <= time.time():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return value, expires
+
+    def set(self, key, value, expires):
+        self._entries[key] = (value, expires)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """A persistent cache of responses stored in an SQLite database
+
+    Writes made while an event loop runs are committed together once the
+    loop's current iteration ends, so that responses stored at once, e.g. by
+    gathered requests, share one commit. Expired rows are deleted when the
+    database is opened and every ``prune_every`` writes.
+    """
+
+    def __init__(self, path, prune_every=1000):
+        self.path = path
+        self.prune_every = prune_every
+        # Can be used from another thread than the one creating it, e.g. by a
+        # SyncClient's background loop, which serializes all access
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        # Commits append to the write-ahead log without waiting for the disk;
+        # a crash can lose the latest responses, but not corrupt the cache
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS responses_expires "
+            "ON responses (expires)"
+        )
+        self._writes = 0
+        self._commit_scheduled = False
+        self.prune()
+
+    def get(self, key):
+        row = self._db.execute(
+            "SELECT value, expires FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        value, expires = row
+        if expires <= time.time():
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._schedule_commit()
+            return None
+
+        return json.loads(value), expires
+
+    def set(self, key, value, expires):
+        self._db.execute(
+            "REPLACE INTO responses (key, value, expires) VALUES (?, ?, ?)",
+            (key, json.dumps(value), expires),
+        )
+        self._writes += 1
+        if self._writes % self.prune_every == 0:
+            self.prune()
+        else:
+            self._schedule_commit()
+
+    def prune(self):
+        """Deletes the expired responses"""
+        self._db.execute(
+            "DELETE FROM responses WHERE expires <= ?", (time.time(),)
+        )
+        self.commit()
+
+    def commit(self):
+        """Commits the pending writes"""
+        self._commit_scheduled = False
+        self._db.commit()
+
+    def clear(self):
+        self._db.execute("DELETE FROM responses")
+        self.commit()
+
+    def close(self):
+        self.commit()
+        self._db.close()
+
+    def _schedule_commit(self):
+        if self._commit_scheduled:
+            return
+
+        try:
+            loop = asyncio.get_event_loop()
+        except RuntimeError:
+            loop = None
+        if loop is None or not loop.is_running():
+            self.commit()
+            return
+
+        def commit():
+            # Unless committed since, e.g. by close()
+            if self._commit_scheduled:
+                self.commit()
+
+        self._commit_scheduled = True
+        loop.call_soon(commit)
+
+
+class ResponseCache:
+    """Two-tier cache of API responses keyed by URL and parameters
+
+    Responses are kept in a bounded in-memory LRU and, if a path is given, in
+    an SQLite database that survives restarts. How long a response is kept
+    depends on its endpoint; see ``DEFAULT_TTLS``.
+
+    Parameters
+    ------------
+    maxsize: Optional[int]
+        maximum number of responses kept in memory. Defaults to 1024
+    path: Optional[str]
+        path of the SQLite database used as the disk tier; None keeps
+        responses in memory only
+    ttls: Optional[Dict[str, float]]
+        seconds to keep responses for, by endpoint; overrides the defaults.
+        A TTL of 0 disables caching for that endpoint
+    default_ttl: Optional[float]
+        seconds to keep responses from endpoints not in ``ttls``. Defaults to
+        60
+    stale_ttl: Optional[float]
+        seconds a response is kept after it expires, during which the client
+        serves it while refreshing it in the background. Defaults to 0
+    """
+
+    def __init__(
+        self, maxsize=1024, path=None, ttls=None, default_ttl=60, stale_ttl=0
+    ):
+        self.memory = MemoryCache(maxsize)
+        self.disk = SQLiteCache(path) if path is not None else None
+
+        self.ttls = dict(DEFAULT_TTLS)
+        if ttls is not None:
+            self.ttls.update(ttls)
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def ttl(self, url):
+        """Returns the number of seconds to keep a response from a URL for"""
+        return self.ttls.get(endpoint(url), self.default_ttl)
+
+    def get(self, url, params=None):
+        """Returns the cached response for a request, or None"""
+        entry = self.lookup(url, params)
+        if entry is None or not entry[1]:
+            return None
+        return entry[0]
+
+    def lookup(self, url, params=None):
+        """Returns the cached response for a request and whether it is still
+        fresh, or None. Stale responses are only kept for ``stale_ttl``"""
+        key = make_key(url, params)
+
+        entry = self.memory.get(key)
+        if entry is None and self.disk is not None:
+            entry = self.disk.get(key)
+            if entry is not None:
+                self.disk_hits += 1
+                self.memory.set(key, *entry)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        # Entries are stored until the end of their stale period
+        value, expires = entry
+        if expires - self.stale_ttl > time.time():
+            self.hits += 1
+            return value, True
+        self.stale_hits += 1
+        return value, False
+
+    def contains(self, url, params=None):
+        """Returns whether a fresh response to a request is kept in memory,
+        without counting a hit or miss"""
+        entry = self.memory.get(make_key(url, params))
+        return entry is not None and entry[1] - self.stale_ttl > time.time()
+
+    def set(self, url, params, value):
+        """Stores the response to a request"""
+        ttl = self.ttl(url)
+        if ttl <= 0:
+            return
+
+        key = make_key(url, params)
+        expires = time.time() + ttl + self.stale_ttl
+        self.memory.set(key, value, expires)
+        if self.disk is not None:
+            self.disk.set(key, value, expires)
+
+    def clear(self):
+        """Removes all cached responses"""
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self):
+        """Returns the hit and miss counters of the cache"""
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "size": len(self.memory),
+        }
+
+    def close(self):
+        if self.disk is not None:
+            self.disk.close()
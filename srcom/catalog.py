@@ -0,0 +1,387 @@
+import asyncio
+import bisect
+import collections
+import json
+import logging
+import os
+import re
+import unicodedata
+from array import array
+
+from . import utils
+from .ratelimit import Priority
+
+log = logging.getLogger(__name__)
+
+_NON_ALNUM = re.compile(r"[\W_]+")
+
+# Fuzzy searches skip the n-grams of the query found in more than this many
+# names (or 4% of them, if more), but count at least its _MIN_GRAMS rarest.
+# The limit * _CANDIDATES names sharing the most n-grams counted are compared
+# with the query
+_COMMON_POSTINGS = 1000
+_MIN_GRAMS = 3
+_CANDIDATES = 10
+
+
+def _normalize(name):
+    """Casefolds a name and collapses everything but letters and digits, in
+    any script, into single spaces"""
+    name = unicodedata.normalize("NFKC", name).casefold()
+    return _NON_ALNUM.sub(" ", name).strip()
+
+
+def _strip_accents(name):
+    """Removes the accents from a normalized name, so that queries typed
+    without them match"""
+    decomposed = unicodedata.normalize("NFD", name)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return unicodedata.normalize("NFC", stripped)
+
+
+def _ngrams(name):
+    """Returns the n-grams of a name used for fuzzy matches: trigrams, or
+    bigrams for names in scripts written without spaces, such as Japanese,
+    whose words are only a few characters long"""
+    if any(unicodedata.east_asian_width(c) in "WF" for c in name):
+        padded = f" {name} "
+        return {padded[i : i + 2] for i in range(len(padded) - 1)}
+    padded = f"  {name} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class CatalogEntry:
+    """A game in a GameCatalog
+
+    Attributes
+    ------------
+    id: str
+        ID of the game
+    name: str
+        international name
+    jp_name: Optional[str]
+        Japanese name
+    twitch_name: Optional[str]
+        name of the game on Twitch
+    abbr: str
+        abbreviation, as in the game's URL
+    """
+
+    __slots__ = ("id", "name", "jp_name", "twitch_name", "abbr")
+
+    def __init__(self, id, name, jp_name, twitch_name, abbr):
+        self.id = id
+        self.name = name
+        self.jp_name = jp_name
+        self.twitch_name = twitch_name
+        self.abbr = abbr
+
+    @classmethod
+    def from_json(cls, game):
+        names = game["names"]
+        return cls(
+            game["id"],
+            names["international"],
+            names.get("japanese"),
+            names.get("twitch"),
+            game["abbreviation"],
+        )
+
+    def to_list(self):
+        return [self.id, self.name, self.jp_name, self.twitch_name, self.abbr]
+
+    def __repr__(self):
+        return f"<CatalogEntry id={self.id!r} name={self.name!r}>"
+
+
+class GameCatalog:
+    """A local copy of the list of games, indexed for name searches
+
+    The catalog is built from a bulk crawl of every game and can be persisted
+    to a file. Names and abbreviations are searched offline through an exact
+    index, a prefix index and an n-gram index for fuzzy matches, so only
+    lookups that find nothing locally are sent to the API.
+
+    Parameters
+    ------------
+    client: Client
+        the client used to build and refresh the catalog
+    path: Optional[str]
+        path of a JSON file to persist the catalog to. It is loaded if it
+        exists
+    min_similarity: Optional[float]
+        n-gram similarity, between 0 and 1, below which fuzzy matches are
+        discarded. Defaults to 0.3
+    """
+
+    def __init__(self, client, path=None, min_similarity=0.3):
+        self.client = client
+        self.path = path
+        self.min_similarity = min_similarity
+
+        self.entries = []
+        self._ids = {}
+        # Exact matches of normalized names and abbreviations, by text
+        self._exact = {}
+        # (normalized name, entry index) pairs, sorted for prefix searches
+        # when first searched after games are added
+        self._prefixes = []
+        self._unsorted = False
+        # Searchable names as (entry index, normalized name), and the
+        # indices of the names containing each n-gram
+        self._names = []
+        self._postings = collections.defaultdict(lambda: array("I"))
+        self._task = None
+        self.last_error = None
+
+        if path is not None and os.path.exists(path):
+            with open(path) as f:
+                for game in json.load(f)["games"]:
+                    self._add(CatalogEntry(*game))
+            self._sort()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, id):
+        return id in self._ids
+
+    async def build(self, page_size=1000):
+        """|coro|
+
+        Crawls every game in bulk mode, adding those not in the catalog yet
+        """
+        await self._crawl({}, page_size, stop_at_known=False)
+        self.save()
+
+    async def refresh(self, page_size=1000):
+        """|coro|
+
+        Adds the games created since the catalog was built or last refreshed
+
+        Games are crawled newest first, until a page with no new games.
+
+        Returns
+        ---------
+        int
+            The number of games added.
+        """
+        added = await self._crawl(
+            {"orderby": "created", "direction": "desc"},
+            page_size,
+            stop_at_known=True,
+        )
+        if added:
+            self.save()
+        return added
+
+    def start(self, interval=3600):
+        """Refreshes the catalog in the background every interval seconds
+        until :meth:`stop` is called
+
+        Failed refreshes are logged and retried at the next interval; the
+        error of the latest one is kept as :attr:`last_error` until a refresh
+        succeeds."""
+        if self._task is not None:
+            return
+
+        async def run():
+            while True:
+                await asyncio.sleep(interval)
+                try:
+                    await self.refresh()
+                except Exception as exc:
+                    # Try again at the next interval
+                    log.exception("Refreshing the game catalog failed")
+                    self.last_error = exc
+                else:
+                    self.last_error = None
+
+        self._task = asyncio.ensure_future(run())
+
+    def stop(self):
+        """Stops refreshing the catalog in the background"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def search(self, query, limit=10):
+        """Searches names and abbreviations for a query, without requests
+
+        Exact matches of a name or abbreviation come first, then names
+        starting with the query, then names sharing enough n-grams with it,
+        most similar first.
+
+        Returns
+        ---------
+        List[CatalogEntry]
+            Up to limit matching games.
+        """
+        query = _normalize(query)
+        if not query:
+            return []
+
+        found = []
+        seen = set()
+
+        def add(index):
+            if index not in seen:
+                seen.add(index)
+                found.append(self.entries[index])
+
+        for index in self._exact.get(query, ()):
+            add(index)
+
+        self._sort()
+        i = bisect.bisect_left(self._prefixes, (query,))
+        while len(found) < limit and i < len(self._prefixes):
+            name, index = self._prefixes[i]
+            if not name.startswith(query):
+                break
+            add(index)
+            i += 1
+
+        if len(found) < limit:
+            for index, _ in self._similar(query, limit):
+                if len(found) >= limit:
+                    break
+                add(index)
+
+        return found[:limit]
+
+    def find(self, query):
+        """Returns the best match for a query, or None, without requests"""
+        results = self.search(query, 1)
+        return results[0] if results else None
+
+    def get(self, id):
+        """Returns the entry of a game by ID, or None"""
+        index = self._ids.get(id)
+        return self.entries[index] if index is not None else None
+
+    async def get_game(self, name):
+        """|coro|
+
+        Gets the game best matching a name or abbreviation
+
+        The game is found in the catalog, then fetched by ID. If the catalog
+        has no match, the API's search is used instead and the result is added
+        to the catalog.
+
+        Returns
+        ---------
+        Optional[Game]
+            The game, or None if neither the catalog nor the API found one.
+        """
+        entry = self.find(name)
+        if entry is not None:
+            return await self.client.get_game(id=entry.id)
+
+        resp = await self.client.http.get(
+            "games", {"name": name, "max": 1}, priority=Priority.HIGH
+        )
+        if not resp["data"]:
+            return None
+        self._add(CatalogEntry.from_json(resp["data"][0]))
+        return await self.client.get_game(id=resp["data"][0]["id"])
+
+    def save(self):
+        """Writes the catalog to its path, if it has one"""
+        if self.path is None:
+            return
+
+        utils.write_json(
+            self.path, {"games": [e.to_list() for e in self.entries]}
+        )
+
+    async def _crawl(self, params, page_size, stop_at_known):
+        http = self.client.http
+        params = dict(params, _bulk="yes")
+        # Refreshes usually stop within the first pages
+        pages = utils.paginate(
+            http,
+            http.BASE + "games",
+            params,
+            page_size,
+            prefetch=not stop_at_known,
+        )
+
+        added = 0
+        known = 0
+        try:
+            async for game in pages:
+                if game["id"] in self._ids:
+                    known += 1
+                    if stop_at_known and known >= page_size:
+                        # A page's worth of games already in the catalog
+                        break
+                    continue
+                self._add(CatalogEntry.from_json(game))
+                added += 1
+                known = 0
+        finally:
+            await pages.aclose()
+        self._sort()
+        return added
+
+    def _add(self, entry):
+        if entry.id in self._ids:
+            return
+
+        index = len(self.entries)
+        self.entries.append(entry)
+        self._ids[entry.id] = index
+
+        names = set()
+        for name in (entry.name, entry.jp_name, entry.twitch_name, entry.abbr):
+            if name:
+                name = _normalize(name)
+                names.update((name, _strip_accents(name)))
+        for name in filter(None, names):
+            self._exact.setdefault(name, []).append(index)
+            self._prefixes.append((name, index))
+            self._unsorted = True
+
+            name_index = len(self._names)
+            self._names.append((index, name))
+            for gram in _ngrams(name):
+                self._postings[gram].append(name_index)
+
+    def _sort(self):
+        if self._unsorted:
+            self._prefixes.sort()
+            self._unsorted = False
+
+    def _similar(self, query, limit):
+        """Returns (entry index, similarity) pairs of up to limit names most
+        similar to the query"""
+        grams = _ngrams(query)
+        # N-grams found in many names, e.g. "the" or "mar", say little about
+        # which name is meant but have the longest postings, so only the
+        # rarer ones are counted to pick candidates. The similarity of those
+        # is then computed from all of their n-grams
+        rarest = sorted(
+            grams, key=lambda gram: len(self._postings.get(gram, ()))
+        )
+        threshold = max(_COMMON_POSTINGS, len(self._names) // 25)
+        keep = max(
+            _MIN_GRAMS,
+            sum(len(self._postings.get(g, ())) <= threshold for g in rarest),
+        )
+        shared = collections.Counter()
+        for gram in rarest[:keep]:
+            shared.update(self._postings.get(gram, ()))
+
+        best = {}
+        for name_index, _ in shared.most_common(limit * _CANDIDATES):
+            index, name = self._names[name_index]
+            name_grams = _ngrams(name)
+            # Jaccard similarity of the n-gram sets
+            count = len(grams & name_grams)
+            similarity = count / (len(grams) + len(name_grams) - count)
+            if similarity >= self.min_similarity and similarity > best.get(
+                index, 0
+            ):
+                best[index] = similarity
+
+        return sorted(best.items(), key=lambda item: -item[1])[:limit]
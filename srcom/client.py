@@ -1,10 +1,112 @@
-from .http import HTTPClient
+from . import utils
+from .feed import RunWatcher
+from .http import ConnectionPool, HTTPClient
+from .ratelimit import Priority
 from .dataclasses import Category, Game, Run, Series, User
 
 
 class Client:
-    def __init__(self):
-        self.http = HTTPClient()
+    """Client for the speedrun.com API
+
+    Parameters
+    ------------
+    rate_limit: Optional[int]
+        maximum number of requests per ``rate_period``; None disables rate
+        limiting. Defaults to 100, the limit enforced by speedrun.com
+    rate_period: Optional[float]
+        length of the rate limiting window in seconds. Defaults to 60
+    max_concurrency: Optional[int]
+        maximum number of requests in flight at once; None for no limit
+    cache: Optional[Union[bool, ResponseCache]]
+        cache for API responses; True uses an in-memory cache with the
+        default settings. Disabled by default
+    coalesce: Optional[bool]
+        whether concurrent identical requests share a single request.
+        Defaults to True
+    identity_map: Optional[Union[bool, int, IdentityMap]]
+        if enabled, each resource is only created once per client: creating
+        one with a known type and ID refreshes and returns the existing
+        object. True keeps up to 1024 recently seen resources alive, an int
+        sets that number. Disabled by default
+    json_loads: Optional[Callable[[bytes], Any]]
+        function used to decode JSON responses. Defaults to ``orjson.loads``
+        if orjson is installed, otherwise ``json.loads``
+    pool: Optional[ConnectionPool]
+        connection pool to send requests through. By default, a pool shared
+        by all clients is used
+    retry: Optional[Union[bool, RetryPolicy]]
+        policy for retrying and hedging failed or slow requests; True uses
+        the default policy, False disables retries. Defaults to True
+    base_url: Optional[str]
+        root URL of the API, e.g. to use a local stand-in server. Defaults to
+        ``https://www.speedrun.com/api/v1/``
+    stats: Optional[Union[bool, RequestStats]]
+        records per-endpoint request counts, latencies, sizes, decode times,
+        retries and cache hits, returned by :meth:`stats`; pass a RequestStats
+        to register callbacks or track the methods requests are made from.
+        True records without either, False disables recording. Defaults to
+        True
+    executor: Optional[concurrent.futures.Executor]
+        thread or process pool to decode large responses in, so they don't
+        block the event loop. With a thread pool, the items of a response's
+        data array or leaderboard runs are decoded one at a time with the
+        json module, ``json_loads`` only decoding the rest. With a process
+        pool, ``json_loads`` must be picklable. By default, responses are
+        decoded in the event loop
+    offload_size: Optional[int]
+        size in bytes from which responses are decoded in the executor.
+        Defaults to 256 KiB
+    chunk_size: Optional[int]
+        number of resources created from a response before giving control
+        back to the event loop, e.g. for bulk game searches; None creates
+        them all at once. Defaults to 1000
+    prefetch: Optional[int]
+        when a leaderboard without embedded players is fetched, the players of
+        up to this many of its runs, and its game and category, are fetched
+        in the background into the cache, so the runs' methods don't wait for
+        them. Requires a cache. Defaults to 0
+    rate_bucket: Optional[SharedTokenBucket]
+        token bucket to take the rate limit from instead of ``rate_limit`` and
+        ``rate_period``, e.g. to share one budget between processes
+    """
+
+    def __init__(
+        self,
+        rate_limit=100,
+        rate_period=60.0,
+        max_concurrency=None,
+        cache=None,
+        coalesce=True,
+        identity_map=None,
+        json_loads=None,
+        pool=None,
+        retry=True,
+        base_url=None,
+        stats=True,
+        executor=None,
+        offload_size=256 * 1024,
+        chunk_size=1000,
+        prefetch=0,
+        rate_bucket=None,
+    ):
+        self.http = HTTPClient(
+            rate_limit=rate_limit,
+            rate_period=rate_period,
+            max_concurrency=max_concurrency,
+            cache=cache,
+            coalesce=coalesce,
+            identity_map=identity_map,
+            json_loads=json_loads,
+            pool=pool,
+            retry=retry,
+            base_url=base_url,
+            stats=stats,
+            executor=executor,
+            offload_size=offload_size,
+            chunk_size=chunk_size,
+            prefetch=prefetch,
+            rate_bucket=rate_bucket,
+        )
 
     async def __aenter__(self):
         return self
@@ -56,7 +158,36 @@ class Client:
             matched.
         """
         resp = await self.http.get("games", kwargs)
-        return [Game(game, self.http) for game in resp["data"]]
+        return [
+            game async for game in utils.build(Game, resp["data"], self.http)
+        ]
+
+    async def iter_games(self, page_size=None, incremental=False, **kwargs):
+        """Searches for games and iterates over every result, following
+        pagination
+
+        The next page is requested while the current one is being consumed.
+        Accepts the same search parameters as :meth:`get_games`.
+
+        Parameters
+        ------------
+        page_size: Optional[int]
+            number of games requested per page (at most 200, or 1000 in bulk
+            mode)
+        incremental: Optional[bool]
+            parse games as each page is received instead of once it has been
+            downloaded completely. Pages are then not prefetched
+
+        Yields
+        --------
+        Game
+            The games matching the search.
+        """
+        url = self.http.BASE + "games"
+        async for game in utils.paginate(
+            self.http, url, kwargs, page_size, incremental
+        ):
+            yield Game(game, self.http)
 
     async def get_game(self, **kwargs):
         """|coro|
@@ -96,10 +227,12 @@ class Client:
             enable bulk access
         """
         if "id" in kwargs:
-            return Game.from_id(kwargs["id"], self.http)
+            return await Game.from_id(kwargs["id"], self)
 
-        games = await self.get_games(**kwargs, max=1)
-        return games[0]
+        resp = await self.http.get(
+            "games", {**kwargs, "max": 1}, priority=Priority.HIGH
+        )
+        return Game(resp["data"][0], self.http)
 
     async def get_users(self, **kwargs):
         """|coro|
@@ -126,7 +259,30 @@ class Client:
             maximum number of results to return
         """
         resp = await self.http.get("users", kwargs)
-        return [User(user, self.http) for user in resp["data"]]
+        return [
+            user async for user in utils.build(User, resp["data"], self.http)
+        ]
+
+    async def iter_users(self, page_size=None, **kwargs):
+        """Searches for users and iterates over every result, following
+        pagination
+
+        The next page is requested while the current one is being consumed.
+        Accepts the same search parameters as :meth:`get_users`.
+
+        Parameters
+        ------------
+        page_size: Optional[int]
+            number of users requested per page (at most 200)
+
+        Yields
+        --------
+        User
+            The users matching the search.
+        """
+        url = self.http.BASE + "users"
+        async for user in utils.paginate(self.http, url, kwargs, page_size):
+            yield User(user, self.http)
 
     async def get_user(self, **kwargs):
         """|coro|
@@ -153,10 +309,12 @@ class Client:
             searches for SpeedRunsLive usernames
         """
         if "id" in kwargs:
-            return User.from_id(kwargs["id"], self.http)
+            return await User.from_id(kwargs["id"], self)
 
-        users = await self.get_users(**kwargs, max=1)
-        return users[0]
+        resp = await self.http.get(
+            "users", {**kwargs, "max": 1}, priority=Priority.HIGH
+        )
+        return User(resp["data"][0], self.http)
 
     async def get_category(self, id):
         """|coro|
@@ -168,8 +326,100 @@ class Client:
         id: str
             the ID of the category to fetch
         """
-        return Category.from_id(id, self.http)
+        return await Category.from_id(id, self)
+
+    async def fetch_many(self, cls, ids, concurrency=10):
+        """|coro|
+
+        Gets several resources of the same type by ID concurrently
+
+        Parameters
+        ------------
+        cls: Type[Resource]
+            the resource type to fetch, e.g. :class:`User`
+        ids: Iterable[str]
+            the IDs of the resources to fetch. Duplicates are only fetched
+            once
+        concurrency: Optional[int]
+            maximum number of requests in flight at once. Defaults to 10
+
+        Returns
+        ---------
+        List[Resource]
+            The fetched resources, in the same order as ids.
+        """
+        return await cls.from_ids(list(ids), self, concurrency)
+
+    async def watch_runs(
+        self,
+        game,
+        status=("new", "verified", "rejected"),
+        interval=60,
+        cursor_path=None,
+        **kwargs,
+    ):
+        """Polls games for new and examined runs, yielding each change
+
+        Runs until cancelled or the loop is broken out of. See
+        :class:`RunWatcher` for the other accepted parameters.
+
+        Parameters
+        ------------
+        game: Union[Game, str, Iterable[Union[Game, str]]]
+            the game or games to watch, or their IDs
+        status: Optional[Union[str, Iterable[str]]]
+            the run statuses to watch: "new", "verified" and/or "rejected".
+            Defaults to all three
+        interval: Optional[float]
+            seconds between polls. Defaults to 60
+        cursor_path: Optional[str]
+            path of a JSON file to persist the position reached to, so that
+            no runs are missed or repeated across restarts
+
+        Yields
+        --------
+        RunEvent
+            The changes, in the order they happened for each game and status.
+        """
+        games = [game] if isinstance(game, (str, Game)) else game
+        statuses = [status] if isinstance(status, str) else status
+
+        watcher = RunWatcher(
+            self, games, statuses, interval, cursor_path, **kwargs
+        )
+        async for event in watcher:
+            yield event
+
+    def stats(self):
+        """Returns a snapshot of the requests made by this client
+
+        Returns
+        ---------
+        Dict[str, Any]
+            "endpoints" maps each endpoint to its request, error, retry,
+            throttle, cache hit and coalesced request counts, bytes received,
+            seconds spent decoding JSON and latency histogram; "origins" maps
+            methods to the number of requests they needed, if tracked; and
+            "connections" counts the connections created and reused.
+        """
+        if self.http.stats is None:
+            raise RuntimeError("request stats are disabled for this client")
+        return self.http.stats.to_dict()
 
     async def close(self):
         """Closes the http client"""
         await self.http.close()
+
+
+_default_client = None
+
+
+def default_client():
+    """Returns the client used by methods that are not given one, creating it
+    if needed"""
+    global _default_client
+    if _default_client is None or _default_client.http._closed:
+        # Given its own pool, as it is never closed and so would keep the
+        # shared pool's sessions open after every other client is closed
+        _default_client = Client(pool=ConnectionPool())
+    return _default_client
@@ -1,11 +1,17 @@
+import itertools
 from datetime import datetime, timedelta
 
 from .abcs import Resource
+from .progression import Progression
+from .stream import ArrayStream
+from .table import LeaderboardTable
 from . import utils
 
 
 class Category(Resource):
 
+    __slots__ = ("name", "type", "rules", "players", "misc", "_variables")
+
     endpoint = "categories"
 
     def __init__(self, data, http):
@@ -17,6 +23,9 @@ class Category(Resource):
         self.players = data["players"]
         self.misc = data["miscellaneous"]
 
+        # Memoised by record()
+        self._variables = None
+
     async def game(self):
         """Gets the game this category belongs to"""
         resp = await utils.get_link(self, "game")
@@ -27,14 +36,19 @@ class Category(Resource):
         variables = await utils.get_link(self, "variables")
         return (Variable(v, self._http) for v in variables["data"])
 
-    async def records(self, top=3):
-        """Gets the top runs in this category. Defaults to top 3"""
-        records = (await utils.get_link(self, "records", {"top": top}))["data"]
+    async def records(self, top=3, embed=None):
+        """Gets the top runs in this category. Defaults to top 3
+
+        embed lists resources (e.g. "players") to include in the response, so
+        the corresponding methods of the runs don't need to fetch them"""
+        params = {"top": top}
+        if embed is not None:
+            params["embed"] = utils.embed_param(embed)
+
+        records = (await utils.get_link(self, "records", params))["data"]
 
         return {
-            entry["category"]: [
-                Run(r["run"], self._http) for r in entry["runs"]
-            ]
+            entry["category"]: list(_leaderboard_runs(entry, self._http))
             for entry in records
         }
 
@@ -49,11 +63,14 @@ class Category(Resource):
             params = {}
 
         if subcategories:
+            if self._variables is None:
+                self._variables = list(await self.variables())
+
             # Get 'subcategories' defined by variables.
             params.update(
                 {
                     f"var-{var.id}": var.default
-                    for var in await self.variables()
+                    for var in self._variables
                     if var.is_subcategory
                 }
             )
@@ -65,27 +82,104 @@ class Category(Resource):
             return None
 
     async def runs(self):
-        """Gets all runs in the category"""
+        """Gets up to 20 runs in the category"""
         runs = await utils.get_link(self, "runs")
         return (Run(run, self._http) for run in runs["data"])
 
-    async def leaderboard(self, top=None, params=None):
+    async def iter_runs(self, page_size=None, params=None, incremental=False):
+        """Iterates over every run in the category, following pagination
+
+        page_size sets the number of runs requested per page (at most 200). If
+        incremental is True, runs are parsed as each page is received"""
+        async for run in utils.iter_link(
+            self, "runs", params, page_size, incremental
+        ):
+            yield Run(run, self._http)
+
+    async def leaderboard(self, top=None, params=None, embed=None):
         """Gets the leaderboard (all verified current PBs) in this category
 
-        If top is not specified, gets all runs in the leaderboard"""
+        If top is not specified, gets all runs in the leaderboard. embed lists
+        resources (e.g. "players", "category", "game", "platforms") to include
+        in the response, so the corresponding methods of the runs return
+        without fetching them"""
         if params is None:
             params = {}
 
         if top is not None:
             params["top"] = top
+        if embed is not None:
+            params["embed"] = utils.embed_param(embed)
 
         board = await utils.get_link(self, "leaderboard", params)
 
-        return (Run(r["run"], self._http) for r in board["data"]["runs"])
+        _prefetch_related(board["data"], self._http)
+        return _leaderboard_runs(board["data"], self._http)
+
+    async def iter_leaderboard(self, top=None, params=None):
+        """Iterates over the leaderboard in this category as it is received
+
+        Unlike leaderboard(), runs are parsed incrementally, so the first ones
+        are available before the whole leaderboard has been downloaded"""
+        if params is None:
+            params = {}
+
+        if top is not None:
+            params["top"] = top
+
+        uri = utils.get_uri("leaderboard", self._links)
+        parser = ArrayStream("runs")
+        async for entry in self._http.stream(uri, params, parser):
+            yield Run(entry["run"], self._http, entry["place"])
+
+    async def leaderboard_table(self, top=None, params=None):
+        """Gets the leaderboard in this category as a LeaderboardTable
+
+        The table holds the places, times, dates, players, platforms and
+        variable values of the runs as columns, without creating Run
+        objects"""
+        if params is None:
+            params = {}
+
+        if top is not None:
+            params["top"] = top
+
+        board = await utils.get_link(self, "leaderboard", params)
+        return LeaderboardTable.from_json(board["data"])
+
+    async def progression(self, page_size=200):
+        """Computes the world record and personal best progressions of this
+        category's leaderboards from its verified runs
+
+        The runs are requested in the order they were performed and processed
+        as they are received, with the category's variables splitting it into
+        leaderboards as subcategories. Returns a Progression"""
+        if self._variables is None:
+            self._variables = list(await self.variables())
+
+        progression = Progression(self._variables)
+        params = {"status": "verified", "orderby": "date", "direction": "asc"}
+        async for run in utils.iter_link(self, "runs", params, page_size):
+            progression.add(run)
+        return progression
 
 
 class Game(Resource):
 
+    __slots__ = (
+        "name",
+        "jp_name",
+        "twitch_name",
+        "abbr",
+        "release_year",
+        "release_date",
+        "ruleset",
+        "romhack",
+        "gametypes",
+        "_default_category",
+        "_structure",
+    )
+
     endpoint = "games"
 
     def __init__(self, data, http):
@@ -103,17 +197,43 @@ class Game(Resource):
         self.romhack = data["romhack"]
         self.gametypes = data["gametypes"]
 
-        self.default_category = next(
-            link["uri"]
-            for link in data["links"]
-            if link["rel"] == "leaderboard"
-        ).split("/")[-1]
+        # Categories, levels and variables, memoised by _board_structure()
+        self._structure = None
 
-    async def runs(self):
-        """Gets all the runs for the current game"""
-        runs = await utils.get_link(self, "runs")
+    @utils.lazy
+    def default_category(self):
+        """ID of the category of the game's default leaderboard"""
+        return utils.get_uri("leaderboard", self._links).split("/")[-1]
+
+    async def runs(self, embed=None):
+        """Gets up to 20 runs for the current game
+
+        embed lists resources (e.g. "players", "category") to include with
+        each run"""
+        params = None
+        if embed is not None:
+            params = {"embed": utils.embed_param(embed)}
+
+        runs = await utils.get_link(self, "runs", params)
         return (Run(run, self._http) for run in runs["data"])
 
+    async def iter_runs(
+        self, page_size=None, params=None, embed=None, incremental=False
+    ):
+        """Iterates over every run for the current game, following pagination
+
+        page_size sets the number of runs requested per page (at most 200).
+        embed lists resources (e.g. "players", "category") to include with
+        each run. If incremental is True, runs are parsed as each page is
+        received"""
+        if embed is not None:
+            params = dict(params or {}, embed=utils.embed_param(embed))
+
+        async for run in utils.iter_link(
+            self, "runs", params, page_size, incremental
+        ):
+            yield Run(run, self._http)
+
     async def levels(self):
         """Gets all the levels for the current game"""
         return await utils.get_link(self, "levels")
@@ -128,14 +248,19 @@ class Game(Resource):
         variables = await utils.get_link(self, "variables")
         return (Variable(v, self._http) for v in variables["data"])
 
-    async def records(self, top=3):
-        """Gets the top runs in this game. Defaults to top 3"""
-        resp = await utils.get_link(self, "records", {"top": top})
+    async def records(self, top=3, embed=None):
+        """Gets the top runs in this game. Defaults to top 3
+
+        embed lists resources (e.g. "players") to include in the response, so
+        the corresponding methods of the runs don't need to fetch them"""
+        params = {"top": top}
+        if embed is not None:
+            params["embed"] = utils.embed_param(embed)
+
+        resp = await utils.get_link(self, "records", params)
 
         return {
-            entry["category"]: [
-                Run(run["run"], self._http) for run in entry["runs"]
-            ]
+            entry["category"]: list(_leaderboard_runs(entry, self._http))
             for entry in resp["data"]
         }
 
@@ -156,12 +281,14 @@ class Game(Resource):
             params = {}
 
         if subcategories:
+            _, _, variables = await self._board_structure()
+
             # Get 'subcategories', the API default only sets the category, not
             # the subcategories defined by variables.
             params.update(
                 {
                     f"var-{var.id}": var.default
-                    for var in await self.variables()
+                    for var in variables
                     if var.is_subcategory and var._category == category
                 }
             )
@@ -182,86 +309,320 @@ class Game(Resource):
         resp = await utils.get_link(self, "derived-games")
         return (Game(g, self._http) for g in resp["data"])
 
+    async def iter_derived_games(self, page_size=None, params=None):
+        """Iterates over every game derived from this one, following
+        pagination"""
+        async for game in utils.iter_link(
+            self, "derived-games", params, page_size
+        ):
+            yield Game(game, self._http)
+
     async def romhacks(self):
         """Gets a list of romhack games based on this one"""
         resp = await utils.get_link(self, "romhacks")
         return (Game(g, self._http) for g in resp["data"])
 
-    async def leaderboard(self, top=None, category=None, params=None):
+    async def leaderboard(
+        self, top=None, category=None, params=None, embed=None
+    ):
         """Gets the leaderboard (all verified current PBs) in this game for a
         particular leaderboard
 
         If top is not specified, gets all runs in the leaderboard. If category
-        is not specified, then uses the leaderboard's default category
+        is not specified, then uses the leaderboard's default category. embed
+        lists resources (e.g. "players", "category", "game", "platforms") to
+        include in the response, so the corresponding methods of the runs
+        return without fetching them
         """
         if params is None:
             params = {}
 
         if top is not None:
             params["top"] = top
+        if embed is not None:
+            params["embed"] = utils.embed_param(embed)
 
-        if category is None:
-            board = await utils.get_link(self, "leaderboard", params)
-        else:
-            board = await self._http.get(
-                f"leaderboards/{self.id}/category/{category}", params
+        board = await self._http._get(self._leaderboard_uri(category), params)
+
+        _prefetch_related(board["data"], self._http)
+        return _leaderboard_runs(board["data"], self._http)
+
+    async def iter_leaderboard(self, top=None, category=None, params=None):
+        """Iterates over a leaderboard in this game as it is received
+
+        Unlike leaderboard(), runs are parsed incrementally, so the first ones
+        are available before the whole leaderboard has been downloaded"""
+        if params is None:
+            params = {}
+
+        if top is not None:
+            params["top"] = top
+
+        uri = self._leaderboard_uri(category)
+        parser = ArrayStream("runs")
+        async for entry in self._http.stream(uri, params, parser):
+            yield Run(entry["run"], self._http, entry["place"])
+
+    async def leaderboard_table(self, top=None, category=None, params=None):
+        """Gets a leaderboard in this game as a LeaderboardTable
+
+        The table holds the places, times, dates, players, platforms and
+        variable values of the runs as columns, without creating Run
+        objects. If category is not specified, then uses the leaderboard's
+        default category"""
+        if params is None:
+            params = {}
+
+        if top is not None:
+            params["top"] = top
+
+        board = await self._http._get(self._leaderboard_uri(category), params)
+        return LeaderboardTable.from_json(board["data"])
+
+    async def progression(self, category=None, page_size=200):
+        """Computes the world record and personal best progressions of this
+        game's leaderboards from its verified runs
+
+        The runs are requested in the order they were performed and processed
+        as they are received. If category is not specified, the runs of every
+        category are processed in the same pass. Returns a Progression"""
+        _, _, variables = await self._board_structure()
+        if isinstance(category, Category):
+            category = category.id
+
+        progression = Progression(variables)
+        params = {"status": "verified", "orderby": "date", "direction": "asc"}
+        if category is not None:
+            params["category"] = category
+        async for run in utils.iter_link(self, "runs", params, page_size):
+            progression.add(run)
+        return progression
+
+    async def all_leaderboards(
+        self, top=None, params=None, embed=None, concurrency=10
+    ):
+        """Gets every leaderboard in this game
+
+        A leaderboard is fetched for every combination of category, level (for
+        per-level categories) and value of the subcategory variables that
+        apply to it. The categories, levels and variables are fetched in one
+        request, which is only made once per Game object, and then at most
+        concurrency leaderboards are fetched at once. top, params and embed
+        are applied to every leaderboard as in leaderboard().
+
+        Returns a dict mapping ``(category ID, level ID, values)`` to the runs
+        of each leaderboard, where the level ID is None for full-game
+        categories and values is a tuple of ``(variable ID, value ID)`` pairs
+        sorted by variable ID.
+        """
+        params = dict(params or {})
+        if top is not None:
+            params["top"] = top
+        if embed is not None:
+            params["embed"] = utils.embed_param(embed)
+
+        keys = list(self._board_keys(*await self._board_structure()))
+
+        async def fetch(key):
+            category, level, values = key
+            board_params = dict(params)
+            board_params.update((f"var-{var}", v) for var, v in values)
+            return await self._http._get(
+                self._leaderboard_uri(category, level), board_params
             )
 
-        return (Run(run["run"], self._http) for run in board["data"]["runs"])
+        boards = await utils.gather_unique(fetch, keys, concurrency)
+        return {
+            key: list(_leaderboard_runs(board["data"], self._http))
+            for key, board in zip(keys, boards)
+        }
+
+    async def _board_structure(self):
+        """Gets the categories, levels and variables of this game, from the
+        game's data if they were embedded in it"""
+        if self._structure is None:
+            data = self._data
+            if not all(
+                utils.embedded(data.get(key)) is not None
+                for key in ("categories", "levels", "variables")
+            ):
+                resp = await self._http._get(
+                    f"{self._http.BASE}games/{self.id}",
+                    {"embed": "categories,levels,variables"},
+                )
+                data = resp["data"]
+
+            self._structure = (
+                [Category(c, self._http) for c in data["categories"]["data"]],
+                data["levels"]["data"],
+                [Variable(v, self._http) for v in data["variables"]["data"]],
+            )
+        return self._structure
+
+    @staticmethod
+    def _board_keys(categories, levels, variables):
+        """Yields the keys of every leaderboard in all_leaderboards()"""
+        for category in categories:
+            if category.type == "per-level":
+                board_levels = [level["id"] for level in levels]
+            else:
+                board_levels = [None]
+
+            for level in board_levels:
+                applicable = sorted(
+                    (
+                        var
+                        for var in variables
+                        if var.is_subcategory
+                        and var._category in (None, category.id)
+                        and var.applies_to(level)
+                    ),
+                    key=lambda var: var.id,
+                )
+                for values in itertools.product(
+                    *(
+                        [(var.id, value) for value in var.values]
+                        for var in applicable
+                    )
+                ):
+                    yield (category.id, level, values)
+
+    def _leaderboard_uri(self, category=None, level=None):
+        if category is None:
+            return utils.get_uri("leaderboard", self._links)
+        if level is not None:
+            return (
+                f"{self._http.BASE}leaderboards/{self.id}/level/{level}/"
+                f"{category}"
+            )
+        return f"{self._http.BASE}leaderboards/{self.id}/category/{category}"
 
 
 class Run(Resource):
 
+    __slots__ = (
+        "_embeds",
+        "_players",
+        "_game",
+        "_category",
+        "place",
+        "status",
+        "comment",
+        "primary_t",
+        "_date",
+        "_time",
+        "_videos",
+        "_splits",
+        "_values",
+    )
+
     endpoint = "runs"
 
-    def __init__(self, data, http, place=None):
+    def __init__(self, data, http, place=None, embeds=None):
         super().__init__(data, http)
 
-        self._players = data["players"]
-        self._game = data["game"]
-        self._category = data["category"]
+        # Data of related resources embedded in the response, by name
+        self._embeds = dict(embeds) if embeds else {}
+        for key in ("game", "category", "platform", "region", "players"):
+            resource = utils.embedded(data.get(key))
+            if resource:
+                self._embeds[key] = resource
+
+        if "players" in self._embeds and isinstance(data["players"], dict):
+            self._players = [
+                utils.player_ref(p) for p in self._embeds["players"]
+            ]
+        else:
+            self._players = data["players"]
+
+        game = utils.embedded(data["game"])
+        self._game = data["game"] if game is None else game["id"]
+        category = utils.embedded(data["category"])
+        self._category = (
+            data["category"] if category is None else category["id"]
+        )
         self.place = place
         self.status = data["status"]["status"]
         self.comment = data["comment"]
 
-        self.date = data["date"]
-        if self.date:
-            self.date = datetime.strptime(self.date, "%Y-%m-%d")
-
-        # Convert seconds to a human readable format
-        self.time = str(timedelta(seconds=data["times"]["primary_t"]))
-
-        videos = utils.safeget(data, ("videos", "links"), ())
-        self.videos = [link["uri"] for link in videos]
-
-        self.splits = utils.safeget(data, ("splits", "uri"))
+        # Primary time in seconds
+        self.primary_t = data["times"]["primary_t"]
+
+    def to_dict(self):
+        dct = super().to_dict()
+        dct["place"] = self.place
+        dct["embeds"] = self._embeds
+        return dct
+
+    @classmethod
+    def _from_dict(cls, dct, http):
+        return cls(dct["data"], http, dct.get("place"), dct.get("embeds"))
+
+    @utils.lazy
+    def date(self):
+        """Date the run was performed on, or None if not set"""
+        date = self._data["date"]
+        return datetime.strptime(date, "%Y-%m-%d") if date else None
+
+    @utils.lazy
+    def time(self):
+        """Primary time of the run in a human readable format"""
+        return str(timedelta(seconds=self.primary_t))
+
+    @utils.lazy
+    def videos(self):
+        """URIs of the videos of the run"""
+        videos = utils.safeget(self._data, ("videos", "links"), ())
+        return [link["uri"] for link in videos]
+
+    @utils.lazy
+    def splits(self):
+        """URI of the splits of the run, or None"""
+        return utils.safeget(self._data, ("splits", "uri"))
+
+    @utils.lazy
+    def values(self):
+        """IDs of the values of the run's variables, by variable ID"""
+        return dict(self._data.get("values") or {})
 
     async def players(self):
         """Gets the list of runners (players) who performed this run
 
         For most runs this will only be one, however in some (co-op), there may
         be more than one runner"""
-        return (
-            User((await self._http._get(player["uri"]))["data"], self._http)
-            for player in self._players
+        if "players" in self._embeds:
+            return (User(p, self._http) for p in self._embeds["players"])
+
+        players = await utils.fetch_all(
+            self._http, [player["uri"] for player in self._players]
         )
+        return (User(p, self._http) for p in players)
 
     async def player(self):
         """Gets the runner (player) who performed this run
 
         If there was more than one runner involved in the run, this will only
         return the first one in the list given by the API"""
+        if "players" in self._embeds:
+            return User(self._embeds["players"][0], self._http)
+
         return User(
             (await self._http._get(self._players[0]["uri"]))["data"], self._http
         )
 
     async def game(self):
         """Gets the game that this run was performed for"""
+        if "game" in self._embeds:
+            return Game(self._embeds["game"], self._http)
+
         resp = await self._http.get(f"games/{self._game}")
         return Game(resp["data"], self._http)
 
     async def category(self):
         """Gets the leaderboard category that this run was performed under"""
+        if "category" in self._embeds:
+            return Category(self._embeds["category"], self._http)
+
         resp = await self._http.get(f"categories/{self._category}")
         return Category(resp["data"], self._http)
 
@@ -269,12 +630,18 @@ class Run(Resource):
         """Gets the platform that this run was performed on
 
         Can be None if not set"""
+        if "platform" in self._embeds:
+            return {"data": self._embeds["platform"]}
+
         return await utils.get_link(self, "platform")
 
     async def region(self):
         """Gets the region of the system that the run was performed on
 
         Can be None"""
+        if "region" in self._embeds:
+            return {"data": self._embeds["region"]}
+
         return await utils.get_link(self, "region")
 
     async def examiner(self):
@@ -287,6 +654,8 @@ class Run(Resource):
 
 class Series(Resource):
 
+    __slots__ = ("name", "abbr", "created", "assets", "_moderators")
+
     endpoint = "series"
 
     def __init__(self, data, http):
@@ -303,13 +672,32 @@ class Series(Resource):
         resp = await utils.get_link(self, "game")
         return (Game(g, self._http) for g in resp["data"])
 
-    async def moderators(self):
-        """Gets the leaderboard moderators for this series"""
-        return (await User.from_id(id, self._http) for id in self._moderators)
+    async def moderators(self, concurrency=10):
+        """Gets the leaderboard moderators for this series
+
+        The moderators are fetched concurrently, at most concurrency at a
+        time"""
+        uris = [f"{self._http.BASE}users/{id}" for id in self._moderators]
+        moderators = await utils.fetch_all(self._http, uris, concurrency)
+        return [User(m, self._http) for m in moderators]
 
 
 class User(Resource):
 
+    __slots__ = (
+        "guest",
+        "name",
+        "twitch",
+        "hitbox",
+        "youtube",
+        "twitter",
+        "srl",
+        "_country",
+        "_country_code",
+        "_region",
+        "_region_code",
+    )
+
     endpoint = "users"
 
     def __init__(self, data, http):
@@ -321,20 +709,36 @@ class User(Resource):
         else:
             self.name = data["names"]["international"]
 
-        country = utils.safeget(data, ("location", "country"), {})
-        self.country = utils.safeget(country, ("names", "international"))
-        self.country_code = country.get("code")
-
-        region = utils.safeget(data, ("location", "region"), {})
-        self.region = utils.safeget(region, ("names", "international"))
-        self.region_code = region.get("code")
-
         self.twitch = utils.safeget(data, ("twitch", "uri"))
         self.hitbox = utils.safeget(data, ("hitbox", "uri"))
         self.youtube = utils.safeget(data, ("youtube", "uri"))
         self.twitter = utils.safeget(data, ("twitter", "uri"))
         self.srl = utils.safeget(data, ("speedrunslive", "uri"))
 
+    @utils.lazy
+    def country(self):
+        """Name of the user's country, or None"""
+        return utils.safeget(
+            self._data, ("location", "country", "names", "international")
+        )
+
+    @utils.lazy
+    def country_code(self):
+        """Code of the user's country, or None"""
+        return utils.safeget(self._data, ("location", "country", "code"))
+
+    @utils.lazy
+    def region(self):
+        """Name of the user's region, or None"""
+        return utils.safeget(
+            self._data, ("location", "region", "names", "international")
+        )
+
+    @utils.lazy
+    def region_code(self):
+        """Code of the user's region, or None"""
+        return utils.safeget(self._data, ("location", "region", "code"))
+
     async def runs(self):
         """Gets up to the last 20 runs submitted by the user"""
         runs = await utils.get_data(self, "runs")
@@ -345,14 +749,57 @@ class User(Resource):
         games = await utils.get_data(self, "games")
         return (Game(g, self._http) for g in games)
 
-    async def personal_bests(self):
-        """Gets up to 20 personal bests from the user"""
-        runs = await utils.get_data(self, "personal-bests")
-        return (Run(r["runs"], self._http, r["place"]) for r in runs)
+    async def personal_bests(self, embed=None):
+        """Gets up to 20 personal bests from the user
+
+        embed lists resources (e.g. "game", "category") to include with each
+        run"""
+        params = None
+        if embed is not None:
+            params = {"embed": utils.embed_param(embed)}
+
+        runs = await utils.get_data(self, "personal-bests", params)
+        return (
+            Run(r["run"], self._http, r["place"], _entry_embeds(r))
+            for r in runs
+        )
+
+    async def iter_runs(self, page_size=None, params=None):
+        """Iterates over every run submitted by the user, following
+        pagination"""
+        async for run in utils.iter_link(self, "runs", params, page_size):
+            yield Run(run, self._http)
+
+    async def iter_games(self, page_size=None, params=None):
+        """Iterates over every game that the user has ran, following
+        pagination"""
+        async for game in utils.iter_link(self, "games", params, page_size):
+            yield Game(game, self._http)
+
+    async def iter_personal_bests(self, page_size=None, params=None):
+        """Iterates over every personal best from the user, following
+        pagination"""
+        async for pb in utils.iter_link(
+            self, "personal-bests", params, page_size
+        ):
+            yield Run(pb["run"], self._http, pb["place"], _entry_embeds(pb))
 
 
 class Variable(Resource):
 
+    __slots__ = (
+        "name",
+        "_category",
+        "type",
+        "mandatory",
+        "user_defined",
+        "obsoletes",
+        "is_subcategory",
+        "values",
+        "default",
+        "_level",
+    )
+
     endpoint = "variables"
 
     def __init__(self, data, http):
@@ -361,6 +808,7 @@ class Variable(Resource):
         self.name = data["name"]
         self._category = data["category"]
         self.type = data["scope"]["type"]
+        self._level = data["scope"].get("level")
         self.mandatory = data["mandatory"]
         self.user_defined = data["user-defined"]
         self.obsoletes = data["obsoletes"]
@@ -368,6 +816,17 @@ class Variable(Resource):
         self.values = data["values"]["values"]
         self.default = data["values"]["default"]
 
+    def applies_to(self, level=None):
+        """Returns whether this variable applies to runs of the given level,
+        or to full-game runs if level is None"""
+        if self.type == "full-game":
+            return level is None
+        if self.type == "all-levels":
+            return level is not None
+        if self.type == "single-level":
+            return level == self._level
+        return True
+
     async def game(self):
         """Gets the game this variable belongs to"""
         resp = await utils.get_link(self, "game")
@@ -377,3 +836,72 @@ class Variable(Resource):
         """Gets the category this variable belongs to"""
         resp = await utils.get_link(self, "category")
         return Category(resp["data"], self._http)
+
+
+def _player_key(ref):
+    if ref.get("rel", "user") == "user" and "id" in ref:
+        return ("user", ref["id"])
+    return ("guest", ref["name"])
+
+
+def _entry_embeds(entry):
+    """Collects the resources embedded alongside a run in a list entry"""
+    embeds = {}
+    for key in ("game", "category", "platform", "region", "players"):
+        resource = utils.embedded(entry.get(key))
+        if resource:
+            embeds[key] = resource
+    return embeds
+
+
+def _prefetch_related(board, http):
+    """Starts fetching the players of the top runs of a leaderboard, and its
+    game and category, in the background, unless they were embedded"""
+    if not http.prefetch:
+        return
+
+    urls = []
+    for key, endpoint in (("game", "games"), ("category", "categories")):
+        if isinstance(board.get(key), str):
+            urls.append(f"{http.BASE}{endpoint}/{board[key]}")
+    if utils.embedded(board.get("players")) is None:
+        for entry in board["runs"][: http.prefetch]:
+            players = entry["run"]["players"]
+            if isinstance(players, list):
+                urls.extend(p["uri"] for p in players if "uri" in p)
+    http.prefetch_urls(urls)
+
+
+def _leaderboard_runs(board, http):
+    """Creates the runs of a leaderboard, attaching any resources embedded in
+    the leaderboard to the runs they belong to"""
+    shared = _entry_embeds(board)
+
+    players = {
+        _player_key(p): p for p in utils.embedded(board.get("players")) or ()
+    }
+    platforms = {
+        p["id"]: p for p in utils.embedded(board.get("platforms")) or ()
+    }
+    regions = {r["id"]: r for r in utils.embedded(board.get("regions")) or ()}
+    shared.pop("players", None)
+
+    for entry in board["runs"]:
+        run = entry["run"]
+        embeds = dict(shared)
+
+        if players:
+            try:
+                embeds["players"] = [
+                    players[_player_key(ref)] for ref in run["players"]
+                ]
+            except KeyError:
+                pass
+
+        system = run.get("system") or {}
+        if system.get("platform") in platforms:
+            embeds["platform"] = platforms[system["platform"]]
+        if system.get("region") in regions:
+            embeds["region"] = regions[system["region"]]
+
+        yield Run(run, http, entry["place"], embeds)
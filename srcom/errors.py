@@ -0,0 +1,34 @@
+class SRComException(Exception):
+    """Base exception for errors raised by srcom.py"""
+
+
+class HTTPException(SRComException):
+    """Raised when the API responds with an error status
+
+    Attributes
+    ------------
+    status: int
+        the HTTP status of the response
+    message: Optional[str]
+        the error message given by the API, if any
+    retry_after: Optional[float]
+        seconds the API asked to wait before retrying, if given
+    """
+
+    def __init__(self, status, message=None, retry_after=None):
+        self.status = status
+        self.message = message
+        self.retry_after = retry_after
+
+        if message:
+            super().__init__(f"{status}: {message}")
+        else:
+            super().__init__(str(status))
+
+
+class NotFound(HTTPException):
+    """Raised when the requested resource does not exist (404)"""
+
+
+class Throttled(HTTPException):
+    """Raised when requests are being rate limited by the API (420 or 429)"""
@@ -0,0 +1,228 @@
+import json
+import os
+from datetime import datetime, timedelta
+
+from . import utils
+from .dataclasses import Game, Run
+
+# Timestamp that runs are ordered by to find changes, by status
+_ORDER = {
+    "new": "submitted",
+    "verified": "verify-date",
+    "rejected": "submitted",
+}
+
+_TIMESTAMP = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def _earlier(timestamp, seconds):
+    """Returns the API timestamp the given number of seconds before another"""
+    if not timestamp or not seconds:
+        return timestamp
+    earlier = datetime.strptime(timestamp, _TIMESTAMP) - timedelta(
+        seconds=seconds
+    )
+    return earlier.strftime(_TIMESTAMP)
+
+
+class RunEvent:
+    """A change to a run reported by a RunWatcher
+
+    Attributes
+    ------------
+    type: str
+        "new" for a newly submitted run, or "verified" or "rejected" for a
+        run that was examined
+    game: str
+        the ID of the run's game
+    run: Run
+        the run
+    """
+
+    __slots__ = ("type", "game", "run")
+
+    def __init__(self, type, game, run):
+        self.type = type
+        self.game = game
+        self.run = run
+
+    def __repr__(self):
+        return f"<RunEvent type={self.type!r} run={self.run.id!r}>"
+
+
+class RunWatcher:
+    """Polls the runs of several games for changes
+
+    Each poll walks the runs of every game with each watched status, most
+    recent first, only until it reaches runs seen by the previous poll. The
+    position reached (the cursor) can be persisted to a file so that no runs
+    are missed or repeated across restarts. Requests are sent at low priority
+    through the client's rate limiter, so one watcher can multiplex many games
+    within the rate budget.
+
+    Iterating over the watcher polls every ``interval`` seconds and yields
+    the events found.
+
+    Rejected runs have no date of examination, so they are walked by
+    submission date, and the runs submitted within ``rejected_window``
+    seconds of the latest one are walked again on every poll to find those
+    rejected since.
+
+    Parameters
+    ------------
+    client: Client
+        the client used to poll
+    games: Iterable[Union[Game, str]]
+        the games to watch, or their IDs
+    statuses: Optional[Iterable[str]]
+        the run statuses to watch: "new", "verified" and/or "rejected".
+        Defaults to all three
+    interval: Optional[float]
+        seconds between the start of consecutive polls. Defaults to 60
+    cursor_path: Optional[str]
+        path of a JSON file to persist the cursor to
+    page_size: Optional[int]
+        number of runs requested per page. Defaults to 50
+    backfill: Optional[bool]
+        whether the first poll of a game reports its most recent page of runs
+        as events. By default, it only records the cursor
+    concurrency: Optional[int]
+        maximum number of games polled at once. Defaults to 4
+    rejected_window: Optional[float]
+        how long after their submission runs are expected to be rejected, in
+        seconds. Runs rejected later are missed. Defaults to a week
+    """
+
+    def __init__(
+        self,
+        client,
+        games=(),
+        statuses=("new", "verified", "rejected"),
+        interval=60,
+        cursor_path=None,
+        page_size=50,
+        backfill=False,
+        concurrency=4,
+        rejected_window=7 * 24 * 3600,
+    ):
+        self.client = client
+        self.games = []
+        self.statuses = tuple(statuses)
+        self.interval = interval
+        self.cursor_path = cursor_path
+        self.page_size = page_size
+        self.backfill = backfill
+        self.concurrency = concurrency
+        self.rejected_window = rejected_window
+
+        for status in self.statuses:
+            if status not in _ORDER:
+                raise ValueError(f"cannot watch runs with status {status!r}")
+
+        # {game: {status: {"since": timestamp, "seen": [run IDs]}}}
+        self.cursor = {}
+        if cursor_path is not None and os.path.exists(cursor_path):
+            with open(cursor_path) as f:
+                self.cursor = json.load(f)
+
+        for game in games:
+            self.add(game)
+
+    def add(self, game):
+        """Starts watching a game"""
+        game_id = game.id if isinstance(game, Game) else game
+        if game_id not in self.games:
+            self.games.append(game_id)
+
+    def remove(self, game):
+        """Stops watching a game"""
+        game_id = game.id if isinstance(game, Game) else game
+        self.games.remove(game_id)
+        self.cursor.pop(game_id, None)
+
+    async def poll(self):
+        """|coro|
+
+        Polls every watched game once
+
+        Returns
+        ---------
+        List[RunEvent]
+            The changes since the previous poll, oldest first for each game
+            and status.
+        """
+        pairs = [(g, s) for g in self.games for s in self.statuses]
+        results = await utils.gather_unique(
+            lambda pair: self._poll(*pair), pairs, self.concurrency
+        )
+        self._save()
+        return [event for events in results for event in events]
+
+    def __aiter__(self):
+        return utils.poll_every(self.poll, self.interval)
+
+    async def _poll(self, game, status):
+        http = self.client.http
+        orderby = _ORDER[status]
+        cursor = self.cursor.get(game, {}).get(status)
+
+        params = {
+            "game": game,
+            "status": status,
+            "orderby": orderby,
+            "direction": "desc",
+        }
+        # Polls usually stop within the first page
+        runs = utils.paginate(
+            http, http.BASE + "runs", params, self.page_size, prefetch=False
+        )
+
+        # Runs at or after the floor are walked; those in seen were reported
+        window = self.rejected_window if status == "rejected" else 0
+        floor = None if cursor is None else _earlier(cursor["since"], window)
+        seen = set() if cursor is None else set(cursor["seen"])
+
+        walked = []
+        found = []
+        try:
+            async for run in runs:
+                since = utils.run_timestamp(run, orderby)
+                if since is None:
+                    break
+                if floor is None:
+                    # First poll of this game; take the latest page, and the
+                    # window before the latest run
+                    floor = _earlier(since, window)
+                if since < floor and cursor is not None:
+                    break
+                walked.append((since, run["id"]))
+                if run["id"] not in seen:
+                    found.append(run)
+                if since < floor and len(walked) >= self.page_size:
+                    break
+        finally:
+            await runs.aclose()
+
+        if walked:
+            latest = walked[0][0]
+            if cursor is not None:
+                latest = max(latest, cursor["since"])
+            floor = _earlier(latest, window)
+            self.cursor.setdefault(game, {})[status] = {
+                "since": latest,
+                "seen": [id for since, id in walked if since >= floor],
+            }
+        elif cursor is None:
+            self.cursor.setdefault(game, {})[status] = {"since": "", "seen": []}
+
+        if cursor is None and not self.backfill:
+            return []
+        return [
+            RunEvent(status, game, Run(run, http)) for run in reversed(found)
+        ]
+
+    def _save(self):
+        if self.cursor_path is None:
+            return
+
+        utils.write_json(self.cursor_path, self.cursor)
@@ -1,26 +1,578 @@
+import asyncio
+import concurrent.futures
+import json
+import pickle
+import re
 import sys
+import time
 
 import aiohttp
 
+from .cache import ResponseCache, endpoint, make_key
+from .errors import HTTPException, NotFound, Throttled
+from .identity import IdentityMap
+from .ratelimit import Priority, RateLimiter
+from .retry import RetryPolicy
+from .stats import RequestStats, trace_config
+from .stream import ArrayStream
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+USER_AGENT = "srcom.py Python/{}.{}.{} aiohttp/{}".format(
+    *sys.version_info[:3],
+    aiohttp.__version__,
+)
+
+
+# Start of a response whose data is an array, e.g. a page of search results,
+# or an object, e.g. a leaderboard whose runs are an array
+_DATA_ARRAY = re.compile(rb'\s*\{\s*"data"\s*:\s*\[')
+_DATA_OBJECT = re.compile(rb'\s*\{\s*"data"\s*:\s*\{')
+
+
+def _bulk_array(resp):
+    """Returns the object holding the large array of a response and its key,
+    or (None, None) if there isn't one"""
+    data = resp.get("data")
+    if isinstance(data, list):
+        return resp, "data"
+    if isinstance(data, dict) and isinstance(data.get("runs"), list):
+        return data, "runs"
+    return None, None
+
+
+def _decode_stream(loads, body):
+    """Decodes a response one item of its large array at a time, so that a
+    thread decoding it lets the event loop run in between
+
+    The items are decoded with the json module, and the rest of the response
+    with loads."""
+    if _DATA_ARRAY.match(body):
+        parser = ArrayStream()
+    elif _DATA_OBJECT.match(body):
+        parser = ArrayStream("runs")
+    else:
+        return loads(body)
+
+    items = parser.feed(body, final=True)
+    resp = parser.envelope(loads)
+    parent, key = _bulk_array(resp)
+    if parent is None or parent[key]:
+        # The array found wasn't the response's large array, e.g. it was
+        # nested in an embedded resource
+        return loads(body)
+    parent[key] = items
+    return resp
+
+
+def _decode_chunks(loads, body, chunk_size):
+    """Decodes a response in a worker process, returning it with the items
+    of its large array removed and pickled in chunks, so that the event loop
+    can unpickle them a chunk at a time"""
+    resp = loads(body)
+    parent, key = _bulk_array(resp)
+    if parent is None:
+        return resp, []
+
+    items, parent[key] = parent[key], []
+    return resp, [
+        pickle.dumps(items[i : i + chunk_size], pickle.HIGHEST_PROTOCOL)
+        for i in range(0, len(items), chunk_size)
+    ]
+
+
+class ConnectionPool:
+    """An aiohttp session shared between clients
+
+    The session is created on the first request and closed once every client
+    using the pool has been closed, so connections are kept alive and reused
+    across clients. Each event loop gets its own session, closed when the loop
+    shuts down its async generators, as ``asyncio.run`` does; sockets of loops
+    closed without doing so are left to the garbage collector.
+
+    Parameters
+    ------------
+    limit: Optional[int]
+        maximum number of simultaneous connections. Defaults to 100
+    limit_per_host: Optional[int]
+        maximum number of simultaneous connections to one host; 0 for no
+        limit. Defaults to 0
+    keepalive_timeout: Optional[float]
+        seconds to keep idle connections open for. Defaults to 30
+    ttl_dns_cache: Optional[float]
+        seconds to cache DNS lookups for. Defaults to 300
+    """
+
+    def __init__(
+        self,
+        limit=100,
+        limit_per_host=0,
+        keepalive_timeout=30,
+        ttl_dns_cache=300,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.ttl_dns_cache = ttl_dns_cache
+
+        # Session used in each event loop, and the async generator closing it
+        # when the loop shuts down
+        self._sessions = {}
+        self._refs = 0
+
+    @property
+    def session(self):
+        """The session of the running event loop, created if needed"""
+        loop = asyncio.get_event_loop()
+        entry = self._sessions.get(loop)
+        if entry is not None and not entry[0].closed:
+            return entry[0]
+
+        self._forget_closed_loops()
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=self.ttl_dns_cache,
+        )
+        # Requests are recorded into the stats of the client sending them
+        session = aiohttp.ClientSession(
+            connector=connector,
+            headers={"User-Agent": USER_AGENT},
+            trace_configs=[trace_config()],
+        )
+
+        # Sessions are bound to the event loop they were created in. Starting
+        # the generator registers it with the loop, whose
+        # shutdown_asyncgens(), called by asyncio.run(), closes it and with
+        # it the session, e.g. when a new loop is used for each request
+        closer = self._close_with_loop(loop, session)
+        self._sessions[loop] = (session, closer)
+        asyncio.ensure_future(closer.__anext__())
+        return session
+
+    def acquire(self):
+        """Registers a client using the pool"""
+        self._refs += 1
+
+    async def release(self):
+        """Unregisters a client, closing the sessions if it was the last
+        one"""
+        self._refs -= 1
+        if self._refs > 0:
+            return
+
+        loop = asyncio.get_event_loop()
+        for other, (session, closer) in list(self._sessions.items()):
+            if other is loop:
+                await self._close(session, closer)
+            elif other.is_running():
+                # In use by a loop in another thread
+                asyncio.run_coroutine_threadsafe(
+                    self._close(session, closer), other
+                )
+
+    async def _close_with_loop(self, loop, session):
+        try:
+            yield
+        finally:
+            if self._sessions.get(loop, (None,))[0] is session:
+                del self._sessions[loop]
+            await session.close()
+
+    @staticmethod
+    async def _close(session, closer):
+        await closer.aclose()
+        # In case the generator was closed before it started
+        await session.close()
+
+    def _forget_closed_loops(self):
+        """Drops the sessions of event loops closed without shutting down
+        their async generators, so that they can be garbage collected"""
+        for loop in [loop for loop in self._sessions if loop.is_closed()]:
+            session, closer = self._sessions.pop(loop)
+            # The loop can't run the generator's cleanup, which only marks the
+            # session as closed once the loop is closed; step it here instead
+            try:
+                closer.aclose().send(None)
+            except (StopIteration, RuntimeError):
+                pass
+
+
+_default_pool = None
+
+
+def default_pool():
+    """Returns the pool shared by clients not given one, creating it if
+    needed"""
+    global _default_pool
+    if _default_pool is None:
+        _default_pool = ConnectionPool()
+    return _default_pool
+
 
 class HTTPClient:
 
     BASE = "https://www.speedrun.com/api/v1/"
 
-    def __init__(self):
-        user_agent = "srcom.py Python/{}.{}.{} aiohttp/{}".format(
-            *sys.version_info[:3],
-            aiohttp.__version__,
+    def __init__(
+        self,
+        rate_limit=100,
+        rate_period=60.0,
+        max_concurrency=None,
+        cache=None,
+        coalesce=True,
+        identity_map=None,
+        json_loads=None,
+        pool=None,
+        retry=True,
+        base_url=None,
+        stats=True,
+        executor=None,
+        offload_size=256 * 1024,
+        chunk_size=1000,
+        prefetch=0,
+        rate_bucket=None,
+    ):
+        if base_url is not None:
+            self.BASE = base_url
+
+        self.pool = pool if pool is not None else default_pool()
+        self.pool.acquire()
+        self._closed = False
+
+        if (
+            rate_limit is None
+            and max_concurrency is None
+            and rate_bucket is None
+        ):
+            self.ratelimiter = None
+        else:
+            self.ratelimiter = RateLimiter(
+                rate_limit or float("inf"),
+                rate_period,
+                None,
+                max_concurrency,
+                rate_bucket,
+            )
+
+        if cache is True:
+            cache = ResponseCache()
+        elif cache is False:
+            cache = None
+        self.cache = cache
+
+        # Identical requests currently in flight, by cache key. Only used if
+        # coalesce is enabled
+        self.coalesce = coalesce
+        self._in_flight = {}
+        # Requests started by refresh(), cancelled on close
+        self._background = set()
+
+        # Resources created with this client, by type and ID. Only used if
+        # enabled; see Resource.__new__
+        if identity_map is True:
+            identity_map = IdentityMap()
+        elif identity_map is False:
+            identity_map = None
+        elif isinstance(identity_map, int):
+            identity_map = IdentityMap(identity_map)
+        self.identity_map = identity_map
+
+        if json_loads is None:
+            json_loads = orjson.loads if orjson is not None else json.loads
+        self.json_loads = json_loads
+
+        if retry is True:
+            retry = RetryPolicy()
+        elif retry is False:
+            retry = None
+        self.retry = retry
+
+        if stats is True:
+            stats = RequestStats()
+        elif stats is False:
+            stats = None
+        self.stats = stats
+
+        # Responses of at least offload_size bytes are decoded in the
+        # executor, if given, and resources are created chunk_size at a time,
+        # so large payloads don't block the event loop
+        self.executor = executor
+        self.offload_size = offload_size
+        self.chunk_size = chunk_size
+
+        # Number of leaderboard rows whose players are prefetched; see
+        # prefetch_urls()
+        self.prefetch = prefetch
+
+    async def _get(
+        self, url, params=None, priority=Priority.NORMAL, origin=None
+    ):
+        # origin is given by callers running the request in a separate task,
+        # where the method that needed it is no longer on the stack
+        if self.stats is not None and origin is None:
+            origin = self.stats.origin()
+
+        if self.cache is not None:
+            entry = self.cache.lookup(url, params)
+            if entry is not None:
+                resp, fresh = entry
+                if not fresh:
+                    # Served stale while it is refreshed in the background
+                    self.refresh(url, params)
+                if self.stats is not None:
+                    self.stats.cache_hit(url, origin)
+                return resp
+
+        if not self.coalesce:
+            if self.stats is not None:
+                self.stats.fetch(url, origin)
+            return await self._fetch(url, params, priority)
+
+        # Concurrent identical requests share a single one
+        task = self._in_flight.get(make_key(url, params))
+        if task is None:
+            if self.stats is not None:
+                self.stats.fetch(url, origin)
+            task = self._start(url, params, priority)
+        elif self.stats is not None:
+            self.stats.coalesced(url, origin)
+
+        # Shielded so that one caller being cancelled doesn't cancel the
+        # request for everyone else waiting on it
+        return await asyncio.shield(task)
+
+    def _start(self, url, params, priority):
+        """Starts a request shared by everyone waiting for the same one"""
+        key = make_key(url, params)
+        task = asyncio.ensure_future(self._fetch(url, params, priority))
+        self._in_flight[key] = task
+        task.add_done_callback(lambda t: self._forget(key, t))
+        return task
+
+    def refresh(self, url, params=None, priority=Priority.LOW):
+        """Fetches a response in the background to update the cache, unless
+        it is already being fetched, and returns the task doing so
+
+        Background requests are cancelled when the client is closed."""
+        task = self._in_flight.get(make_key(url, params))
+        if task is None:
+            if self.stats is not None:
+                self.stats.fetch(url)
+            task = self._start(url, params, priority)
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+        return task
+
+    def prefetch_urls(self, urls):
+        """Fetches the responses of URLs in the background, unless they are
+        cached, so that later requests for them are served from the cache"""
+        if self.cache is None:
+            return
+        for url in dict.fromkeys(urls):
+            if not self.cache.contains(url):
+                self.refresh(url)
+
+    def _forget(self, key, task):
+        self._in_flight.pop(key, None)
+        if not task.cancelled():
+            # Retrieve the exception in case every waiter was cancelled
+            task.exception()
+
+    async def _fetch(self, url, params, priority):
+        resp = await self._send(url, params, priority)
+        if self.cache is not None and "data" in resp:
+            self.cache.set(url, params, resp)
+        return resp
+
+    async def _send(self, url, params, priority):
+        attempt = 0
+        while True:
+            try:
+                return await self._attempt(url, params, priority)
+            except (
+                HTTPException,
+                aiohttp.ClientError,
+                asyncio.TimeoutError,
+            ) as e:
+                if self.retry is None or not self.retry.should_retry(
+                    e, attempt
+                ):
+                    raise
+
+                delay = self.retry.delay(e, attempt)
+                if self.stats is not None:
+                    self.stats.retry(url, e)
+                if isinstance(e, Throttled) and self.ratelimiter is not None:
+                    # Hold back every request, not only this one
+                    self.ratelimiter.pause(delay)
+
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def _attempt(self, url, params, priority):
+        """Sends a request, hedging it if it takes unusually long"""
+        hedge_after = None
+        if self.retry is not None:
+            hedge_after = self.retry.hedge_delay(endpoint(url))
+        if hedge_after is None:
+            return await self._limited(url, params, priority)
+
+        tasks = [asyncio.ensure_future(self._limited(url, params, priority))]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+            if not done:
+                tasks.append(
+                    asyncio.ensure_future(self._limited(url, params, priority))
+                )
+
+            pending = tasks
+            errors = []
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                errors.extend(t.exception() for t in done if t.exception())
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+            raise errors[0]
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _limited(self, url, params, priority):
+        """Sends a request once the rate limiter allows it"""
+        if self.ratelimiter is not None:
+            await self.ratelimiter.acquire(priority)
+        try:
+            start = time.monotonic()
+            resp = await self._request(url, params)
+            if self.retry is not None:
+                self.retry.latencies.add(
+                    endpoint(url), time.monotonic() - start
+                )
+            return resp
+        finally:
+            if self.ratelimiter is not None:
+                self.ratelimiter.release()
+
+    @property
+    def session(self):
+        return self.pool.session
+
+    async def _request(self, url, params):
+        kwargs = {"trace_request_ctx": self.stats}
+        if self.retry is not None:
+            kwargs["timeout"] = aiohttp.ClientTimeout(total=self.retry.timeout)
+
+        async with self.session.get(url, params=params, **kwargs) as resp:
+            body = await resp.read()
+            if resp.status >= 400:
+                raise self._error(resp, body)
+
+            if self.stats is None:
+                return await self._decode(body)
+            start = time.perf_counter()
+            data = await self._decode(body)
+            self.stats.decoded(url, time.perf_counter() - start)
+            return data
+
+    async def _decode(self, body):
+        if self.executor is None or len(body) < self.offload_size:
+            return self.json_loads(body)
+
+        loop = asyncio.get_event_loop()
+        if not isinstance(
+            self.executor, concurrent.futures.ProcessPoolExecutor
+        ):
+            # Decoding holds the GIL, so a thread decodes one item at a time
+            return await loop.run_in_executor(
+                self.executor, _decode_stream, self.json_loads, body
+            )
+
+        resp, chunks = await loop.run_in_executor(
+            self.executor,
+            _decode_chunks,
+            self.json_loads,
+            body,
+            self.chunk_size or len(body),
         )
-        self.session = aiohttp.ClientSession(headers={"User-Agent": user_agent})
+        parent, key = _bulk_array(resp)
+        for chunk in chunks:
+            parent[key].extend(pickle.loads(chunk))
+            await asyncio.sleep(0)
+        return resp
+
+    def _error(self, resp, body):
+        """Creates the exception for an error response"""
+        try:
+            message = self.json_loads(body).get("message")
+        except (ValueError, AttributeError):
+            message = None
+
+        try:
+            retry_after = float(resp.headers["Retry-After"])
+        except (KeyError, ValueError):
+            retry_after = None
+
+        if resp.status == 404:
+            cls = NotFound
+        elif resp.status in (420, 429):
+            cls = Throttled
+        else:
+            cls = HTTPException
+        return cls(resp.status, message, retry_after)
+
+    async def stream(
+        self, url, params=None, parser=None, priority=Priority.NORMAL
+    ):
+        """Yields the items of an array in a response as they are received
 
-    async def _get(self, url, params=None):
-        async with self.session.get(url, params=params) as resp:
-            return await resp.json()
+        parser is the ArrayStream used to extract the items, by default those
+        of the "data" array; once the response is exhausted, its envelope()
+        holds the rest of the response. Streamed responses bypass the cache
+        and request coalescing, and are not retried.
+        """
+        if parser is None:
+            parser = ArrayStream()
 
-    async def get(self, path, params=None):
+        if self.stats is not None:
+            self.stats.fetch(url, self.stats.origin())
+
+        if self.ratelimiter is not None:
+            await self.ratelimiter.acquire(priority)
+        try:
+            async with self.session.get(
+                url, params=params, trace_request_ctx=self.stats
+            ) as resp:
+                if resp.status >= 400:
+                    raise self._error(resp, await resp.read())
+
+                async for chunk in resp.content.iter_any():
+                    for item in parser.feed(chunk):
+                        yield item
+                for item in parser.feed(b"", final=True):
+                    yield item
+        finally:
+            if self.ratelimiter is not None:
+                self.ratelimiter.release()
+
+    async def get(self, path, params=None, priority=Priority.NORMAL):
         url = self.BASE + path
-        return await self._get(url, params)
+        return await self._get(url, params, priority)
 
     async def close(self):
-        await self.session.close()
+        if self._closed:
+            return
+        self._closed = True
+
+        for task in list(self._background):
+            task.cancel()
+        await self.pool.release()
+        if self.cache is not None:
+            self.cache.close()
@@ -0,0 +1,42 @@
+import collections
+import weakref
+
+
+class IdentityMap:
+    """Keeps track of the resources created by a client, by type and ID
+
+    Creating a resource whose type and ID are already known returns the
+    existing object, refreshed with the new data. Resources are held weakly so
+    that unused ones can be freed, except for the ``maxsize`` most recently
+    seen, which are kept alive.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._resources = weakref.WeakValueDictionary()
+        self._recent = collections.OrderedDict()
+
+    def get(self, cls, id):
+        """Returns the known resource of a type with an ID, or None"""
+        key = (cls, id)
+        resource = self._resources.get(key)
+        if resource is not None and key in self._recent:
+            self._recent.move_to_end(key)
+        return resource
+
+    def add(self, cls, id, resource):
+        """Registers a resource of a type with an ID"""
+        key = (cls, id)
+        self._resources[key] = resource
+
+        self._recent[key] = resource
+        self._recent.move_to_end(key)
+        while len(self._recent) > self.maxsize:
+            self._recent.popitem(last=False)
+
+    def clear(self):
+        self._resources.clear()
+        self._recent.clear()
+
+    def __len__(self):
+        return len(self._resources)
@@ -0,0 +1,561 @@
+import json
+import sqlite3
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from . import utils
+from .client import Client
+from .dataclasses import Game
+from .errors import NotFound
+from .http import HTTPClient
+from .ratelimit import Priority
+from .stream import ArrayStream
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS resources (
+    endpoint TEXT NOT NULL,
+    id TEXT NOT NULL,
+    parent TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (endpoint, id)
+);
+CREATE INDEX IF NOT EXISTS resources_parent ON resources (endpoint, parent);
+CREATE TABLE IF NOT EXISTS runs (
+    id TEXT PRIMARY KEY,
+    game TEXT NOT NULL,
+    category TEXT,
+    level TEXT,
+    status TEXT,
+    date TEXT,
+    submitted TEXT,
+    verify_date TEXT,
+    primary_t REAL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_game ON runs (game, submitted);
+CREATE INDEX IF NOT EXISTS runs_category ON runs (category, status);
+CREATE TABLE IF NOT EXISTS run_players (
+    run TEXT NOT NULL,
+    player TEXT NOT NULL,
+    PRIMARY KEY (run, player)
+);
+CREATE INDEX IF NOT EXISTS run_players_player ON run_players (player);
+CREATE TABLE IF NOT EXISTS sync_state (
+    game TEXT PRIMARY KEY,
+    submitted TEXT,
+    verified TEXT,
+    synced REAL NOT NULL
+);
+"""
+
+# Values of the runs "orderby" parameter, by column of the runs table
+_RUN_ORDER = {
+    "date": "date",
+    "submitted": "submitted",
+    "verify-date": "verify_date",
+    "status": "status",
+    "category": "category",
+    "level": "level",
+}
+
+
+class Mirror:
+    """A local copy of the data of games, stored in an SQLite database
+
+    :meth:`sync` copies a game's categories, levels, variables, runs and
+    runners into the database. Later syncs only walk back through the runs
+    submitted or verified since the previous one, and through the runs
+    awaiting verification, to update the mirrored ones that were rejected or
+    deleted since. Verified runs deleted later stay in the mirror.
+    :meth:`client` then returns a client answering requests from the
+    database, so the usual resource classes can be used without network round
+    trips.
+
+    Parameters
+    ------------
+    path: str
+        path of the SQLite database
+    """
+
+    def __init__(self, path):
+        self.path = path
+        # Can be used from another thread than the one creating it, e.g. by a
+        # SyncClient's background loop, which serializes all access
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+
+    async def sync(self, client, *games):
+        """|coro|
+
+        Copies games into the mirror, or updates them if already mirrored
+
+        Parameters
+        ------------
+        client: Client
+            the client used to fetch the games
+        games: Union[Game, str]
+            the games to sync, or their IDs
+
+        Returns
+        ---------
+        Dict[str, int]
+            The number of runs added, updated or removed, by game ID.
+        """
+        counts = {}
+        for game in games:
+            game_id = game.id if isinstance(game, Game) else game
+            counts[game_id] = await self._sync_game(client.http, game_id)
+        return counts
+
+    async def _sync_game(self, http, game_id):
+        resp = await http.get(
+            f"games/{game_id}", {"embed": "categories,levels,variables"}
+        )
+        game = dict(resp["data"])
+        game_id = game["id"]
+        for endpoint in ("categories", "levels", "variables"):
+            for item in utils.embedded(game.pop(endpoint, None)) or ():
+                self._put(endpoint, item["id"], item, game_id)
+        self._put("games", game_id, game)
+
+        state = self._db.execute(
+            "SELECT submitted, verified FROM sync_state WHERE game = ?",
+            (game_id,),
+        ).fetchone()
+
+        # The first sync walks every run by submission date. Later ones stop
+        # at the previous watermark, and also walk back by verification date
+        # to pick up status changes of older runs.
+        walks = [("submitted", state[0] if state else None)]
+        if state is not None:
+            walks.append(("verify-date", state[1]))
+
+        watermarks = {}
+        count = 0
+        for orderby, watermark in walks:
+            params = {
+                "game": game_id,
+                "orderby": orderby,
+                "direction": "desc",
+                "embed": "players",
+            }
+            # Walks down to a watermark usually stop within the first page
+            runs = utils.paginate(
+                http,
+                http.BASE + "runs",
+                params,
+                200,
+                prefetch=watermark is None,
+            )
+            try:
+                async for run in runs:
+                    value = utils.run_timestamp(run, orderby)
+                    if watermark is not None:
+                        if value is None or value < watermark:
+                            break
+                        if value == watermark and self._is_mirrored(run):
+                            # Runs sharing the watermark's timestamp may not
+                            # all have been synced
+                            continue
+                    self._put_run(run)
+                    count += 1
+                    if value is not None and value > watermarks.get(
+                        orderby, ""
+                    ):
+                        watermarks[orderby] = value
+            finally:
+                await runs.aclose()
+
+        if state is not None:
+            count += await self._recheck_new_runs(http, game_id)
+
+        previous = state or (None, None)
+        submitted = max(
+            filter(None, (previous[0], watermarks.get("submitted"))),
+            default=None,
+        )
+        verified = max(
+            filter(
+                None,
+                (
+                    previous[1],
+                    watermarks.get("verify-date"),
+                    self._max_verify_date(game_id),
+                ),
+            ),
+            default=None,
+        )
+        self._db.execute(
+            "REPLACE INTO sync_state (game, submitted, verified, synced) "
+            "VALUES (?, ?, ?, ?)",
+            (game_id, submitted, verified, time.time()),
+        )
+        self._db.commit()
+        return count
+
+    async def _recheck_new_runs(self, http, game_id):
+        """Updates the runs mirrored as new that no longer are, i.e. that were
+        rejected or deleted since, and returns their number"""
+        params = {"game": game_id, "status": "new"}
+        pending = {
+            run["id"]
+            async for run in utils.paginate(
+                http, http.BASE + "runs", params, 200
+            )
+        }
+        rows = self._db.execute(
+            "SELECT id FROM runs WHERE game = ? AND status = 'new'", (game_id,)
+        ).fetchall()
+
+        count = 0
+        for (run_id,) in rows:
+            if run_id in pending:
+                continue
+            try:
+                resp = await http.get(f"runs/{run_id}", {"embed": "players"})
+            except NotFound:
+                self._db.execute("DELETE FROM runs WHERE id = ?", (run_id,))
+                self._db.execute(
+                    "DELETE FROM run_players WHERE run = ?", (run_id,)
+                )
+            else:
+                self._put_run(resp["data"])
+            count += 1
+        return count
+
+    def _is_mirrored(self, run):
+        """Returns whether a run is mirrored with its current status"""
+        row = self._db.execute(
+            "SELECT status FROM runs WHERE id = ?", (run["id"],)
+        ).fetchone()
+        return row is not None and row[0] == run["status"]["status"]
+
+    def _max_verify_date(self, game_id):
+        row = self._db.execute(
+            "SELECT MAX(verify_date) FROM runs WHERE game = ?", (game_id,)
+        ).fetchone()
+        return row[0]
+
+    def _put(self, endpoint, id, data, parent=None):
+        self._db.execute(
+            "REPLACE INTO resources (endpoint, id, parent, data) "
+            "VALUES (?, ?, ?, ?)",
+            (endpoint, id, parent, json.dumps(data)),
+        )
+
+    def _put_run(self, run):
+        players = utils.embedded(run["players"])
+        if players is not None:
+            # Store the runners separately, as the API would return them
+            for player in players:
+                if "id" in player:
+                    self._put("users", player["id"], player)
+                else:
+                    self._put("guests", player["name"], player)
+            run = dict(run, players=[utils.player_ref(p) for p in players])
+
+        self._db.execute(
+            "REPLACE INTO runs (id, game, category, level, status, date, "
+            "submitted, verify_date, primary_t, data) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                run["id"],
+                run["game"],
+                run["category"],
+                run["level"],
+                run["status"]["status"],
+                run["date"],
+                run["submitted"],
+                run["status"].get("verify-date"),
+                run["times"]["primary_t"],
+                json.dumps(run),
+            ),
+        )
+        self._db.execute("DELETE FROM run_players WHERE run = ?", (run["id"],))
+        self._db.executemany(
+            "INSERT OR IGNORE INTO run_players (run, player) VALUES (?, ?)",
+            [(run["id"], p.get("id") or p["name"]) for p in run["players"]],
+        )
+
+    def client(self, fallback=None):
+        """Returns a client answering requests from the mirror
+
+        Requests the mirror can't answer are sent through the fallback client
+        if given, otherwise they raise NotFound."""
+        return MirrorClient(self, fallback)
+
+    def close(self):
+        self._db.close()
+
+    def resolve(self, url, params=None):
+        """Returns the response to a request from the mirrored data, or None
+        if the mirror can't answer it"""
+        split = urlsplit(url)
+        path = split.path.split("/api/v1/", 1)[-1].strip("/")
+        query = dict(parse_qsl(split.query))
+        if params:
+            query.update((k, str(v)) for k, v in params.items())
+        parts = path.split("/")
+
+        if parts == ["games"]:
+            return self._search_games(query)
+        if parts == ["runs"]:
+            return self._runs(query)
+        if len(parts) == 2:
+            if parts[0] == "runs":
+                row = self._db.execute(
+                    "SELECT data FROM runs WHERE id = ?", (parts[1],)
+                ).fetchone()
+                return {"data": json.loads(row[0])} if row else None
+            resp = self._resource(parts[0], parts[1])
+            if resp is not None and parts[0] == "games":
+                self._embed_children(resp["data"], query.get("embed"))
+            return resp
+        if len(parts) == 3 and parts[0] == "games":
+            if parts[2] in ("categories", "levels", "variables"):
+                return self._children(parts[2], parts[1])
+        if parts[:1] == ["categories"] and parts[2:] == ["variables"]:
+            return self._category_variables(parts[1])
+        if parts[:1] == ["leaderboards"]:
+            if len(parts) == 4 and parts[2] == "category":
+                return self._leaderboard(parts[1], parts[3], None, query)
+            if len(parts) == 5 and parts[2] == "level":
+                return self._leaderboard(parts[1], parts[4], parts[3], query)
+        return None
+
+    def _resource(self, endpoint, id):
+        row = self._db.execute(
+            "SELECT data FROM resources WHERE endpoint = ? AND id = ?",
+            (endpoint, id),
+        ).fetchone()
+        if row is None and endpoint == "games":
+            # Games can also be looked up by abbreviation
+            return self._search_games({"abbreviation": id}, single=True)
+        return {"data": json.loads(row[0])} if row else None
+
+    def _children(self, endpoint, parent):
+        rows = self._db.execute(
+            "SELECT data FROM resources WHERE endpoint = ? AND parent = ?",
+            (endpoint, parent),
+        )
+        return {"data": [json.loads(data) for data, in rows]}
+
+    def _embed_children(self, game, embed):
+        """Embeds the categories, levels and variables of a game requested
+        by an embed parameter, as the API does"""
+        for key in (embed or "").split(","):
+            if key in ("categories", "levels", "variables"):
+                game[key] = self._children(key, game["id"])
+
+    def _category_variables(self, category_id):
+        row = self._db.execute(
+            "SELECT parent FROM resources "
+            "WHERE endpoint = 'categories' AND id = ?",
+            (category_id,),
+        ).fetchone()
+        if row is None:
+            return None
+
+        variables = self._children("variables", row[0])["data"]
+        return {
+            "data": [
+                v for v in variables if v["category"] in (None, category_id)
+            ]
+        }
+
+    def _search_games(self, query, single=False):
+        rows = self._db.execute(
+            "SELECT data FROM resources WHERE endpoint = 'games'"
+        )
+        games = [json.loads(data) for data, in rows]
+
+        if "abbreviation" in query:
+            games = [
+                g for g in games if g["abbreviation"] == query["abbreviation"]
+            ]
+        if "name" in query:
+            name = query["name"].lower()
+            games = [
+                g
+                for g in games
+                if name in g["names"]["international"].lower()
+                or name == g["abbreviation"].lower()
+            ]
+
+        if single:
+            return {"data": games[0]} if games else None
+        return {"data": games[: int(query.get("max", 20))]}
+
+    def _runs(self, query):
+        where = []
+        args = []
+        for column in ("game", "category", "level", "status"):
+            if column in query:
+                where.append(f"{column} = ?")
+                args.append(query[column])
+        if "user" in query or "guest" in query:
+            where.append("id IN (SELECT run FROM run_players WHERE player = ?)")
+            args.append(query.get("user") or query["guest"])
+
+        sql = "SELECT data FROM runs"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+
+        orderby = _RUN_ORDER.get(query.get("orderby"), "rowid")
+        direction = "DESC" if query.get("direction") == "desc" else "ASC"
+        offset = int(query.get("offset", 0))
+        limit = int(query.get("max", 20))
+        sql += f" ORDER BY {orderby} {direction} LIMIT ? OFFSET ?"
+
+        # One extra row tells whether there is a next page
+        rows = self._db.execute(sql, args + [limit + 1, offset]).fetchall()
+        runs = [json.loads(data) for data, in rows[:limit]]
+
+        links = []
+        if len(rows) > limit:
+            next_query = dict(query, offset=offset + limit)
+            links.append(
+                {
+                    "rel": "next",
+                    "uri": HTTPClient.BASE + "runs?" + urlencode(next_query),
+                }
+            )
+
+        return {
+            "data": runs,
+            "pagination": {
+                "offset": offset,
+                "max": limit,
+                "size": len(runs),
+                "links": links,
+            },
+        }
+
+    def _leaderboard(self, game, category, level, query):
+        if level is None:
+            rows = self._db.execute(
+                "SELECT data FROM runs WHERE game = ? AND category = ? "
+                "AND level IS NULL AND status = 'verified'",
+                (game, category),
+            )
+        else:
+            rows = self._db.execute(
+                "SELECT data FROM runs WHERE game = ? AND category = ? "
+                "AND level = ? AND status = 'verified'",
+                (game, category, level),
+            )
+
+        values = {
+            key[4:]: value
+            for key, value in query.items()
+            if key.startswith("var-")
+        }
+        date = query.get("date")
+
+        # Keep the best run of every runner (or team of runners)
+        best = {}
+        for (data,) in rows:
+            run = json.loads(data)
+            if any(run["values"].get(k) != v for k, v in values.items()):
+                continue
+            if date is not None and (run["date"] or "") > date:
+                continue
+
+            key = tuple(
+                sorted(p.get("id") or p["name"] for p in run["players"])
+            )
+            current = best.get(key)
+            if current is None or _run_order(run) < _run_order(current):
+                best[key] = run
+
+        runs = sorted(best.values(), key=_run_order)
+        top = int(query["top"]) if "top" in query else None
+
+        entries = []
+        for i, run in enumerate(runs):
+            if entries and run["times"]["primary_t"] == (
+                entries[-1]["run"]["times"]["primary_t"]
+            ):
+                place = entries[-1]["place"]
+            else:
+                place = i + 1
+            if top is not None and place > top:
+                break
+            entries.append({"place": place, "run": run})
+
+        return {
+            "data": {
+                "game": game,
+                "category": category,
+                "level": level,
+                "values": values,
+                "runs": entries,
+                "links": [],
+            }
+        }
+
+
+class MirrorHTTP:
+    """Stands in for HTTPClient, answering requests from a Mirror"""
+
+    BASE = HTTPClient.BASE
+
+    def __init__(self, mirror, fallback=None):
+        self.mirror = mirror
+        self.fallback = fallback
+        if fallback is not None:
+            self.BASE = fallback.BASE
+        self.identity_map = None
+        self.json_loads = json.loads
+        self.chunk_size = None
+        self.prefetch = 0
+        self.stats = fallback.stats if fallback is not None else None
+
+    async def _get(
+        self, url, params=None, priority=Priority.NORMAL, origin=None
+    ):
+        resp = self.mirror.resolve(url, params)
+        if resp is not None:
+            return resp
+        if self.fallback is None:
+            raise NotFound(404, f"{url} is not in the mirror")
+        return await self.fallback._get(url, params, priority, origin)
+
+    async def get(self, path, params=None, priority=Priority.NORMAL):
+        return await self._get(self.BASE + path, params, priority)
+
+    async def stream(
+        self, url, params=None, parser=None, priority=Priority.NORMAL
+    ):
+        if parser is None:
+            parser = ArrayStream()
+
+        resp = await self._get(url, params, priority)
+        for item in parser.feed(json.dumps(resp).encode(), final=True):
+            yield item
+
+    async def close(self):
+        pass
+
+
+class MirrorClient(Client):
+    """A client answering requests from a Mirror instead of the API
+
+    Parameters
+    ------------
+    mirror: Mirror
+        the mirror to answer requests from
+    fallback: Optional[Client]
+        client to send requests the mirror can't answer through; if None,
+        they raise NotFound
+    """
+
+    def __init__(self, mirror, fallback=None):
+        self.http = MirrorHTTP(
+            mirror, fallback.http if fallback is not None else None
+        )
+
+
+def _run_order(run):
+    # Ties are broken by the date the run was performed on
+    return (run["times"]["primary_t"], run["date"] or "")
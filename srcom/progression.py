@@ -0,0 +1,207 @@
+import bisect
+from datetime import date
+
+
+def _parse_date(value):
+    return date(int(value[:4]), int(value[5:7]), int(value[8:10]))
+
+
+def _id(value):
+    """Returns the ID of a related resource, which may be embedded"""
+    if isinstance(value, dict):
+        return value["data"]["id"] if value["data"] else None
+    return value
+
+
+def _team(run):
+    """Returns the players of a run's JSON data as a sorted tuple of user IDs
+    and guest names"""
+    players = run["players"]
+    if isinstance(players, dict):
+        # Embedded players
+        players = players["data"]
+    return tuple(sorted(p.get("id") or p.get("name") for p in players))
+
+
+class ProgressionEntry:
+    """A run that improved a world record or personal best
+
+    Attributes
+    ------------
+    date: datetime.date
+        date the run was performed on
+    time: float
+        primary time of the run in seconds
+    run: str
+        ID of the run
+    players: Tuple[str, ...]
+        IDs of the players of the run, sorted; guests are given by name
+    """
+
+    __slots__ = ("date", "time", "run", "players")
+
+    def __init__(self, date, time, run, players):
+        self.date = date
+        self.time = time
+        self.run = run
+        self.players = players
+
+    def __repr__(self):
+        return (
+            f"<ProgressionEntry date={self.date} time={self.time} "
+            f"run={self.run!r}>"
+        )
+
+
+class _Board:
+    __slots__ = ("records", "pbs", "dates")
+
+    def __init__(self):
+        self.records = []
+        # PB progression and the dates of its entries, by team
+        self.pbs = {}
+        self.dates = {}
+
+
+class Progression:
+    """World record and personal best progressions computed from the verified
+    runs of one or more leaderboards
+
+    Runs must be added in the order they were performed, e.g. as returned by
+    the runs endpoint ordered by date, and are processed in a single pass.
+    Unverified runs and runs without a date are ignored.
+
+    Runs are split into leaderboards by ``(category ID, level ID, values)``
+    keys, as returned by :meth:`Game.all_leaderboards`: the level ID is None
+    for full-game runs, and values is a tuple of ``(variable ID, value ID)``
+    pairs for the subcategory variables, sorted by variable ID. Personal bests
+    are tracked per team: the sorted tuple of the IDs of the run's players.
+
+    Parameters
+    ------------
+    subcategories: Optional[Iterable[Union[Variable, str]]]
+        the variables, or their IDs, that split a category into separate
+        leaderboards. Variables not labelled as subcategories are ignored
+    """
+
+    def __init__(self, subcategories=()):
+        self.subcategories = frozenset(
+            var if isinstance(var, str) else var.id
+            for var in subcategories
+            if isinstance(var, str) or var.is_subcategory
+        )
+        self._boards = {}
+        self._last_date = ""
+
+    def board_key(self, category, level=None, values=None):
+        """Returns the key of a leaderboard from its category and level IDs
+        and a dict of variable values, ignoring those of variables that
+        aren't subcategories"""
+        values = values or {}
+        return (
+            category,
+            level,
+            tuple(
+                sorted(
+                    (var, value)
+                    for var, value in values.items()
+                    if var in self.subcategories
+                )
+            ),
+        )
+
+    def add(self, run):
+        """Adds a run, given as a :class:`Run` or its JSON data
+
+        Raises
+        --------
+        ValueError
+            The run was performed before the previous run added.
+        """
+        data = getattr(run, "_data", run)
+        if data["status"]["status"] != "verified" or not data.get("date"):
+            return
+        if data["date"] < self._last_date:
+            raise ValueError(
+                f"run {data['id']} is older than the previous run added"
+            )
+        self._last_date = data["date"]
+
+        key = self.board_key(
+            _id(data["category"]), _id(data.get("level")), data.get("values")
+        )
+        board = self._boards.get(key)
+        if board is None:
+            board = self._boards[key] = _Board()
+
+        time = data["times"]["primary_t"]
+        team = _team(data)
+
+        pbs = board.pbs.get(team)
+        if pbs is not None and time >= pbs[-1].time:
+            return
+
+        entry = ProgressionEntry(
+            _parse_date(data["date"]), time, data["id"], team
+        )
+        if pbs is None:
+            board.pbs[team] = [entry]
+            board.dates[team] = [entry.date]
+        else:
+            pbs.append(entry)
+            board.dates[team].append(entry.date)
+
+        if not board.records or time < board.records[-1].time:
+            board.records.append(entry)
+
+    def extend(self, runs):
+        """Adds several runs, in the order they were performed"""
+        for run in runs:
+            self.add(run)
+
+    @property
+    def boards(self):
+        """Keys of the leaderboards with verified runs"""
+        return list(self._boards)
+
+    def world_records(self, board):
+        """Returns the world record progression of a leaderboard, oldest
+        first"""
+        return list(self._get(board).records)
+
+    def personal_bests(self, board, players):
+        """Returns the personal best progression of a team on a leaderboard,
+        oldest first
+
+        players is the ID or guest name of a player, or an iterable of them
+        for co-op runs"""
+        if isinstance(players, str):
+            players = (players,)
+        return list(self._get(board).pbs.get(tuple(sorted(players)), ()))
+
+    def leaderboard(self, board, at=None):
+        """Returns the personal bests on a leaderboard as of a date, fastest
+        first, or the current ones if at is None
+
+        at may be a date or a datetime, e.g. :attr:`Run.date`"""
+        board = self._get(board)
+        if at is None:
+            entries = [pbs[-1] for pbs in board.pbs.values()]
+        else:
+            if hasattr(at, "date"):
+                at = at.date()
+            entries = []
+            for team, dates in board.dates.items():
+                # Index of the last PB performed on or before the date
+                index = bisect.bisect_right(dates, at) - 1
+                if index >= 0:
+                    entries.append(board.pbs[team][index])
+
+        entries.sort(key=lambda entry: (entry.time, entry.date))
+        return entries
+
+    def _get(self, board):
+        try:
+            return self._boards[board]
+        except KeyError:
+            raise KeyError(f"no verified runs in leaderboard {board}") from None
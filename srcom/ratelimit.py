@@ -0,0 +1,292 @@
+import asyncio
+import heapq
+import itertools
+import json
+import os
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class Priority:
+    """Request priorities for the rate limiter. Lower values are served first.
+
+    HIGH is used for interactive single-resource lookups, LOW for bulk crawls
+    such as paginated iteration.
+    """
+
+    HIGH = 0
+    NORMAL = 1
+    LOW = 2
+
+
+def _refill_rate(rate, per, capacity):
+    """Returns the tokens added per second to a bucket of the given capacity,
+    such that a full bucket and its refill stay within rate every per
+    seconds"""
+    return max(rate - capacity, 1) / per
+
+
+class TokenBucket:
+    """A token bucket allowing ``rate`` requests every ``per`` seconds
+
+    Up to ``burst`` tokens (defaults to 1) can accumulate while idle. Tokens
+    are added at ``rate - burst`` every ``per`` seconds, so that no window of
+    ``per`` seconds sees more than ``rate`` requests, even after being idle.
+    """
+
+    def __init__(self, rate=100, per=60.0, burst=None):
+        self.rate = rate
+        self.per = per
+        self.capacity = burst if burst is not None else 1
+        self._refill = _refill_rate(rate, per, self.capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+
+    def acquire(self):
+        """Takes a token if one is available
+
+        Returns 0 if a token was taken, otherwise the number of seconds until
+        the next one becomes available.
+        """
+        now = time.monotonic()
+        if self._paused_until > now:
+            return self._paused_until - now
+
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self._refill
+        )
+        self._updated = now
+
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self._refill
+
+    def pause(self, delay):
+        """Hands out no tokens for the given number of seconds"""
+        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+
+
+class SharedTokenBucket:
+    """A token bucket shared by every process on the host using the same file
+
+    The bucket's state is kept in a small file, locked while a token is taken,
+    so that worker processes together stay within ``rate`` requests every
+    ``per`` seconds. Processes that aren't sending requests take no tokens, so
+    busy ones can use the whole budget. When tokens run short, processes are
+    served in the order they started waiting, so that busy processes share the
+    budget evenly. Pauses, e.g. after being throttled, apply to every process.
+
+    Requires :mod:`fcntl`, so isn't available on Windows.
+
+    Parameters
+    ------------
+    path: str
+        path of the state file; processes sharing a budget must use the same
+    rate: Optional[int]
+        requests allowed every ``per`` seconds by all processes together.
+        Defaults to 100
+    per: Optional[float]
+        seconds the rate is over. Defaults to 60
+    burst: Optional[int]
+        tokens that can accumulate while every process is idle. Tokens are
+        added at ``rate - burst`` every ``per`` seconds so that no window
+        exceeds the rate. Defaults to 1
+    """
+
+    def __init__(self, path, rate=100, per=60.0, burst=None):
+        if fcntl is None:
+            raise RuntimeError("SharedTokenBucket requires fcntl")
+
+        self.path = path
+        self.rate = rate
+        self.per = per
+        self.capacity = burst if burst is not None else 1
+        self._refill = _refill_rate(rate, per, self.capacity)
+        self._file = None
+        self._pid = None
+
+    def acquire(self):
+        """Takes a token if one is available to this process
+
+        Returns 0 if a token was taken, otherwise the number of seconds until
+        the next one is expected to become available.
+        """
+        return self._update(self._acquire)
+
+    def pause(self, delay):
+        """Hands out no tokens to any process for the given number of
+        seconds"""
+
+        def pause(state, now):
+            state["paused_until"] = max(state["paused_until"], now + delay)
+
+        self._update(pause)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _acquire(self, state, now):
+        pid = str(os.getpid())
+        state["tokens"] = min(
+            self.capacity,
+            state["tokens"] + (now - state["updated"]) * self._refill,
+        )
+        state["updated"] = now
+
+        # Processes waiting for a token, as [started waiting, expires]. An
+        # entry expires shortly after its process should have tried again,
+        # so processes that exited don't hold tokens back
+        waiting = {
+            other: entry
+            for other, entry in state["waiting"].items()
+            if entry[1] > now
+        }
+        state["waiting"] = waiting
+        since = waiting[pid][0] if pid in waiting else now
+
+        if state["paused_until"] > now:
+            wait = state["paused_until"] - now
+        else:
+            # Tokens are left for the processes that have waited longer
+            ahead = sum(
+                1
+                for other, entry in waiting.items()
+                if other != pid and entry[0] <= since
+            )
+            if state["tokens"] >= ahead + 1:
+                state["tokens"] -= 1
+                waiting.pop(pid, None)
+                return 0.0
+            wait = (ahead + 1 - state["tokens"]) / self._refill
+
+        waiting[pid] = [since, now + wait + 1.0]
+        return wait
+
+    def _update(self, func):
+        # Locks are held by open files, which a forked process shares with
+        # its parent, so each process opens its own
+        if self._file is None or self._pid != os.getpid():
+            self._file = open(self.path, "a+")
+            self._pid = os.getpid()
+
+        f = self._file
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            now = time.time()
+            f.seek(0)
+            data = f.read()
+            if data:
+                state = json.loads(data)
+            else:
+                state = {
+                    "tokens": float(self.capacity),
+                    "updated": now,
+                    "paused_until": 0.0,
+                    "waiting": {},
+                }
+
+            result = func(state, now)
+
+            f.seek(0)
+            f.truncate()
+            f.write(json.dumps(state))
+            f.flush()
+            return result
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class RateLimiter:
+    """Governs when requests may be sent
+
+    Combines a token bucket, which bounds the request rate, with an optional
+    limit on the number of requests in flight at once. Waiting requests are
+    released in order of priority, then in the order they arrived.
+
+    A :class:`SharedTokenBucket` can be given as the bucket to share the rate
+    limit with other processes; rate, per and burst are then ignored.
+    """
+
+    def __init__(
+        self, rate=100, per=60.0, burst=None, max_concurrency=None, bucket=None
+    ):
+        if bucket is None:
+            bucket = TokenBucket(rate, per, burst)
+        self.bucket = bucket
+        self.max_concurrency = max_concurrency
+
+        self._in_flight = 0
+        self._waiters = []
+        self._counter = itertools.count()
+        self._timer = None
+
+    async def acquire(self, priority=Priority.NORMAL):
+        """|coro|
+
+        Waits until a request of the given priority may be sent. Every call
+        must be paired with a call to :meth:`release` once the request is
+        done.
+        """
+        fut = asyncio.get_event_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), fut))
+        self._dispatch()
+
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # A slot was granted just as we were cancelled; hand it back
+                self.release()
+            raise
+
+    def release(self):
+        """Marks a request as finished, freeing its concurrency slot"""
+        self._in_flight -= 1
+        self._dispatch()
+
+    def pause(self, delay):
+        """Holds back all requests for the given number of seconds, e.g. after
+        being throttled by the API"""
+        self.bucket.pause(delay)
+
+    def _dispatch(self):
+        while self._waiters:
+            fut = self._waiters[0][2]
+            if fut.done():
+                # The waiting request was cancelled
+                heapq.heappop(self._waiters)
+                continue
+
+            if (
+                self.max_concurrency is not None
+                and self._in_flight >= self.max_concurrency
+            ):
+                # release() dispatches again when a slot frees up
+                return
+
+            wait = self.bucket.acquire()
+            if wait > 0:
+                self._schedule(wait)
+                return
+
+            heapq.heappop(self._waiters)
+            self._in_flight += 1
+            fut.set_result(None)
+
+    def _schedule(self, delay):
+        if self._timer is not None:
+            return
+
+        def wakeup():
+            self._timer = None
+            self._dispatch()
+
+        self._timer = asyncio.get_event_loop().call_later(delay, wakeup)
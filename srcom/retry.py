@@ -0,0 +1,104 @@
+import asyncio
+import collections
+import random
+
+import aiohttp
+
+from .errors import HTTPException
+
+
+class RetryPolicy:
+    """Decides whether and when failed requests are retried
+
+    Throttled responses, server errors, timeouts and connection errors are
+    retried with exponential backoff and full jitter, or after the delay given
+    by the Retry-After header if present.
+
+    Requests can also be hedged: if a request takes longer than the given
+    percentile of recent latencies for its endpoint, an identical request is
+    sent and whichever finishes first is used.
+
+    Parameters
+    ------------
+    max_retries: Optional[int]
+        maximum number of retries per request. Defaults to 3
+    backoff: Optional[float]
+        base delay in seconds, doubled on every retry. Defaults to 1
+    max_backoff: Optional[float]
+        maximum delay in seconds between attempts. Defaults to 60
+    statuses: Optional[Iterable[int]]
+        HTTP statuses to retry. Defaults to 420, 429, 500, 502, 503 and 504
+    timeout: Optional[float]
+        seconds before an attempt times out. Defaults to 30
+    hedge_percentile: Optional[float]
+        percentile of recent latencies, between 0 and 1, after which a hedged
+        request is sent; None disables hedging. Disabled by default
+    hedge_min_samples: Optional[int]
+        number of latencies needed for an endpoint before its requests are
+        hedged. Defaults to 20
+    """
+
+    def __init__(
+        self,
+        max_retries=3,
+        backoff=1.0,
+        max_backoff=60.0,
+        statuses=(420, 429, 500, 502, 503, 504),
+        timeout=30.0,
+        hedge_percentile=None,
+        hedge_min_samples=20,
+    ):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.statuses = frozenset(statuses)
+        self.timeout = timeout
+        self.hedge_percentile = hedge_percentile
+        self.latencies = LatencyTracker(min_samples=hedge_min_samples)
+
+    def should_retry(self, error, attempt):
+        """Returns whether to retry after the given failed attempt"""
+        if attempt >= self.max_retries:
+            return False
+        if isinstance(error, HTTPException):
+            return error.status in self.statuses
+        return isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError))
+
+    def delay(self, error, attempt):
+        """Returns the seconds to wait before retrying a failed attempt"""
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after is not None:
+            return retry_after
+        return random.uniform(
+            0, min(self.max_backoff, self.backoff * 2**attempt)
+        )
+
+    def hedge_delay(self, endpoint):
+        """Returns the seconds after which to hedge a request to an endpoint,
+        or None to not hedge it"""
+        if self.hedge_percentile is None:
+            return None
+        return self.latencies.percentile(endpoint, self.hedge_percentile)
+
+
+class LatencyTracker:
+    """Keeps the most recent request latencies of each endpoint"""
+
+    def __init__(self, size=100, min_samples=20):
+        self.min_samples = min_samples
+        self._latencies = collections.defaultdict(
+            lambda: collections.deque(maxlen=size)
+        )
+
+    def add(self, endpoint, latency):
+        self._latencies[endpoint].append(latency)
+
+    def percentile(self, endpoint, q):
+        """Returns the q-th percentile (0 to 1) of the recent latencies of an
+        endpoint, or None if there are not enough of them"""
+        latencies = self._latencies.get(endpoint)
+        if latencies is None or len(latencies) < self.min_samples:
+            return None
+
+        latencies = sorted(latencies)
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))]
@@ -0,0 +1,78 @@
+import json
+import zlib
+
+from .abcs import Resource
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# First byte of a serialized document, identifying its format
+_MSGPACK = b"M"
+_ZLIB_JSON = b"Z"
+
+
+def _encode_json(value):
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":")).encode()
+
+
+def _decode_json(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(resources):
+    """Serializes a resource, or a list of resources, to bytes
+
+    Uses MessagePack if msgpack is installed, otherwise zlib-compressed JSON.
+    :func:`loads` reads either format. The resources' raw data is stored, so
+    loading them needs no requests.
+    """
+    if isinstance(resources, Resource):
+        value = resources.to_dict()
+    else:
+        value = [r.to_dict() for r in resources]
+
+    if msgpack is not None:
+        return _MSGPACK + msgpack.packb(value, use_bin_type=True)
+    return _ZLIB_JSON + zlib.compress(_encode_json(value))
+
+
+def loads(data, client=None):
+    """Recreates the resource or list of resources serialized by
+    :func:`dumps`, attached to the given client, or the default client if
+    None"""
+    kind, payload = data[:1], data[1:]
+    if kind == _MSGPACK:
+        if msgpack is None:
+            raise ImportError("msgpack is required to load this data")
+        value = msgpack.unpackb(payload, raw=False)
+    elif kind == _ZLIB_JSON:
+        value = _decode_json(zlib.decompress(payload))
+    else:
+        raise ValueError("not serialized srcom resources")
+
+    if isinstance(value, dict):
+        return Resource.from_dict(value, client)
+    return [Resource.from_dict(v, client) for v in value]
+
+
+def dump(resources, path):
+    """Serializes resources to a file; see :func:`dumps`"""
+    with open(path, "wb") as f:
+        f.write(dumps(resources))
+
+
+def load(path, client=None):
+    """Loads resources from a file written by :func:`dump`"""
+    with open(path, "rb") as f:
+        return loads(f.read(), client)
@@ -0,0 +1,380 @@
+import json
+import os
+import time
+from array import array
+
+from . import utils
+from .cache import make_key
+from .progression import _team
+from .ratelimit import Priority
+from .warm import leaderboard_request
+
+
+class LeaderboardChange:
+    """A difference between two snapshots of a leaderboard
+
+    Attributes
+    ------------
+    type: str
+        "new" for a run that wasn't on the previous board, "improved" for a
+        new run replacing a slower one by the same players, "removed" for a
+        run no longer on the board that wasn't replaced by a faster one, or
+        "moved" for a run on both boards whose place changed
+    board: Optional[str]
+        key of the leaderboard given to :meth:`LeaderboardSnapshot.diff`,
+        e.g. by a LeaderboardWatcher
+    run: str
+        ID of the run
+    players: Tuple[str, ...]
+        IDs of the players of the run, sorted; guests are given by name
+    place: Optional[int]
+        place of the run, or None if it was removed
+    time: float
+        primary time of the run in seconds
+    previous_place: Optional[int]
+        place on the previous board of the run, or of the run it improved on.
+        None for new runs
+    previous_time: Optional[float]
+        primary time of the run, or of the run it improved on, on the previous
+        board. None for new runs
+    record: bool
+        whether the run is a new world record: first place and faster than
+        every run on the previous board
+    """
+
+    __slots__ = (
+        "type",
+        "board",
+        "run",
+        "players",
+        "place",
+        "time",
+        "previous_place",
+        "previous_time",
+        "record",
+    )
+
+    def __init__(
+        self,
+        type,
+        board,
+        run,
+        players,
+        place,
+        time,
+        previous_place=None,
+        previous_time=None,
+        record=False,
+    ):
+        self.type = type
+        self.board = board
+        self.run = run
+        self.players = players
+        self.place = place
+        self.time = time
+        self.previous_place = previous_place
+        self.previous_time = previous_time
+        self.record = record
+
+    def __repr__(self):
+        return (
+            f"<LeaderboardChange type={self.type!r} run={self.run!r} "
+            f"place={self.place} previous_place={self.previous_place}>"
+        )
+
+
+class LeaderboardSnapshot:
+    """A compact copy of a leaderboard, for finding what changed between two
+    fetches of it
+
+    Only the run IDs, players, places and primary times are kept, as parallel
+    columns built directly from the leaderboard JSON without creating
+    :class:`Run` objects.
+
+    Attributes
+    ------------
+    ids: List[str]
+        run IDs
+    players: List[Tuple[str, ...]]
+        IDs of the players of each run, sorted; guests are given by name
+    places: array[int]
+        places on the leaderboard
+    times: array[float]
+        primary times in seconds
+    taken: float
+        when the snapshot was taken, as a Unix timestamp
+    """
+
+    __slots__ = ("ids", "players", "places", "times", "taken", "_index")
+
+    def __init__(self, taken=None):
+        self.ids = []
+        self.players = []
+        self.places = array("i")
+        self.times = array("d")
+        self.taken = time.time() if taken is None else taken
+        # Positions of the runs by ID and by players, built when first diffed
+        # against
+        self._index = None
+
+    @classmethod
+    def from_json(cls, board, taken=None):
+        """Creates a snapshot from the data of a leaderboard response"""
+        snapshot = cls(taken)
+        for entry in board["runs"]:
+            run = entry["run"]
+            snapshot.ids.append(run["id"])
+            snapshot.players.append(_team(run))
+            snapshot.places.append(entry["place"])
+            snapshot.times.append(run["times"]["primary_t"])
+        return snapshot
+
+    def to_dict(self):
+        """Returns the snapshot as a JSON-serializable dict"""
+        return {
+            "ids": self.ids,
+            "players": self.players,
+            "places": self.places.tolist(),
+            "times": self.times.tolist(),
+            "taken": self.taken,
+        }
+
+    @classmethod
+    def from_dict(cls, dct):
+        """Recreates a snapshot from the dict returned by :meth:`to_dict`"""
+        snapshot = cls(dct["taken"])
+        snapshot.ids = list(dct["ids"])
+        snapshot.players = [tuple(players) for players in dct["players"]]
+        snapshot.places = array("i", dct["places"])
+        snapshot.times = array("d", dct["times"])
+        return snapshot
+
+    def __len__(self):
+        return len(self.ids)
+
+    def diff(self, previous, moves=True, board=None):
+        """Compares the snapshot with an earlier one of the same leaderboard
+
+        Runs are matched by ID, then new runs are matched with the previous
+        runs of their players, in a single pass over each snapshot.
+
+        Parameters
+        ------------
+        previous: LeaderboardSnapshot
+            the earlier snapshot
+        moves: Optional[bool]
+            whether to report runs whose place changed. A run entering the
+            board moves every run below it, so these can be numerous.
+            Defaults to True
+        board: Optional[str]
+            key of the leaderboard, set as the board of the changes
+
+        Returns
+        ---------
+        List[LeaderboardChange]
+            The changes, new, improved and moved runs in order of their place,
+            then removed runs.
+        """
+        if self.ids == previous.ids and self.places == previous.places:
+            return []
+
+        by_id, by_players = previous._positions()
+        record = min(previous.times) if previous.times else float("inf")
+        # Previous runs still on the board or improved on
+        matched = bytearray(len(previous))
+
+        changes = []
+        for i, run in enumerate(self.ids):
+            place = self.places[i]
+            j = by_id.get(run)
+            if j is not None:
+                matched[j] = True
+                if moves and previous.places[j] != place:
+                    changes.append(
+                        LeaderboardChange(
+                            "moved",
+                            board,
+                            run,
+                            self.players[i],
+                            place,
+                            self.times[i],
+                            previous.places[j],
+                            previous.times[j],
+                        )
+                    )
+                continue
+
+            players = self.players[i]
+            run_time = self.times[i]
+            is_record = place == 1 and run_time < record
+
+            j = by_players.get(players)
+            if (
+                j is not None
+                and not matched[j]
+                and run_time < previous.times[j]
+            ):
+                matched[j] = True
+                changes.append(
+                    LeaderboardChange(
+                        "improved",
+                        board,
+                        run,
+                        players,
+                        place,
+                        run_time,
+                        previous.places[j],
+                        previous.times[j],
+                        is_record,
+                    )
+                )
+            else:
+                changes.append(
+                    LeaderboardChange(
+                        "new",
+                        board,
+                        run,
+                        players,
+                        place,
+                        run_time,
+                        record=is_record,
+                    )
+                )
+
+        for j, kept in enumerate(matched):
+            if not kept:
+                changes.append(
+                    LeaderboardChange(
+                        "removed",
+                        board,
+                        previous.ids[j],
+                        previous.players[j],
+                        None,
+                        previous.times[j],
+                        previous.places[j],
+                        previous.times[j],
+                    )
+                )
+        return changes
+
+    def _positions(self):
+        if self._index is None:
+            self._index = (
+                {run: i for i, run in enumerate(self.ids)},
+                {players: i for i, players in enumerate(self.players)},
+            )
+        return self._index
+
+
+class LeaderboardWatcher:
+    """Polls leaderboards for changes
+
+    Each poll fetches every watched leaderboard at low priority, snapshots it
+    and diffs the snapshot against the previous one, keeping only the latest
+    snapshot of each leaderboard. The snapshots can be persisted to a file so
+    that changes made while stopped are reported on the next poll.
+
+    Iterating over the watcher polls every ``interval`` seconds and yields
+    the changes found. With a cache, leaderboards are only fetched again once
+    their cached response expires, so changes can be reported up to the
+    leaderboards' TTL late.
+
+    Parameters
+    ------------
+    client: Client
+        the client used to poll
+    interval: Optional[float]
+        seconds between the start of consecutive polls. Defaults to 60
+    state_path: Optional[str]
+        path of a JSON file to persist the snapshots to
+    concurrency: Optional[int]
+        maximum number of leaderboards fetched at once. Defaults to 4
+    moves: Optional[bool]
+        whether to report runs whose place changed; see
+        :meth:`LeaderboardSnapshot.diff`. Defaults to True
+    """
+
+    def __init__(
+        self, client, interval=60, state_path=None, concurrency=4, moves=True
+    ):
+        self.client = client
+        self.interval = interval
+        self.state_path = state_path
+        self.concurrency = concurrency
+        self.moves = moves
+
+        # (url, params) of each leaderboard, and its latest snapshot, by key
+        self.requests = {}
+        self.snapshots = {}
+        if state_path is not None and os.path.exists(state_path):
+            with open(state_path) as f:
+                state = json.load(f)
+            self.snapshots = {
+                key: LeaderboardSnapshot.from_dict(snapshot)
+                for key, snapshot in state["snapshots"].items()
+            }
+
+    def add(self, resource, top=None, category=None, params=None):
+        """Starts watching a leaderboard
+
+        resource is the Game or Category whose leaderboard() would be called;
+        the other arguments are those it would be called with. Returns the
+        key of the leaderboard, set as the board of its changes.
+        """
+        url, params = leaderboard_request(resource, top, category, params)
+        key = make_key(url, params)
+        self.requests[key] = (url, params)
+        return key
+
+    def remove(self, key):
+        """Stops watching a leaderboard"""
+        self.requests.pop(key, None)
+        self.snapshots.pop(key, None)
+
+    async def poll(self):
+        """|coro|
+
+        Polls every watched leaderboard once. The first poll of a leaderboard
+        only records its snapshot
+
+        Returns
+        ---------
+        List[LeaderboardChange]
+            The changes since the previous poll.
+        """
+        results = await utils.gather_unique(
+            self._poll, list(self.requests), self.concurrency
+        )
+        self._save()
+        return [change for changes in results for change in changes]
+
+    def __aiter__(self):
+        return utils.poll_every(self.poll, self.interval)
+
+    async def _poll(self, key):
+        url, params = self.requests[key]
+        board = await self.client.http._get(url, params, Priority.LOW)
+
+        if key not in self.requests:
+            # Removed while being fetched
+            return []
+
+        snapshot = LeaderboardSnapshot.from_json(board["data"])
+        previous = self.snapshots.get(key)
+        self.snapshots[key] = snapshot
+
+        if previous is None:
+            return []
+        return snapshot.diff(previous, self.moves, key)
+
+    def _save(self):
+        if self.state_path is None:
+            return
+
+        state = {
+            "snapshots": {
+                key: snapshot.to_dict()
+                for key, snapshot in self.snapshots.items()
+            }
+        }
+        utils.write_json(self.state_path, state)
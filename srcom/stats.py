@@ -0,0 +1,307 @@
+import bisect
+import collections
+import os
+import sys
+import time
+
+import aiohttp
+
+from .cache import endpoint
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Modules whose methods requests are attributed to
+_ORIGIN_MODULES = frozenset(
+    os.path.join(os.path.dirname(__file__), name)
+    for name in ("client.py", "dataclasses.py", "abcs.py", "feed.py")
+)
+
+
+class Histogram:
+    """Counts of values falling into fixed buckets
+
+    ``counts[i]`` is the number of values at most ``bounds[i]`` and greater
+    than the previous bound; the last count is of values above every bound.
+    """
+
+    __slots__ = ("bounds", "counts", "count", "sum")
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def add(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def to_dict(self):
+        buckets = dict(zip(self.bounds + (float("inf"),), self.counts))
+        return {"count": self.count, "sum": self.sum, "buckets": buckets}
+
+
+class EndpointStats:
+    """Counters for the requests to one endpoint"""
+
+    __slots__ = (
+        "requests",
+        "errors",
+        "retries",
+        "throttled",
+        "cache_hits",
+        "coalesced",
+        "bytes",
+        "decode_time",
+        "latency",
+    )
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.throttled = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+        self.bytes = 0
+        self.decode_time = 0.0
+        self.latency = Histogram()
+
+    def to_dict(self):
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "cache_hits": self.cache_hits,
+            "coalesced": self.coalesced,
+            "bytes": self.bytes,
+            "decode_time": self.decode_time,
+            "latency": self.latency.to_dict(),
+        }
+
+
+class RequestEvent:
+    """An event reported to the callbacks of a RequestStats
+
+    Attributes
+    ------------
+    type: str
+        "request" when a response is received, "error" when a request fails
+        without one, "retry" or "throttled" before a failed request is
+        retried, "cache_hit" or "coalesced" when a response is served without
+        a request, or "fetch" when a request is needed
+    endpoint: str
+        the endpoint, e.g. "runs"
+    url: str
+        the requested URL
+    status: Optional[int]
+        the response status, for "request" events
+    elapsed: Optional[float]
+        seconds until the response headers were received, for "request"
+        events, or until the request failed, for "error" events
+    origin: Optional[str]
+        the method the request was made from, e.g. "Run.players", if origins
+        are tracked
+    error: Optional[Exception]
+        the exception, for "error", "retry" and "throttled" events
+    """
+
+    __slots__ = (
+        "type",
+        "endpoint",
+        "url",
+        "status",
+        "elapsed",
+        "origin",
+        "error",
+    )
+
+    def __init__(
+        self,
+        type,
+        url,
+        status=None,
+        elapsed=None,
+        origin=None,
+        error=None,
+    ):
+        self.type = type
+        self.endpoint = endpoint(url)
+        self.url = url
+        self.status = status
+        self.elapsed = elapsed
+        self.origin = origin
+        self.error = error
+
+    def __repr__(self):
+        return f"<RequestEvent type={self.type!r} url={self.url!r}>"
+
+
+class RequestStats:
+    """Records the requests made by a client
+
+    Network timings, statuses and sizes are collected through an aiohttp
+    ``TraceConfig`` on the connection pool's session; cache hits, coalesced
+    requests, retries and JSON decode times by the client itself.
+
+    Parameters
+    ------------
+    callbacks: Optional[Iterable[Callable[[RequestEvent], None]]]
+        functions called with every event, e.g. to export metrics
+    track_origins: Optional[bool]
+        whether to count the requests needed by each method of the client and
+        resources, e.g. to find methods making a request per item. This walks
+        the stack on every request. Defaults to False
+    """
+
+    def __init__(self, callbacks=(), track_origins=False):
+        self.callbacks = list(callbacks)
+        self.track_origins = track_origins
+        self.reset()
+
+    def reset(self):
+        """Clears all counters"""
+        self.endpoints = collections.defaultdict(EndpointStats)
+        self.origins = collections.Counter()
+        self.connections_created = 0
+        self.connections_reused = 0
+
+    def add_callback(self, callback):
+        """Calls callback with every subsequent RequestEvent"""
+        self.callbacks.append(callback)
+
+    def remove_callback(self, callback):
+        self.callbacks.remove(callback)
+
+    def to_dict(self):
+        """Returns a snapshot of the counters"""
+        return {
+            "endpoints": {
+                name: stats.to_dict()
+                for name, stats in sorted(self.endpoints.items())
+            },
+            "origins": dict(self.origins.most_common()),
+            "connections": {
+                "created": self.connections_created,
+                "reused": self.connections_reused,
+            },
+        }
+
+    def origin(self):
+        """Returns the client or resource method calling this function as
+        "Class.method", or None if there isn't one or origins aren't tracked"""
+        if not self.track_origins:
+            return None
+
+        frame = sys._getframe(1)
+        while frame is not None:
+            if frame.f_code.co_filename in _ORIGIN_MODULES:
+                owner = frame.f_locals.get("self", frame.f_locals.get("cls"))
+                if owner is not None:
+                    if not isinstance(owner, type):
+                        owner = type(owner)
+                    return f"{owner.__name__}.{frame.f_code.co_name}"
+            frame = frame.f_back
+        return None
+
+    def cache_hit(self, url, origin=None):
+        self.endpoints[endpoint(url)].cache_hits += 1
+        self._emit(RequestEvent("cache_hit", url, origin=origin))
+
+    def coalesced(self, url, origin=None):
+        self.endpoints[endpoint(url)].coalesced += 1
+        self._emit(RequestEvent("coalesced", url, origin=origin))
+
+    def fetch(self, url, origin=None):
+        if origin is not None:
+            self.origins[origin] += 1
+        self._emit(RequestEvent("fetch", url, origin=origin))
+
+    def retry(self, url, error):
+        stats = self.endpoints[endpoint(url)]
+        if getattr(error, "status", None) in (420, 429):
+            stats.throttled += 1
+            self._emit(RequestEvent("throttled", url, error=error))
+        else:
+            stats.retries += 1
+            self._emit(RequestEvent("retry", url, error=error))
+
+    def decoded(self, url, elapsed):
+        self.endpoints[endpoint(url)].decode_time += elapsed
+
+    def _emit(self, event):
+        for callback in self.callbacks:
+            callback(event)
+
+
+# Handlers of the pool's TraceConfig. The RequestStats of the client sending a
+# request is passed as its trace_request_ctx.
+
+
+async def _on_request_start(session, ctx, params):
+    ctx.start = time.monotonic()
+
+
+async def _on_request_end(session, ctx, params):
+    stats = ctx.trace_request_ctx
+    if isinstance(stats, RequestStats):
+        elapsed = time.monotonic() - ctx.start
+        endpoint_stats = stats.endpoints[endpoint(str(params.url))]
+        endpoint_stats.requests += 1
+        endpoint_stats.latency.add(elapsed)
+        if params.response.status >= 400:
+            endpoint_stats.errors += 1
+        stats._emit(
+            RequestEvent(
+                "request", str(params.url), params.response.status, elapsed
+            )
+        )
+
+
+async def _on_request_exception(session, ctx, params):
+    stats = ctx.trace_request_ctx
+    if isinstance(stats, RequestStats):
+        elapsed = time.monotonic() - ctx.start
+        endpoint_stats = stats.endpoints[endpoint(str(params.url))]
+        endpoint_stats.requests += 1
+        endpoint_stats.errors += 1
+        stats._emit(
+            RequestEvent(
+                "error",
+                str(params.url),
+                elapsed=elapsed,
+                error=params.exception,
+            )
+        )
+
+
+async def _on_response_chunk_received(session, ctx, params):
+    stats = ctx.trace_request_ctx
+    if isinstance(stats, RequestStats):
+        stats.endpoints[endpoint(str(params.url))].bytes += len(params.chunk)
+
+
+async def _on_connection_create_end(session, ctx, params):
+    if isinstance(ctx.trace_request_ctx, RequestStats):
+        ctx.trace_request_ctx.connections_created += 1
+
+
+async def _on_connection_reuseconn(session, ctx, params):
+    if isinstance(ctx.trace_request_ctx, RequestStats):
+        ctx.trace_request_ctx.connections_reused += 1
+
+
+def trace_config():
+    """Creates a TraceConfig recording requests into the RequestStats given as
+    their trace_request_ctx"""
+    config = aiohttp.TraceConfig()
+    config.on_request_start.append(_on_request_start)
+    config.on_request_end.append(_on_request_end)
+    config.on_request_exception.append(_on_request_exception)
+    config.on_response_chunk_received.append(_on_response_chunk_received)
+    config.on_connection_create_end.append(_on_connection_create_end)
+    config.on_connection_reuseconn.append(_on_connection_reuseconn)
+    return config
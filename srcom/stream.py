@@ -0,0 +1,76 @@
+import codecs
+import json
+import re
+
+_decoder = json.JSONDecoder()
+_separator = re.compile(r"[\s,]*")
+
+
+class ArrayStream:
+    """Incrementally extracts the items of a JSON array from a document
+
+    Chunks of the document are passed to :meth:`feed`, which returns the
+    items of the array under the first occurrence of ``key`` completed so far.
+    The items must be objects or arrays. Once the whole document has been fed,
+    :meth:`envelope` returns the rest of the document with the array emptied,
+    e.g. for its pagination links.
+    """
+
+    def __init__(self, key="data"):
+        self._start = re.compile(r'"{}"\s*:\s*\['.format(re.escape(key)))
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        # Text up to and including the opening bracket, once found
+        self._prefix = None
+        # Text after the closing bracket, once found
+        self._suffix = None
+
+    def feed(self, chunk, final=False):
+        """Adds a chunk of the document, returning the newly completed items
+
+        final must be True for the last chunk."""
+        self._buf += self._utf8.decode(chunk, final)
+
+        if self._suffix is not None:
+            self._suffix.append(self._buf)
+            self._buf = ""
+            return []
+
+        if self._prefix is None:
+            match = self._start.search(self._buf)
+            if match is None:
+                return []
+            self._prefix = self._buf[: match.end()]
+            self._buf = self._buf[match.end() :]
+
+        buf = self._buf
+        pos = 0
+        items = []
+        while True:
+            pos = _separator.match(buf, pos).end()
+            if pos == len(buf):
+                break
+
+            if buf[pos] == "]":
+                self._suffix = [buf[pos + 1 :]]
+                buf = ""
+                pos = 0
+                break
+
+            try:
+                item, pos = _decoder.raw_decode(buf, pos)
+            except ValueError:
+                # The item is incomplete; wait for the next chunk
+                if final:
+                    raise
+                break
+            items.append(item)
+
+        self._buf = buf[pos:]
+        return items
+
+    def envelope(self, loads=json.loads):
+        """Returns the document without the items of the array"""
+        if self._prefix is None:
+            return loads(self._buf)
+        return loads(self._prefix + "]" + "".join(self._suffix or ()))
@@ -0,0 +1,244 @@
+import asyncio
+import inspect
+import threading
+import types
+
+from .abcs import Resource
+from .client import Client
+
+
+class BackgroundLoop:
+    """An event loop running forever in a daemon thread
+
+    Coroutines can be run on it from any other thread with :meth:`run`, so
+    that every thread shares the resources bound to the loop, such as the
+    connection pool's session and the clients' rate limiters.
+    """
+
+    def __init__(self):
+        self.loop = None
+        self.thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Starts the loop's thread if it isn't running yet"""
+        with self._lock:
+            if self.thread is not None and self.thread.is_alive():
+                return
+
+            self.loop = asyncio.new_event_loop()
+            started = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(self.loop)
+                self.loop.call_soon(started.set)
+                self.loop.run_forever()
+
+            self.thread = threading.Thread(
+                target=run, name="srcom-event-loop", daemon=True
+            )
+            self.thread.start()
+            started.wait()
+
+    def run(self, coro):
+        """Runs a coroutine on the loop, blocking until it is done, and
+        returns its result"""
+        self.start()
+        if threading.current_thread() is self.thread:
+            coro.close()
+            raise RuntimeError(
+                "cannot block on the background loop from its own thread"
+            )
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def stop(self):
+        """Stops the loop and waits for its thread to exit"""
+        with self._lock:
+            if self.thread is None:
+                return
+            # Closes the sessions of connection pools used in the loop
+            asyncio.run_coroutine_threadsafe(
+                self.loop.shutdown_asyncgens(), self.loop
+            ).result()
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+            self.loop.close()
+            self.thread = None
+
+
+_default_loop = None
+
+
+def default_loop():
+    """Returns the loop shared by sync clients not given one, creating it if
+    needed"""
+    global _default_loop
+    if _default_loop is None:
+        _default_loop = BackgroundLoop()
+    return _default_loop
+
+
+def _wrap(value, loop):
+    if isinstance(value, (Client, Resource)):
+        return SyncProxy(value, loop)
+    if isinstance(value, list):
+        return [_wrap(v, loop) for v in value]
+    if isinstance(value, tuple):
+        return tuple(_wrap(v, loop) for v in value)
+    if isinstance(value, dict):
+        return {k: _wrap(v, loop) for k, v in value.items()}
+    return value
+
+
+async def _materialize(coro):
+    """Awaits a coroutine, turning a generator it returns into a list, so
+    that the resources it creates are created on the loop"""
+    result = await coro
+    if isinstance(result, types.GeneratorType):
+        result = list(result)
+    return result
+
+
+def _unwrap(value):
+    if isinstance(value, SyncProxy):
+        return value._wrapped
+    if isinstance(value, list):
+        return [_unwrap(v) for v in value]
+    if isinstance(value, tuple):
+        return tuple(_unwrap(v) for v in value)
+    return value
+
+
+class SyncProxy:
+    """Blocking view of a client or resource
+
+    Coroutine methods of the wrapped object block until they complete on the
+    background loop, and asynchronous iterators become ordinary iterators.
+    Generators returned by coroutines are consumed on the loop and returned
+    as lists, since creating resources isn't thread-safe.
+    Clients and resources in results are wrapped in turn; other attributes
+    are returned as they are.
+    """
+
+    __slots__ = ("_wrapped", "_loop")
+
+    def __init__(self, wrapped, loop):
+        self._wrapped = wrapped
+        self._loop = loop
+
+    def __getattr__(self, name):
+        attr = getattr(self._wrapped, name)
+
+        if inspect.iscoroutinefunction(attr):
+
+            def call(*args, **kwargs):
+                coro = attr(
+                    *_unwrap(args), **{k: _unwrap(v) for k, v in kwargs.items()}
+                )
+                return _wrap(self._loop.run(_materialize(coro)), self._loop)
+
+        elif inspect.isasyncgenfunction(attr):
+
+            def call(*args, **kwargs):
+                agen = attr(
+                    *_unwrap(args), **{k: _unwrap(v) for k, v in kwargs.items()}
+                )
+                return SyncIterator(agen, self._loop)
+
+        elif callable(attr) and not isinstance(attr, type):
+
+            def call(*args, **kwargs):
+                result = attr(
+                    *_unwrap(args), **{k: _unwrap(v) for k, v in kwargs.items()}
+                )
+                return _wrap(result, self._loop)
+
+        else:
+            return _wrap(attr, self._loop)
+
+        call.__name__ = name
+        call.__doc__ = attr.__doc__
+        return call
+
+    def __eq__(self, other):
+        return self._wrapped == _unwrap(other)
+
+    def __hash__(self):
+        return hash(self._wrapped)
+
+    def __repr__(self):
+        return f"<SyncProxy {self._wrapped!r}>"
+
+    def __dir__(self):
+        return dir(self._wrapped)
+
+
+class SyncIterator:
+    """Iterates over an asynchronous iterator from another thread, one item
+    at a time on the background loop"""
+
+    __slots__ = ("_agen", "_loop")
+
+    def __init__(self, agen, loop):
+        self._agen = agen
+        self._loop = loop
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            item = self._loop.run(self._agen.__anext__())
+        except StopAsyncIteration:
+            raise StopIteration from None
+        return _wrap(item, self._loop)
+
+    def close(self):
+        """Stops the iteration, running the iterator's cleanup"""
+        self._loop.run(self._agen.aclose())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+class SyncClient(SyncProxy):
+    """Blocking client for the speedrun.com API
+
+    Has the same methods as :class:`Client`, but they block until complete
+    instead of returning coroutines, and those iterating asynchronously
+    return ordinary iterators. Resources returned behave the same way.
+
+    Requests are run on one event loop in a background thread, shared by all
+    sync clients by default, so a client can be used from any number of
+    threads at once. Its connection pool, cache and rate limiter are shared
+    by all of them, and their requests overlap.
+
+    Accepts the same parameters as :class:`Client`, and:
+
+    Parameters
+    ------------
+    loop: Optional[BackgroundLoop]
+        the loop to run requests on. By default, a loop shared by all sync
+        clients is used
+    """
+
+    __slots__ = ()
+
+    def __init__(self, loop=None, **kwargs):
+        if loop is None:
+            loop = default_loop()
+
+        async def create():
+            # Created on the loop, which its rate limiter and session use
+            return Client(**kwargs)
+
+        super().__init__(loop.run(create()), loop)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
@@ -0,0 +1,121 @@
+from array import array
+from datetime import date
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+_EPOCH = date(1970, 1, 1).toordinal()
+
+
+def _date_ordinal(value):
+    """Converts a YYYY-MM-DD date to its ordinal, or 0 if not set"""
+    if not value:
+        return 0
+    return date(int(value[:4]), int(value[5:7]), int(value[8:10])).toordinal()
+
+
+class LeaderboardTable:
+    """A leaderboard stored as parallel columns, one entry per run
+
+    Built directly from the leaderboard JSON without creating :class:`Run`
+    objects, for analysing whole leaderboards at once.
+
+    Attributes
+    ------------
+    ids: List[str]
+        run IDs
+    places: array[int]
+        places on the leaderboard
+    times: array[float]
+        primary times in seconds
+    dates: array[int]
+        dates the runs were performed on as proleptic Gregorian ordinals (see
+        ``datetime.date.fromordinal``), or 0 if not set
+    players: List[Tuple[str, ...]]
+        IDs of the players of each run; guests are given by name
+    platforms: List[Optional[str]]
+        platform IDs
+    values: Dict[str, List[Optional[str]]]
+        value IDs of each run, by variable ID
+    """
+
+    def __init__(self):
+        self.ids = []
+        self.places = array("i")
+        self.times = array("d")
+        self.dates = array("l")
+        self.players = []
+        self.platforms = []
+        self.values = {}
+
+    @classmethod
+    def from_json(cls, board):
+        """Creates a table from the data of a leaderboard response"""
+        table = cls()
+        for entry in board["runs"]:
+            table.append(entry["run"], entry["place"])
+        return table
+
+    def append(self, run, place):
+        """Adds a run, given as its JSON data, to the table"""
+        index = len(self.ids)
+
+        self.ids.append(run["id"])
+        self.places.append(place)
+        self.times.append(run["times"]["primary_t"])
+        self.dates.append(_date_ordinal(run["date"]))
+        self.players.append(
+            tuple(p.get("id") or p.get("name") for p in run["players"])
+        )
+        self.platforms.append((run.get("system") or {}).get("platform"))
+
+        run_values = run.get("values") or {}
+        for var, column in self.values.items():
+            column.append(run_values.get(var))
+        for var, value in run_values.items():
+            if var not in self.values:
+                # Variable not seen in earlier runs
+                self.values[var] = [None] * index + [value]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def to_numpy(self):
+        """Returns the columns as a dict of NumPy arrays
+
+        Dates are converted to ``datetime64[D]``, with NaT where not set.
+        Requires NumPy to be installed.
+        """
+        if numpy is None:
+            raise ImportError("numpy is required for LeaderboardTable.to_numpy")
+
+        # Copied, as arrays exporting their buffer can't be appended to
+        places = numpy.frombuffer(self.places, self.places.typecode).copy()
+        times = numpy.frombuffer(self.times, self.times.typecode).copy()
+        dates = numpy.frombuffer(self.dates, self.dates.typecode)
+        dates = numpy.where(
+            dates == 0, numpy.iinfo("int64").min, dates - _EPOCH
+        )
+
+        return {
+            "ids": _object_array(self.ids),
+            "places": places,
+            "times": times,
+            "dates": dates.astype("int64").view("datetime64[D]"),
+            "players": _object_array(self.players),
+            "platforms": _object_array(self.platforms),
+            "values": {
+                var: _object_array(column)
+                for var, column in self.values.items()
+            },
+        }
+
+
+def _object_array(values):
+    # Filled one by one so that tuples aren't turned into a second dimension
+    result = numpy.empty(len(values), dtype=object)
+    for i, value in enumerate(values):
+        result[i] = value
+    return result
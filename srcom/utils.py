@@ -1,3 +1,12 @@
+import asyncio
+import json
+import os
+import time
+
+from .ratelimit import Priority
+from .stream import ArrayStream
+
+
 def get_uri(rel, links):
     return next(link["uri"] for link in links if link["rel"] == rel)
 
@@ -19,3 +28,199 @@ def safeget(dct, keys, default=None):
         except (KeyError, TypeError):
             return default
     return dct
+
+
+def get_next(resp):
+    """Returns the URI of the next page of a paginated response, or None"""
+    links = safeget(resp, ("pagination", "links"), ())
+    return next((link["uri"] for link in links if link["rel"] == "next"), None)
+
+
+def caller(http):
+    """Returns the method making a request through http, for requests sent
+    from other tasks. See RequestStats.origin"""
+    if http.stats is None:
+        return None
+    return http.stats.origin()
+
+
+async def paginate(
+    http, url, params=None, page_size=None, incremental=False, prefetch=True
+):
+    """Yields every item of a paginated endpoint, following its "next" links.
+
+    The following page is requested while the current one is being consumed,
+    so at most two pages are held in memory at a time. Pages are requested at
+    low priority so that interactive lookups are not held up by crawls.
+
+    If prefetch is False, the following page is only requested once every
+    item of the current one has been consumed, for walks that usually stop
+    early; a prefetched page can't be taken back once requested.
+
+    If incremental is True, items are instead parsed and yielded as each page
+    is received. As the next link comes after the items, pages are then not
+    prefetched.
+    """
+    params = dict(params or {})
+    if page_size is not None:
+        params["max"] = page_size
+
+    if incremental:
+        while url is not None:
+            parser = ArrayStream()
+            async for item in http.stream(url, params, parser, Priority.LOW):
+                yield item
+            url = get_next(parser.envelope(http.json_loads))
+            params = None
+        return
+
+    origin = caller(http)
+    pending = asyncio.ensure_future(
+        http._get(url, params, Priority.LOW, origin)
+    )
+    try:
+        while pending is not None:
+            resp = await pending
+            # The next URI already carries the query string of this request
+            next_uri = get_next(resp)
+            pending = None
+            if next_uri and prefetch:
+                pending = asyncio.ensure_future(
+                    http._get(next_uri, None, Priority.LOW, origin)
+                )
+            for item in resp["data"]:
+                yield item
+            if next_uri and not prefetch:
+                pending = asyncio.ensure_future(
+                    http._get(next_uri, None, Priority.LOW, origin)
+                )
+    finally:
+        if pending is not None:
+            pending.cancel()
+            if pending.done() and not pending.cancelled():
+                # Mark a failed prefetch as retrieved so it isn't logged
+                pending.exception()
+
+
+def iter_link(obj, rel, params=None, page_size=None, incremental=False):
+    uri = get_uri(rel, obj._links)
+    return paginate(obj._http, uri, params, page_size, incremental)
+
+
+async def build(cls, items, http):
+    """Yields a resource of type cls for the data of every item
+
+    The resources are created http.chunk_size at a time, giving control back
+    to the event loop between chunks so that other tasks aren't held up by
+    large responses"""
+    chunk_size = http.chunk_size
+    if chunk_size is None or len(items) <= chunk_size:
+        for item in items:
+            yield cls(item, http)
+        return
+
+    for start in range(0, len(items), chunk_size):
+        chunk = [cls(item, http) for item in items[start : start + chunk_size]]
+        for resource in chunk:
+            yield resource
+        await asyncio.sleep(0)
+
+
+def embed_param(embed):
+    """Formats resources to embed as the value of the embed query parameter"""
+    if isinstance(embed, str):
+        return embed
+    return ",".join(embed)
+
+
+def embedded(value):
+    """Returns the data of an embedded resource, or None if not embedded"""
+    if isinstance(value, dict) and "data" in value:
+        return value["data"]
+    return None
+
+
+def player_ref(player):
+    """Builds the reference the API uses for a player from its embedded data"""
+    uri = get_uri("self", player["links"])
+    if "id" in player:
+        return {"rel": "user", "id": player["id"], "uri": uri}
+    return {"rel": "guest", "name": player["name"], "uri": uri}
+
+
+def run_timestamp(run, orderby):
+    """Returns the timestamp that runs are ordered by for the given value of
+    the orderby parameter ("submitted" or "verify-date") from a run's data"""
+    if orderby == "submitted":
+        return run["submitted"]
+    return run["status"].get("verify-date")
+
+
+async def gather_unique(func, keys, concurrency=10):
+    """Awaits func once for every distinct key, running at most concurrency
+    calls at a time, and returns the results in the order of keys"""
+    unique = list(dict.fromkeys(keys))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call(key):
+        async with semaphore:
+            return await func(key)
+
+    results = await asyncio.gather(*(call(key) for key in unique))
+    lookup = dict(zip(unique, results))
+    return [lookup[key] for key in keys]
+
+
+async def fetch_all(http, uris, concurrency=10, priority=Priority.NORMAL):
+    """Fetches the data of several URIs concurrently. Each distinct URI is only
+    requested once"""
+
+    origin = caller(http)
+
+    async def fetch(uri):
+        return (await http._get(uri, None, priority, origin))["data"]
+
+    return await gather_unique(fetch, uris, concurrency)
+
+
+class lazy:
+    """Decorator turning a method into an attribute computed on first access
+
+    The value is stored in the slot named after the attribute with a leading
+    underscore, which the class must declare in its __slots__.
+    """
+
+    def __init__(self, func):
+        self.func = func
+        self.slot = "_" + func.__name__
+        self.__doc__ = func.__doc__
+
+    def __get__(self, obj, cls=None):
+        if obj is None:
+            return self
+
+        try:
+            return getattr(obj, self.slot)
+        except AttributeError:
+            value = self.func(obj)
+            setattr(obj, self.slot, value)
+            return value
+
+
+def write_json(path, value):
+    """Writes a value to a JSON file through a temporary file, so that a crash
+    can't leave it corrupt"""
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(value, f)
+    os.replace(tmp, path)
+
+
+async def poll_every(poll, interval):
+    """Awaits poll every interval seconds, measured from the start of each
+    call, yielding the items of the lists it returns"""
+    while True:
+        start = time.monotonic()
+        for item in await poll():
+            yield item
+        await asyncio.sleep(max(0, interval - (time.monotonic() - start)))
@@ -0,0 +1,112 @@
+import asyncio
+
+from . import utils
+from .cache import make_key
+from .dataclasses import Category, Game
+
+
+def leaderboard_request(
+    resource, top=None, category=None, params=None, embed=None
+):
+    """Returns the URL and parameters of the request made by the leaderboard()
+    method of a Game or Category called with the given arguments"""
+    params = dict(params or {})
+    if top is not None:
+        params["top"] = top
+    if embed is not None:
+        params["embed"] = utils.embed_param(embed)
+
+    if isinstance(resource, Game):
+        if isinstance(category, Category):
+            category = category.id
+        url = resource._leaderboard_uri(category)
+    else:
+        url = utils.get_uri("leaderboard", resource._links)
+    return url, params
+
+
+class LeaderboardWarmer:
+    """Keeps a set of leaderboards fresh in a client's cache
+
+    Every ``interval`` seconds, each leaderboard added is fetched again at low
+    priority, so that :meth:`Game.leaderboard` and
+    :meth:`Category.leaderboard` calls for them are always served from the
+    cache. The interval should be shorter than the cache's TTL for
+    leaderboards.
+
+    Parameters
+    ------------
+    client: Client
+        the client whose cache is kept warm; it must have a cache
+    interval: Optional[float]
+        seconds between refreshes. Defaults to 60
+    """
+
+    def __init__(self, client, interval=60):
+        if client.http.cache is None:
+            raise ValueError("the client has no cache to keep warm")
+
+        self.client = client
+        self.interval = interval
+        # (url, params) of each leaderboard, by cache key
+        self.requests = {}
+        self._task = None
+
+    def add(self, resource, top=None, category=None, params=None, embed=None):
+        """Starts keeping a leaderboard warm
+
+        resource is the Game or Category whose leaderboard() is called; the
+        other arguments are those it is called with. Returns a key to pass to
+        :meth:`remove`.
+        """
+        url, params = leaderboard_request(
+            resource, top, category, params, embed
+        )
+        key = make_key(url, params)
+        self.requests[key] = (url, params)
+        return key
+
+    def remove(self, key):
+        """Stops keeping a leaderboard warm"""
+        self.requests.pop(key, None)
+
+    async def refresh(self):
+        """|coro|
+
+        Fetches every leaderboard once
+
+        Returns
+        ---------
+        List[Exception]
+            The errors of the leaderboards that couldn't be fetched.
+        """
+        http = self.client.http
+        # The requests are shared with concurrent callers, so stopping the
+        # warmer mustn't cancel them
+        results = await asyncio.gather(
+            *(
+                asyncio.shield(http.refresh(url, params))
+                for url, params in self.requests.values()
+            ),
+            return_exceptions=True,
+        )
+        return [r for r in results if isinstance(r, Exception)]
+
+    def start(self):
+        """Refreshes the leaderboards in the background every interval
+        seconds until :meth:`stop` is called"""
+        if self._task is not None:
+            return
+
+        async def run():
+            while True:
+                await self.refresh()
+                await asyncio.sleep(self.interval)
+
+        self._task = asyncio.ensure_future(run())
+
+    def stop(self):
+        """Stops refreshing the leaderboards in the background"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
@@ -0,0 +1,34 @@
+import asyncio
+
+import srcom
+from benchmarks.server import start
+
+
+def run(coro):
+    """Runs a coroutine on a new event loop, shutting it down afterwards"""
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
+
+
+def run_with_server(test, client_kwargs=None, **kwargs):
+    """Runs test(server, client) against a stand-in server started with the
+    given arguments, and a client sending requests to it"""
+
+    async def main():
+        server, runner = await start(port=0, **kwargs)
+        port = runner.addresses[0][1]
+        client = srcom.Client(
+            base_url=f"http://127.0.0.1:{port}/api/v1/",
+            **dict({"rate_limit": None}, **(client_kwargs or {})),
+        )
+        try:
+            return await test(server, client)
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+    return run(main())
@@ -0,0 +1,93 @@
+import asyncio
+import sqlite3
+import time
+
+import srcom
+from srcom.cache import MemoryCache, SQLiteCache
+
+from .conftest import run, run_with_server
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(maxsize=2)
+    expires = time.time() + 60
+    cache.set("a", 1, expires)
+    cache.set("b", 2, expires)
+    cache.get("a")
+    cache.set("c", 3, expires)
+    assert (cache.get("a"), cache.get("b")) == ((1, expires), None)
+
+
+def test_ttl_by_endpoint():
+    cache = srcom.ResponseCache(ttls={"runs": 0})
+    base = "https://www.speedrun.com/api/v1/"
+    cache.set(base + "games/abc", None, {"data": 1})
+    cache.set(base + "runs", {"game": "abc"}, {"data": 2})
+    assert cache.get(base + "games/abc") == {"data": 1}
+    assert cache.get(base + "runs", {"game": "abc"}) is None
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "cache.db")
+    url = "https://www.speedrun.com/api/v1/users/abc"
+    cache = srcom.ResponseCache(path=path)
+    cache.set(url, None, {"data": 1})
+    cache.close()
+
+    cache = srcom.ResponseCache(path=path)
+    assert cache.get(url) == {"data": 1}
+    assert cache.stats()["disk_hits"] == 1
+    cache.close()
+
+
+def test_client_served_from_cache():
+    async def test(server, client):
+        first = await client.http.get("users/user1")
+        second = await client.http.get("users/user1")
+        return first == second, server.requests
+
+    cache = srcom.ResponseCache()
+    assert run_with_server(test, {"cache": cache}, sizes=[10]) == (True, 1)
+    assert cache.stats()["hits"] == 1
+
+
+def test_disk_writes_committed_once_per_iteration(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = SQLiteCache(path)
+    other = sqlite3.connect(path)
+
+    def count():
+        return other.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    async def main():
+        for i in range(10):
+            cache.set(f"k{i}", {"data": i}, time.time() + 60)
+        before = count()
+        await asyncio.sleep(0)
+        return before, count()
+
+    assert run(main()) == (0, 10)
+    other.close()
+    cache.close()
+
+
+def test_expired_rows_pruned(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = SQLiteCache(path, prune_every=3)
+    cache.set("old", {"data": 0}, time.time() - 1)
+    cache.set("new", {"data": 1}, time.time() + 60)
+    rows = cache._db.execute("SELECT key FROM responses").fetchall()
+    assert sorted(rows) == [("new",), ("old",)]
+
+    # Every prune_every writes, and when opened
+    cache.set("old2", {"data": 2}, time.time() - 1)
+    assert cache._db.execute("SELECT key FROM responses").fetchall() == [
+        ("new",)
+    ]
+    cache.set("old3", {"data": 3}, time.time() - 1)
+    cache.close()
+    cache = SQLiteCache(path)
+    assert cache._db.execute("SELECT key FROM responses").fetchall() == [
+        ("new",)
+    ]
+    cache.close()
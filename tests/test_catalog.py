@@ -0,0 +1,86 @@
+import asyncio
+import logging
+
+import srcom
+from srcom.catalog import CatalogEntry
+
+from .conftest import run, run_with_server
+
+
+def _catalog(*names):
+    catalog = srcom.GameCatalog(None)
+    for i, name in enumerate(names):
+        catalog._add(CatalogEntry(f"g{i}", name, None, None, f"abbr{i}"))
+    return catalog
+
+
+def test_build_and_refresh(tmp_path):
+    path = str(tmp_path / "games.json")
+
+    async def test(server, client):
+        catalog = srcom.GameCatalog(client, path)
+        await catalog.build(page_size=10)
+        built = len(catalog), server.requests
+
+        server.sizes.update((31, 32))
+        added = await catalog.refresh(page_size=10)
+        return built, added, len(catalog)
+
+    built, added, size = run_with_server(test, sizes=range(1, 31))
+    assert built == (30, 3)
+    assert (added, size) == (2, 32)
+    # Loaded from the file it was saved to
+    assert len(srcom.GameCatalog(None, path)) == 32
+
+
+def test_search():
+    catalog = _catalog(
+        "Super Mario Odyssey", "Super Mario 64", "Pokémon Red", "Celeste"
+    )
+    assert [e.name for e in catalog.search("super mario")] == [
+        "Super Mario 64",
+        "Super Mario Odyssey",
+    ]
+    assert catalog.find("abbr3").name == "Celeste"
+    assert catalog.find("pokemon red").name == "Pokémon Red"
+    assert catalog.find("mario odysey").name == "Super Mario Odyssey"
+    assert catalog.find("zzzz") is None
+
+
+def test_search_japanese_names():
+    catalog = srcom.GameCatalog(None)
+    catalog._add(
+        CatalogEntry(
+            "g", "Super Mario Bros.", "スーパーマリオブラザーズ", None, "smb"
+        )
+    )
+    assert catalog.find("スーパーマリオ").id == "g"
+    assert catalog.find("マリオブラザーズ").id == "g"
+
+
+def test_get_game_falls_back_to_api():
+    async def test(server, client):
+        catalog = srcom.GameCatalog(client)
+        game = await catalog.get_game("Benchmark Game 10")
+        return game.id, "game10" in catalog
+
+    assert run_with_server(test, sizes=[10]) == ("game10", True)
+
+
+def test_failed_refresh_logged(caplog):
+    async def main():
+        catalog = srcom.GameCatalog(None)
+
+        async def refresh():
+            raise RuntimeError("unavailable")
+
+        catalog.refresh = refresh
+        catalog.start(interval=0.01)
+        await asyncio.sleep(0.05)
+        catalog.stop()
+        return catalog.last_error
+
+    with caplog.at_level(logging.ERROR, logger="srcom.catalog"):
+        error = run(main())
+    assert isinstance(error, RuntimeError)
+    assert "Refreshing the game catalog failed" in caplog.text
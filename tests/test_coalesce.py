@@ -0,0 +1,38 @@
+import asyncio
+
+from .conftest import run_with_server
+
+
+def test_concurrent_requests_coalesced():
+    async def test(server, client):
+        responses = await asyncio.gather(
+            *(client.http.get("users/user1") for _ in range(5))
+        )
+        return responses, server.requests
+
+    responses, requests = run_with_server(test, sizes=[10], latency=0.05)
+    assert requests == 1
+    assert all(resp == responses[0] for resp in responses)
+
+
+def test_cancelled_caller_doesnt_cancel_others():
+    async def test(server, client):
+        first = asyncio.ensure_future(client.http.get("users/user1"))
+        second = asyncio.ensure_future(client.http.get("users/user1"))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        resp = await second
+        return first.cancelled(), resp["data"]["id"], server.requests
+
+    result = run_with_server(test, sizes=[10], latency=0.05)
+    assert result == (True, "user1", 1)
+
+
+def test_coalescing_disabled():
+    async def test(server, client):
+        await asyncio.gather(
+            *(client.http.get("users/user1") for _ in range(3))
+        )
+        return server.requests
+
+    assert run_with_server(test, {"coalesce": False}, sizes=[10]) == 3
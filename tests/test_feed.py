@@ -0,0 +1,88 @@
+import srcom
+from benchmarks.server import run
+from srcom import utils
+
+from .conftest import run_with_server
+
+
+def test_watcher_polls_one_page():
+    async def test(server, client):
+        watcher = srcom.RunWatcher(
+            client, ["game1000"], statuses=["verified"], page_size=20
+        )
+        await watcher.poll()
+        first = server.requests
+        events = await watcher.poll()
+        return first, server.requests - first, events
+
+    first, second, events = run_with_server(test, sizes=[1000])
+    assert (first, second, events) == (1, 1, [])
+
+
+def test_paginate_without_prefetch_stops_early():
+    async def test(server, client):
+        http = client.http
+        pages = utils.paginate(
+            http, http.BASE + "runs", {"game": "game1000"}, 50, prefetch=False
+        )
+        try:
+            async for run in pages:
+                break
+        finally:
+            await pages.aclose()
+        return server.requests
+
+    assert run_with_server(test, sizes=[1000]) == 1
+
+
+def _run(id, status, submitted, verified=None):
+    data = run("http://127.0.0.1/api/v1/", 10, 0)
+    data["id"] = id
+    data["submitted"] = submitted
+    data["status"] = {"status": status}
+    if verified is not None:
+        data["status"].update(examiner="user0", **{"verify-date": verified})
+    return data
+
+
+def test_watcher_reports_changes():
+    async def test(server, client):
+        watcher = srcom.RunWatcher(client, ["game10"])
+        pending = _run("a", "new", "2030-01-01T00:00:00Z")
+        server.add_run(pending)
+        server.add_run(_run("b", "rejected", "2030-01-01T00:00:00Z"))
+        first = await watcher.poll()
+
+        server.add_run(_run("c", "new", "2030-01-02T00:00:00Z"))
+        server.add_run(
+            _run(
+                "d", "verified", "2029-12-01T00:00:00Z", "2030-01-03T00:00:00Z"
+            )
+        )
+        # A run submitted before the first poll is rejected since
+        pending["status"] = {"status": "rejected"}
+        server.add_run(_run("e", "rejected", "2030-01-02T00:00:00Z"))
+        second = await watcher.poll()
+        third = await watcher.poll()
+        return first, [(e.type, e.run.id) for e in second], third
+
+    first, second, third = run_with_server(test, sizes=[10])
+    assert first == []
+    assert second == [
+        ("new", "c"),
+        ("verified", "d"),
+        ("rejected", "a"),
+        ("rejected", "e"),
+    ]
+    assert third == []
+
+
+def test_watcher_backfill():
+    async def test(server, client):
+        server.add_run(_run("a", "new", "2030-01-01T00:00:00Z"))
+        watcher = srcom.RunWatcher(
+            client, ["game10"], statuses=["new"], backfill=True
+        )
+        return [(e.type, e.run.id) for e in await watcher.poll()]
+
+    assert run_with_server(test, sizes=[10]) == [("new", "a")]
@@ -0,0 +1,48 @@
+import gc
+from types import SimpleNamespace
+
+from benchmarks.server import run
+from srcom import Run
+from srcom.identity import IdentityMap
+
+from .conftest import run_with_server
+
+BASE = "http://127.0.0.1/api/v1/"
+
+
+def test_reused_run_recomputes_lazy_attributes():
+    http = SimpleNamespace(identity_map=IdentityMap())
+    data = run(BASE, 10, 1)
+    first = Run(data, http)
+    assert first.values == {"var10": "v1"}
+
+    data = dict(data, values={"var10": "v2"})
+    second = Run(data, http)
+    assert second is first
+    assert second.values == {"var10": "v2"}
+
+
+def test_new_run_has_no_lazy_attributes():
+    run_ = Run(run(BASE, 10, 1), SimpleNamespace(identity_map=None))
+    assert all(not hasattr(run_, slot) for slot in Run._lazy_slots)
+
+
+def test_identity_map_keeps_recent_resources():
+    identity_map = IdentityMap(maxsize=1)
+    http = SimpleNamespace(identity_map=identity_map)
+    Run(run(BASE, 10, 1), http)
+    Run(run(BASE, 10, 2), http)
+    gc.collect()
+    # Only the most recent run is kept alive without other references
+    assert identity_map.get(Run, "run10x1") is None
+    assert identity_map.get(Run, "run10x2") is not None
+
+
+def test_client_returns_same_resources():
+    async def test(server, client):
+        game = await client.get_game(id="game10")
+        first = list(await game.leaderboard(3))
+        second = list(await game.leaderboard(3))
+        return all(a is b for a, b in zip(first, second))
+
+    assert run_with_server(test, {"identity_map": True}, sizes=[10])
@@ -0,0 +1,34 @@
+import srcom
+
+from .conftest import run_with_server
+
+
+def test_all_leaderboards():
+    async def test(server, client):
+        game = await client.get_game(id="game10")
+        requests = server.requests
+        boards = await game.all_leaderboards(top=3)
+        return boards, server.requests - requests
+
+    boards, requests = run_with_server(test, sizes=[10])
+    # One request for the categories, levels and variables, then one per
+    # value of the subcategory variable
+    assert requests == 3
+    assert list(boards) == [
+        ("cat10", None, (("var10", "v1"),)),
+        ("cat10", None, (("var10", "v2"),)),
+    ]
+    for runs in boards.values():
+        assert [run.place for run in runs] == [1, 2, 3]
+        assert all(isinstance(run, srcom.Run) for run in runs)
+
+
+def test_board_structure_fetched_once():
+    async def test(server, client):
+        game = await client.get_game(id="game10")
+        await game.all_leaderboards(top=1)
+        requests = server.requests
+        await game.all_leaderboards(top=1)
+        return server.requests - requests
+
+    assert run_with_server(test, sizes=[10]) == 2
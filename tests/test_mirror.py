@@ -0,0 +1,39 @@
+import srcom
+from benchmarks.server import run
+
+from .conftest import run_with_server
+
+
+def _run(id, status, submitted):
+    data = run("http://127.0.0.1/api/v1/", 10, 0)
+    data["id"] = id
+    data["submitted"] = submitted
+    data["status"] = {"status": status}
+    return data
+
+
+def test_incremental_sync(tmp_path):
+    mirror = srcom.Mirror(str(tmp_path / "mirror.db"))
+
+    async def test(server, client):
+        rejected = _run("a", "new", "2030-01-01T00:00:00Z")
+        server.add_run(rejected)
+        server.add_run(_run("b", "new", "2030-01-01T00:00:00Z"))
+        first = await mirror.sync(client, "game10")
+
+        # Submitted at the same time as the runs already synced
+        server.add_run(_run("c", "new", "2030-01-01T00:00:00Z"))
+        rejected["status"] = {"status": "rejected"}
+        server.remove_run("b")
+        second = await mirror.sync(client, "game10")
+        third = await mirror.sync(client, "game10")
+        return first, second, third
+
+    counts = run_with_server(test, sizes=[10])
+    assert counts == ({"game10": 12}, {"game10": 3}, {"game10": 0})
+
+    statuses = dict(mirror._db.execute("SELECT id, status FROM runs"))
+    assert (statuses["a"], statuses["c"]) == ("rejected", "new")
+    assert "b" not in statuses
+    assert len(statuses) == 12
+    mirror.close()
@@ -0,0 +1,43 @@
+import concurrent.futures
+import json
+
+from srcom.http import _decode_stream
+
+from .conftest import run_with_server
+
+
+def test_thread_decodes_leaderboard_runs_one_at_a_time():
+    board = {"data": {"game": "g", "runs": [{"place": 1}, {"place": 2}]}}
+    decoded = []
+
+    def loads(body):
+        decoded.append(body)
+        return json.loads(body)
+
+    assert _decode_stream(loads, json.dumps(board).encode()) == board
+    # Only the envelope was given to loads
+    assert decoded == ['{"data": {"game": "g", "runs": []}}']
+
+
+def test_thread_decodes_nested_arrays_whole():
+    game = {"data": {"id": "g", "levels": {"data": [{"runs": [1]}]}}}
+    assert _decode_stream(json.loads, json.dumps(game).encode()) == game
+
+
+def test_offloaded_responses():
+    async def test(server, client):
+        responses = [
+            await client.http.get("leaderboards/game1000/category/cat1000"),
+            await client.http.get("runs", {"game": "game1000"}),
+            await client.http.get("games/game1000"),
+        ]
+        # Links point to the server's port, which differs between runs
+        return json.loads(
+            json.dumps(responses).replace(client.http.BASE, "http://api/")
+        )
+
+    with concurrent.futures.ThreadPoolExecutor(1) as executor:
+        kwargs = {"executor": executor, "offload_size": 0}
+        offloaded = run_with_server(test, kwargs, sizes=[1000])
+    assert offloaded == run_with_server(test, sizes=[1000])
+    assert len(offloaded[0]["data"]["runs"]) == 1000
@@ -0,0 +1,95 @@
+from datetime import date
+
+import pytest
+
+import srcom
+
+
+def make_run(id, day, time, players, status="verified", values=None):
+    return {
+        "id": id,
+        "category": "cat",
+        "level": None,
+        "values": values or {},
+        "date": f"2020-01-{day:02d}",
+        "status": {"status": status},
+        "times": {"primary_t": time},
+        "players": [{"rel": "user", "id": p} for p in players],
+    }
+
+
+RUNS = [
+    make_run("a1", 1, 100.0, ["a"]),
+    make_run("b1", 2, 90.0, ["b"]),
+    make_run("a2", 3, 95.0, ["a"]),
+    make_run("c1", 4, 120.0, ["c"], status="rejected"),
+    make_run("b2", 5, 91.0, ["b"]),
+    make_run("a3", 6, 80.0, ["a"]),
+    make_run("d1", 7, 85.0, ["e", "d"]),
+]
+
+BOARD = ("cat", None, ())
+
+
+def progression():
+    progression = srcom.Progression()
+    progression.extend(RUNS)
+    return progression
+
+
+def test_world_records():
+    records = progression().world_records(BOARD)
+    assert [entry.run for entry in records] == ["a1", "b1", "a3"]
+    assert records[-1].date == date(2020, 1, 6)
+
+
+def test_personal_bests():
+    progression_ = progression()
+    assert [e.run for e in progression_.personal_bests(BOARD, "a")] == [
+        "a1",
+        "a2",
+        "a3",
+    ]
+    # Slower runs are not PBs
+    assert [e.run for e in progression_.personal_bests(BOARD, "b")] == ["b1"]
+    # Teams are matched regardless of player order
+    assert [e.run for e in progression_.personal_bests(BOARD, ["d", "e"])] == [
+        "d1"
+    ]
+    # Rejected runs are ignored
+    assert progression_.personal_bests(BOARD, "c") == []
+
+
+def test_leaderboard_at_date():
+    progression_ = progression()
+    assert [e.run for e in progression_.leaderboard(BOARD)] == [
+        "a3",
+        "d1",
+        "b1",
+    ]
+    assert [
+        e.run for e in progression_.leaderboard(BOARD, date(2020, 1, 3))
+    ] == ["b1", "a2"]
+
+
+def test_subcategories_split_boards():
+    progression_ = srcom.Progression(subcategories=["var"])
+    progression_.add(make_run("x", 1, 10.0, ["a"], values={"var": "1"}))
+    progression_.add(
+        make_run("y", 2, 20.0, ["a"], values={"var": "2", "other": "3"})
+    )
+    assert sorted(progression_.boards) == [
+        ("cat", None, (("var", "1"),)),
+        ("cat", None, (("var", "2"),)),
+    ]
+
+
+def test_runs_out_of_order():
+    progression_ = progression()
+    with pytest.raises(ValueError):
+        progression_.add(make_run("z", 1, 1.0, ["z"]))
+
+
+def test_unknown_board():
+    with pytest.raises(KeyError):
+        progression().world_records(("other", None, ()))
@@ -0,0 +1,117 @@
+import asyncio
+import time
+
+import pytest
+
+from srcom.ratelimit import (
+    Priority,
+    RateLimiter,
+    SharedTokenBucket,
+    TokenBucket,
+    fcntl,
+)
+
+from .conftest import run, run_with_server
+
+
+def test_token_bucket_burst_then_wait():
+    bucket = TokenBucket(rate=10, per=1.0, burst=3)
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    # Tokens are added at rate - burst per second
+    wait = bucket.acquire()
+    assert 0 < wait <= 1 / 7
+
+
+def test_client_stays_within_rate():
+    async def test(server, client):
+        await asyncio.gather(
+            *(client.http.get(f"users/user{i}") for i in range(20))
+        )
+        return server.requests, server.throttled
+
+    kwargs = {"rate_limit": 10, "rate_period": 1.0}
+    requests, throttled = run_with_server(
+        test, kwargs, sizes=[10], rate=10, period=1.0
+    )
+    assert (requests, throttled) == (20, 0)
+
+
+def test_token_bucket_pause():
+    bucket = TokenBucket(rate=1000, per=1.0)
+    bucket.pause(0.5)
+    assert 0.4 < bucket.acquire() <= 0.5
+
+
+def test_rate_limiter_priority_order():
+    async def main():
+        limiter = RateLimiter(rate=1, per=0.05, burst=1)
+        await limiter.acquire()
+        limiter.release()
+
+        order = []
+
+        async def request(name, priority):
+            await limiter.acquire(priority)
+            order.append(name)
+            limiter.release()
+
+        await asyncio.gather(
+            request("low", Priority.LOW),
+            request("normal", Priority.NORMAL),
+            request("high", Priority.HIGH),
+        )
+        return order
+
+    assert run(main()) == ["high", "normal", "low"]
+
+
+def test_rate_limiter_max_concurrency():
+    async def main():
+        limiter = RateLimiter(rate=float("inf"), max_concurrency=2)
+        in_flight = peak = 0
+
+        async def request():
+            nonlocal in_flight, peak
+            await limiter.acquire()
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            limiter.release()
+
+        await asyncio.gather(*(request() for _ in range(6)))
+        return peak
+
+    assert run(main()) == 2
+
+
+def test_rate_limiter_rate():
+    async def main():
+        limiter = RateLimiter(rate=20, per=1.0, burst=1)
+        start = time.monotonic()
+        for _ in range(5):
+            await limiter.acquire()
+            limiter.release()
+        return time.monotonic() - start
+
+    # The first token is available at once, then one every 0.05 seconds
+    assert 0.18 < run(main()) < 0.5
+
+
+@pytest.mark.skipif(fcntl is None, reason="requires fcntl")
+def test_shared_bucket_budget(tmp_path):
+    path = str(tmp_path / "bucket")
+    first = SharedTokenBucket(path, rate=10, per=1.0, burst=3)
+    second = SharedTokenBucket(path, rate=10, per=1.0, burst=3)
+    assert first.acquire() == 0.0
+    assert second.acquire() == 0.0
+    assert first.acquire() == 0.0
+    # The three tokens are shared
+    assert second.acquire() > 0
+
+
+@pytest.mark.skipif(fcntl is None, reason="requires fcntl")
+def test_shared_bucket_pause(tmp_path):
+    path = str(tmp_path / "bucket")
+    SharedTokenBucket(path, rate=1000, per=1.0).pause(0.5)
+    assert 0.4 < SharedTokenBucket(path, rate=1000, per=1.0).acquire() <= 0.5
@@ -0,0 +1,58 @@
+import asyncio
+
+import aiohttp
+import pytest
+
+import srcom
+from srcom.errors import HTTPException, NotFound, Throttled
+
+from .conftest import run_with_server
+
+
+def test_should_retry():
+    policy = srcom.RetryPolicy(max_retries=2)
+    assert policy.should_retry(Throttled(420), 0)
+    assert policy.should_retry(HTTPException(503), 1)
+    assert policy.should_retry(asyncio.TimeoutError(), 0)
+    assert policy.should_retry(aiohttp.ClientConnectionError(), 0)
+    assert not policy.should_retry(Throttled(420), 2)
+    assert not policy.should_retry(NotFound(404), 0)
+    assert not policy.should_retry(ValueError(), 0)
+
+
+def test_delay():
+    policy = srcom.RetryPolicy(backoff=1.0, max_backoff=3.0)
+    assert policy.delay(Throttled(420, retry_after=7.5), 0) == 7.5
+    for attempt in range(5):
+        assert 0 <= policy.delay(HTTPException(500), attempt) <= 3.0
+
+
+def test_hedge_delay():
+    policy = srcom.RetryPolicy(hedge_percentile=0.9, hedge_min_samples=10)
+    for latency in range(9):
+        policy.latencies.add("runs", latency)
+    assert policy.hedge_delay("runs") is None
+    policy.latencies.add("runs", 9)
+    assert policy.hedge_delay("runs") == 9
+    assert srcom.RetryPolicy().hedge_delay("runs") is None
+
+
+def test_throttled_requests_are_retried():
+    async def test(server, client):
+        users = await asyncio.gather(
+            *(client.http.get(f"users/user{i}") for i in range(4))
+        )
+        return server, [user["data"]["id"] for user in users]
+
+    server, ids = run_with_server(test, rate=2, period=0.2)
+    assert ids == [f"user{i}" for i in range(4)]
+    assert server.throttled > 0
+
+
+def test_not_found_is_not_retried():
+    async def test(server, client):
+        with pytest.raises(NotFound):
+            await client.http.get("games/game12345")
+        return server.requests
+
+    assert run_with_server(test, sizes=[10]) == 1
@@ -0,0 +1,65 @@
+import pickle
+from types import SimpleNamespace
+
+import pytest
+
+from benchmarks.server import game, run
+from srcom import Game, Resource, Run, serialize
+
+BASE = "http://127.0.0.1/api/v1/"
+
+
+def _client():
+    return SimpleNamespace(http=SimpleNamespace(identity_map=None))
+
+
+def test_dict_round_trip():
+    client = _client()
+    original = Run(run(BASE, 10, 1), client.http)
+    copy = Resource.from_dict(original.to_dict(), client)
+    assert type(copy) is Run
+    assert (copy.id, copy.time, copy._http) == (
+        original.id,
+        original.time,
+        client.http,
+    )
+
+
+def test_from_dict_checks_type():
+    client = _client()
+    dct = Run(run(BASE, 10, 1), client.http).to_dict()
+    with pytest.raises(TypeError):
+        Game.from_dict(dct, client)
+
+
+def test_dumps_and_loads():
+    client = _client()
+    resources = [Game(game(BASE, 10), client.http)] + [
+        Run(run(BASE, 10, i), client.http) for i in range(3)
+    ]
+    loaded = serialize.loads(serialize.dumps(resources), client)
+    assert [type(r) for r in loaded] == [Game, Run, Run, Run]
+    assert [r._data for r in loaded] == [r._data for r in resources]
+
+    single = serialize.loads(serialize.dumps(resources[1]), client)
+    assert single._data == resources[1]._data
+
+
+def test_dumps_with_msgpack():
+    pytest.importorskip("msgpack")
+    client = _client()
+    data = serialize.dumps(Run(run(BASE, 10, 1), client.http))
+    assert data[:1] == b"M"
+    assert serialize.loads(data, client).id == "run10x1"
+
+
+def test_loads_rejects_other_data():
+    with pytest.raises(ValueError):
+        serialize.loads(b"{}", _client())
+
+
+def test_pickle():
+    original = Run(run(BASE, 10, 1), _client().http)
+    copy = pickle.loads(pickle.dumps(original))
+    assert copy._data == original._data
+    assert copy._http is not None
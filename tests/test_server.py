@@ -0,0 +1,70 @@
+import pytest
+
+from srcom import utils
+from srcom.errors import NotFound
+
+from .conftest import run_with_server
+
+
+def test_runs_filtered_by_category():
+    async def test(server, client):
+        resp = await client.http.get("runs", {"category": "cat1000"})
+        return {run["game"] for run in resp["data"]}
+
+    assert run_with_server(test, sizes=[10, 1000]) == {"game1000"}
+
+
+def test_runs_unknown_game():
+    async def test(server, client):
+        with pytest.raises(NotFound):
+            await client.http.get("runs", {"game": "game5"})
+
+    run_with_server(test, sizes=[10])
+
+
+def test_runs_filtered_by_status():
+    async def test(server, client):
+        resp = await client.http.get(
+            "runs", {"game": "game10", "status": "new"}
+        )
+        return resp["data"]
+
+    assert run_with_server(test, sizes=[10]) == []
+
+
+def test_runs_ordered_by_date():
+    async def test(server, client):
+        http = client.http
+        params = {"game": "game1000", "orderby": "date", "direction": "desc"}
+        pages = utils.paginate(http, http.BASE + "runs", params, 200)
+        return [run["date"] async for run in pages]
+
+    dates = run_with_server(test, sizes=[1000])
+    assert len(dates) == 1000
+    assert dates == sorted(dates, reverse=True)
+
+
+def test_games_in_bulk():
+    async def test(server, client):
+        http = client.http
+        params = {"_bulk": "yes", "orderby": "created", "direction": "desc"}
+        pages = utils.paginate(http, http.BASE + "games", params, 2)
+        return [game async for game in pages], server.requests
+
+    games, requests = run_with_server(test, sizes=[1, 2, 3, 4, 5])
+    assert [game["id"] for game in games] == [
+        f"game{n}" for n in range(5, 0, -1)
+    ]
+    assert set(games[0]) == {"id", "names", "abbreviation", "weblink"}
+    assert requests == 3
+
+
+def test_games_filtered_by_name():
+    async def test(server, client):
+        by_name = await client.http.get("games", {"name": "game 1"})
+        by_abbr = await client.http.get("games", {"abbreviation": "game2"})
+        return by_name["data"], by_abbr["data"]
+
+    by_name, by_abbr = run_with_server(test, sizes=[1, 2, 10])
+    assert [game["id"] for game in by_name] == ["game1", "game10"]
+    assert [game["id"] for game in by_abbr] == ["game2"]
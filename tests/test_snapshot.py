@@ -0,0 +1,103 @@
+import srcom
+from srcom import LeaderboardSnapshot
+
+from .conftest import run_with_server
+
+
+def snapshot(*entries):
+    """Creates a snapshot from (run ID, player, time) tuples, fastest first"""
+    board = {
+        "runs": [
+            {
+                "place": place,
+                "run": {
+                    "id": id,
+                    "players": [{"rel": "user", "id": player}],
+                    "times": {"primary_t": time},
+                },
+            }
+            for place, (id, player, time) in enumerate(entries, 1)
+        ]
+    }
+    return LeaderboardSnapshot.from_json(board)
+
+
+BEFORE = snapshot(("r1", "a", 10.0), ("r2", "b", 20.0), ("r3", "c", 30.0))
+
+
+def changes(after, previous=BEFORE, **kwargs):
+    return [
+        (c.type, c.run, c.place, c.previous_place, c.record)
+        for c in after.diff(previous, **kwargs)
+    ]
+
+
+def test_unchanged():
+    assert changes(snapshot(*zip(BEFORE.ids, "abc", BEFORE.times))) == []
+
+
+def test_new_record():
+    after = snapshot(
+        ("r4", "d", 9.0),
+        ("r1", "a", 10.0),
+        ("r2", "b", 20.0),
+        ("r3", "c", 30.0),
+    )
+    assert changes(after) == [
+        ("new", "r4", 1, None, True),
+        ("moved", "r1", 2, 1, False),
+        ("moved", "r2", 3, 2, False),
+        ("moved", "r3", 4, 3, False),
+    ]
+    assert changes(after, moves=False) == [("new", "r4", 1, None, True)]
+
+
+def test_improved_and_removed():
+    after = snapshot(("r1", "a", 10.0), ("r5", "c", 15.0))
+    assert changes(after) == [
+        ("improved", "r5", 2, 3, False),
+        ("removed", "r2", None, 2, False),
+    ]
+
+
+def test_improved_record():
+    after = snapshot(("r5", "b", 5.0), ("r1", "a", 10.0), ("r3", "c", 30.0))
+    result = after.diff(BEFORE, moves=False, board="key")
+    assert [(c.type, c.run, c.record, c.board) for c in result] == [
+        ("improved", "r5", True, "key")
+    ]
+    assert result[0].previous_time == 20.0
+
+
+def test_slower_replacement():
+    # The PB was removed and an older, slower run of the team took its place
+    after = snapshot(("r1", "a", 10.0), ("r2", "b", 20.0), ("r0", "c", 40.0))
+    assert changes(after) == [
+        ("new", "r0", 3, None, False),
+        ("removed", "r3", None, 3, False),
+    ]
+
+
+def test_to_dict_round_trip():
+    copy = LeaderboardSnapshot.from_dict(BEFORE.to_dict())
+    assert copy.ids == BEFORE.ids
+    assert copy.players == BEFORE.players
+    assert copy.taken == BEFORE.taken
+    assert copy.diff(BEFORE) == []
+
+
+def test_watcher(tmp_path):
+    path = str(tmp_path / "boards.json")
+
+    async def test(server, client):
+        game = await client.get_game(id="game10")
+        watcher = srcom.LeaderboardWatcher(client, state_path=path)
+        key = watcher.add(game, top=5)
+        assert await watcher.poll() == []
+        assert await watcher.poll() == []
+        assert len(watcher.snapshots[key]) == 5
+
+        restored = srcom.LeaderboardWatcher(client, state_path=path)
+        assert restored.snapshots[key].ids == watcher.snapshots[key].ids
+
+    run_with_server(test, sizes=[10])
@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+from srcom.stream import ArrayStream
+
+DOCUMENT = json.dumps(
+    {
+        "data": [{"id": i, "name": "ゲーム"} for i in range(5)],
+        "pagination": {"links": [{"rel": "next", "uri": "next"}]},
+    }
+).encode()
+
+
+def feed_all(stream, chunks):
+    items = []
+    for i, chunk in enumerate(chunks):
+        items.extend(stream.feed(chunk, final=i == len(chunks) - 1))
+    return items
+
+
+def test_whole_document():
+    stream = ArrayStream()
+    assert feed_all(stream, [DOCUMENT]) == json.loads(DOCUMENT)["data"]
+
+
+def test_byte_chunks_split_characters():
+    # Chunks of one byte split the multi-byte characters
+    stream = ArrayStream()
+    chunks = [DOCUMENT[i : i + 1] for i in range(len(DOCUMENT))]
+    assert feed_all(stream, chunks) == json.loads(DOCUMENT)["data"]
+
+
+def test_items_yielded_as_completed():
+    stream = ArrayStream()
+    half = DOCUMENT.index(b'{"id": 2')
+    assert [item["id"] for item in stream.feed(DOCUMENT[:half])] == [0, 1]
+    assert [item["id"] for item in stream.feed(DOCUMENT[half:], True)] == [
+        2,
+        3,
+        4,
+    ]
+
+
+def test_envelope():
+    stream = ArrayStream()
+    feed_all(stream, [DOCUMENT[:40], DOCUMENT[40:]])
+    envelope = stream.envelope()
+    assert envelope["data"] == []
+    assert envelope["pagination"]["links"][0]["uri"] == "next"
+
+
+def test_other_key():
+    stream = ArrayStream("runs")
+    document = b'{"data": {"weblink": "x", "runs": [{"place": 1}, [2]]}}'
+    assert feed_all(stream, [document]) == [{"place": 1}, [2]]
+    assert stream.envelope() == {"data": {"weblink": "x", "runs": []}}
+
+
+def test_truncated_document():
+    stream = ArrayStream()
+    with pytest.raises(ValueError):
+        stream.feed(DOCUMENT[: DOCUMENT.index(b'{"id": 3') + 5], final=True)
@@ -0,0 +1,43 @@
+import concurrent.futures
+
+import srcom
+from benchmarks.server import start
+from srcom.sync import BackgroundLoop, SyncProxy
+
+
+def test_sync_client_from_threads():
+    server_loop, client_loop = BackgroundLoop(), BackgroundLoop()
+    server, runner = server_loop.run(start(port=0, sizes=[10]))
+    port = runner.addresses[0][1]
+    client = srcom.SyncClient(
+        loop=client_loop,
+        base_url=f"http://127.0.0.1:{port}/api/v1/",
+        rate_limit=None,
+        identity_map=True,
+    )
+    try:
+        game = client.get_game(id="game10")
+
+        def leaderboard(_):
+            return game.leaderboard(top=5, embed=["players"])
+
+        with concurrent.futures.ThreadPoolExecutor(4) as executor:
+            boards = list(executor.map(leaderboard, range(8)))
+
+        # Runs are returned as a list built on the loop, and are the same
+        # objects for every thread
+        assert all(isinstance(board, list) for board in boards)
+        assert [run.id for run in boards[0]] == [f"run10x{i}" for i in range(5)]
+        assert all(
+            a._wrapped is b._wrapped
+            for board in boards
+            for a, b in zip(board, boards[0])
+        )
+        players = boards[0][0].players()
+        assert isinstance(players[0], SyncProxy)
+        assert players[0].name == "Runner user0"
+    finally:
+        client.close()
+        server_loop.run(runner.cleanup())
+        client_loop.stop()
+        server_loop.stop()
@@ -0,0 +1,60 @@
+import asyncio
+import time
+
+import srcom
+
+from .conftest import run_with_server
+
+
+def test_stale_response_served_while_refreshed():
+    async def test(server, client):
+        url = client.http.BASE + "users/user1"
+        await client.http.get("users/user1")
+        # Make the cached response stale, i.e. within stale_ttl of expiring
+        key = srcom.cache.make_key(url)
+        value, expires = client.http.cache.memory.get(key)
+        client.http.cache.memory.set(key, value, time.time() + 60)
+
+        resp = await client.http.get("users/user1")
+        requests = server.requests
+        await asyncio.gather(*client.http._background)
+        return resp["data"]["id"], requests, server.requests
+
+    cache = srcom.ResponseCache(stale_ttl=600)
+    result = run_with_server(test, {"cache": cache}, sizes=[10], latency=0.05)
+    # Served without waiting, then refreshed in the background
+    assert result == ("user1", 1, 2)
+    assert cache.stats()["stale_hits"] == 1
+
+
+def test_warmer_keeps_leaderboard_cached():
+    async def test(server, client):
+        game = await client.get_game(id="game10")
+        warmer = srcom.LeaderboardWarmer(client)
+        warmer.add(game, top=5)
+        assert await warmer.refresh() == []
+        requests = server.requests
+        board = await game.leaderboard(5)
+        return len(list(board)), server.requests - requests
+
+    result = run_with_server(test, {"cache": srcom.ResponseCache()}, sizes=[10])
+    assert result == (5, 0)
+
+
+def test_stopping_warmer_doesnt_cancel_callers():
+    async def test(server, client):
+        game = await client.get_game(id="game10")
+        warmer = srcom.LeaderboardWarmer(client, interval=60)
+        warmer.add(game)
+        warmer.start()
+        await asyncio.sleep(0.01)
+        # Shares the warmer's request, which is then stopped
+        board = asyncio.ensure_future(game.leaderboard())
+        await asyncio.sleep(0.01)
+        warmer.stop()
+        return len(list(await board))
+
+    result = run_with_server(
+        test, {"cache": srcom.ResponseCache()}, sizes=[10], latency=0.1
+    )
+    assert result == 10